@@ -36,6 +36,7 @@ target_metadata = SQLModel.metadata
 from app.modules.user import models as user_models
 from app.modules.diagnoses import models as diagnoses_models
 from app.modules.consultation import models as consultation_models
+from app.modules.analytics import models as analytics_models
 
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
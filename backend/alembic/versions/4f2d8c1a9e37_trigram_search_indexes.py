@@ -0,0 +1,54 @@
+"""trigram search indexes
+
+Revision ID: 4f2d8c1a9e37
+Revises: 9b61ffd50773
+Create Date: 2026-10-17 09:12:41.218305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f2d8c1a9e37'
+down_revision: Union[str, Sequence[str], None] = '9b61ffd50773'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, table, column) for every ILIKE-searched column
+TRIGRAM_INDEXES = [
+    ('ix_consultation_patient_full_name_trgm', 'consultation', 'patient_full_name'),
+    ('ix_consultation_notes_trgm', 'consultation', 'notes'),
+    ('ix_user_full_name_trgm', 'user', 'full_name'),
+    ('ix_user_email_trgm', 'user', 'email'),
+    ('ix_diagnosis_code_trgm', 'diagnosis', 'code'),
+    ('ix_diagnosis_description_trgm', 'diagnosis', 'description'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # Build without blocking writes; CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, column in TRIGRAM_INDEXES:
+            op.create_index(
+                name,
+                table,
+                [column],
+                unique=False,
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(TRIGRAM_INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,53 @@
+"""list access indexes
+
+Revision ID: 7c3e5a91d2b4
+Revises: 4f2d8c1a9e37
+Create Date: 2026-10-17 14:05:22.671093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3e5a91d2b4'
+down_revision: Union[str, Sequence[str], None] = '4f2d8c1a9e37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, table, columns, covered columns) for the hot list and lookup paths
+LIST_INDEXES = [
+    # Doctor-scoped consultation lists, per sort order
+    ('ix_consultation_doctor_id_consultation_date', 'consultation', ['doctor_id', 'consultation_date', 'id'], ['patient_full_name', 'created_at']),
+    ('ix_consultation_doctor_id_created_at', 'consultation', ['doctor_id', 'created_at', 'id'], ['patient_full_name', 'consultation_date']),
+    # Default created_at sort
+    ('ix_consultation_created_at', 'consultation', ['created_at', 'id'], []),
+    ('ix_diagnosis_created_at', 'diagnosis', ['created_at', 'id'], []),
+    # Consultations per diagnosis
+    ('ix_consultation_diagnoses_diagnosis_id', 'consultation_diagnoses', ['diagnosis_id', 'consultation_id'], []),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Build without blocking writes; CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns, include in LIST_INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_include=include,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(LIST_INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,71 @@
+"""analytics rollups
+
+Revision ID: a3f8d61c5e29
+Revises: e1a4b7c93f20
+Create Date: 2026-10-17 19:21:37.108254
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f8d61c5e29'
+down_revision: Union[str, Sequence[str], None] = 'e1a4b7c93f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same statements as app.modules.analytics.service.rebuild_rollups over all days
+BACKFILL_SQL = [
+    """
+    INSERT INTO consultation_daily_counts (day, doctor_id, consultations)
+    SELECT CAST(consultation_date AS DATE), doctor_id, count(*)
+    FROM consultation
+    WHERE doctor_id IS NOT NULL
+    GROUP BY CAST(consultation_date AS DATE), doctor_id
+    """,
+    """
+    INSERT INTO diagnosis_daily_counts (day, doctor_id, diagnosis_id, consultations)
+    SELECT CAST(consultation.consultation_date AS DATE), consultation.doctor_id, consultation_diagnoses.diagnosis_id, count(*)
+    FROM consultation
+    JOIN consultation_diagnoses ON consultation_diagnoses.consultation_id = consultation.id
+    WHERE consultation.doctor_id IS NOT NULL
+    GROUP BY CAST(consultation.consultation_date AS DATE), consultation.doctor_id, consultation_diagnoses.diagnosis_id
+    """,
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('consultation_daily_counts',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('doctor_id', sa.Uuid(), nullable=False),
+    sa.Column('consultations', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['doctor_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('day', 'doctor_id')
+    )
+    op.create_index('ix_consultation_daily_counts_doctor_id_day', 'consultation_daily_counts', ['doctor_id', 'day'], unique=False)
+    op.create_table('diagnosis_daily_counts',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('doctor_id', sa.Uuid(), nullable=False),
+    sa.Column('diagnosis_id', sa.Uuid(), nullable=False),
+    sa.Column('consultations', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['diagnosis_id'], ['diagnosis.id'], ),
+    sa.ForeignKeyConstraint(['doctor_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('day', 'doctor_id', 'diagnosis_id')
+    )
+    op.create_index('ix_diagnosis_daily_counts_doctor_id_day', 'diagnosis_daily_counts', ['doctor_id', 'day'], unique=False)
+
+    # Existing consultations; later ones are counted as they are written
+    for statement in BACKFILL_SQL:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_diagnosis_daily_counts_doctor_id_day', table_name='diagnosis_daily_counts')
+    op.drop_table('diagnosis_daily_counts')
+    op.drop_index('ix_consultation_daily_counts_doctor_id_day', table_name='consultation_daily_counts')
+    op.drop_table('consultation_daily_counts')
@@ -0,0 +1,47 @@
+"""diagnosis codepoint sort indexes
+
+Revision ID: c4e7b2d90a16
+Revises: a3f8d61c5e29
+Create Date: 2026-10-17 21:02:44.318520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e7b2d90a16'
+down_revision: Union[str, Sequence[str], None] = 'a3f8d61c5e29'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Diagnosis lists sort code and description with COLLATE "C", like the
+# in-process catalog whose cursors they resume
+SORT_INDEXES = [
+    ('ix_diagnosis_code_c', 'code'),
+    ('ix_diagnosis_description_c', 'description'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Build without blocking writes; CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, column in SORT_INDEXES:
+            op.create_index(
+                name,
+                'diagnosis',
+                [sa.text(f'{column} COLLATE "C"'), 'id'],
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(SORT_INDEXES):
+            op.drop_index(name, table_name='diagnosis', postgresql_concurrently=True, if_exists=True)
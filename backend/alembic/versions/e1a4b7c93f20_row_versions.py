@@ -0,0 +1,38 @@
+"""row versions
+
+Revision ID: e1a4b7c93f20
+Revises: 7c3e5a91d2b4
+Create Date: 2026-10-17 16:48:09.334512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1a4b7c93f20'
+down_revision: Union[str, Sequence[str], None] = '7c3e5a91d2b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+VERSIONED_TABLES = ['consultation', 'user']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in VERSIONED_TABLES:
+        # A constant default is stored once instead of rewriting every row;
+        # existing rows keep it after the default is dropped
+        op.add_column(
+            table,
+            sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text("timezone('utc', now())")),
+        )
+        op.alter_column(table, 'updated_at', server_default=None)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in reversed(VERSIONED_TABLES):
+        op.drop_column(table, 'updated_at')
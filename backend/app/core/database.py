@@ -1,23 +1,418 @@
-from typing import Annotated
-from fastapi import Depends
+import asyncio
+import logging
+import re
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Annotated, Any
+from fastapi import Depends, Request, Response
 from collections.abc import AsyncGenerator
 from sqlmodel import SQLModel
-from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.core.metrics import DB_SECONDS_BUCKETS, Histogram, PrometheusText, current_route, instrument_engine
 
-engine = create_async_engine(
-    str(settings.SQLALCHEMY_DATABASE_URI),
-    future=True,
+logger = logging.getLogger(__name__)
+
+# Connection wait buckets in seconds, up to the default pool timeout
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.wait_seconds = Histogram(POOL_WAIT_BUCKETS)
+        self.timeouts = 0
+
+    def _do_get(self) -> Any:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.wait_seconds.observe(time.perf_counter() - start)
+
+
+# Statement fingerprints: literals and bind parameters become "?", and IN
+# lists or multi-row VALUES collapse to a single "(?)" whatever their length
+_FINGERPRINT_SUBSTITUTIONS = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"(?:\$\d+|%\(\w+\)s|%s)(?:::\w+(?:\[\])?)?"), "?"),
+    (re.compile(r"(?<![\w$.])\d+(?:\.\d+)?(?![\w.])"), "?"),
+    (re.compile(r"\s+"), " "),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(?)"),
+    (re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+"), "(?)"),
+]
+# Route of statements run outside requests (startup, background tasks)
+BACKGROUND_ROUTE = "background"
+# A slow fingerprint's plan is logged at most this often
+SLOW_QUERY_EXPLAIN_INTERVAL = 300.0
+# Generic plans need no parameter values, so none end up in the logs
+_EXPLAIN_PREFIXES = {"postgresql": "EXPLAIN (GENERIC_PLAN) "}
+# GENERIC_PLAN appeared in PostgreSQL 16
+_EXPLAIN_MIN_VERSIONS = {"postgresql": (16,)}
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    """Parameter-free form of a statement, the same for every execution of a query."""
+    for pattern, replacement in _FINGERPRINT_SUBSTITUTIONS:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+
+class StatementStats:
+    __slots__ = ("count", "total_seconds", "max_seconds", "duration", "routes", "explained_at")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.duration = Histogram(DB_SECONDS_BUCKETS)
+        self.routes: dict[str, int] = {}
+        self.explained_at: float | None = None
+
+    def p99_seconds(self) -> float:
+        return min(self.duration.quantile(0.99), self.max_seconds)
+
+
+class QueryStats:
+    """
+    Per-worker aggregate of the statements run since startup, by fingerprint.
+
+    Statements slower than `DB_SLOW_QUERY_SECONDS` are logged with their
+    fingerprint and route and, with `DB_SLOW_QUERY_EXPLAIN` on PostgreSQL,
+    their generic plan. Plans are fetched one at a time per database over a
+    dedicated single-connection engine with short timeouts: slow queries are
+    when the application pool is most likely exhausted. Once
+    `max_fingerprints` are tracked, statements of new fingerprints are only
+    counted as dropped.
+    """
+
+    def __init__(self, max_fingerprints: int) -> None:
+        self.max_fingerprints = max_fingerprints
+        self.statements: dict[str, StatementStats] = {}
+        self.dropped = 0
+        self.since = datetime.now(timezone.utc)
+        self._explains: set[asyncio.Task[None]] = set()
+        self._explain_engines: dict[Any, AsyncEngine] = {}
+        self._explaining: set[Any] = set()
+        self._explain_unsupported: set[Any] = set()
+
+    def instrument(self, engine: AsyncEngine) -> None:
+        """Time the statements run on `engine`."""
+        event.listen(engine.sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine.sync_engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        conn.info["query_stats_start"] = time.perf_counter()
+
+    def _after_cursor_execute(self, conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        start = conn.info.pop("query_stats_start", None)
+        if start is None or (context is not None and not context.execution_options.get("query_stats", True)):
+            return
+        duration = time.perf_counter() - start
+        stats = self.record(statement, duration)
+        slow = 0 < settings.DB_SLOW_QUERY_SECONDS <= duration
+        if stats is None or not slow or not settings.DB_SLOW_QUERY_EXPLAIN or executemany:
+            return
+        now = time.monotonic()
+        if stats.explained_at is None or now - stats.explained_at >= SLOW_QUERY_EXPLAIN_INTERVAL:
+            stats.explained_at = now
+            self._schedule_explain(conn.engine, statement)
+
+    def record(self, statement: str, duration: float) -> StatementStats | None:
+        """Aggregate one execution, logging it when slow. None when its fingerprint is not tracked."""
+        key = fingerprint(statement)
+        route = current_route() or BACKGROUND_ROUTE
+        stats = self.statements.get(key)
+        if stats is None:
+            if len(self.statements) >= self.max_fingerprints:
+                self.dropped += 1
+            else:
+                stats = self.statements[key] = StatementStats()
+        if stats is not None:
+            stats.count += 1
+            stats.total_seconds += duration
+            stats.max_seconds = max(stats.max_seconds, duration)
+            stats.duration.observe(duration)
+            stats.routes[route] = stats.routes.get(route, 0) + 1
+        if 0 < settings.DB_SLOW_QUERY_SECONDS <= duration:
+            logger.warning("Slow query (%.3fs, %s): %s", duration, route, key)
+        return stats
+
+    def _schedule_explain(self, sync_engine: Any, statement: str) -> None:
+        dialect_name = sync_engine.dialect.name
+        prefix = _EXPLAIN_PREFIXES.get(dialect_name)
+        if prefix is None or not statement.lstrip().upper().startswith(_EXPLAINABLE):
+            return
+        url = sync_engine.url
+        version = sync_engine.dialect.server_version_info
+        minimum = _EXPLAIN_MIN_VERSIONS.get(dialect_name)
+        if minimum is not None and version is not None and version < minimum:
+            if url not in self._explain_unsupported:
+                self._explain_unsupported.add(url)
+                logger.warning(
+                    "DB_SLOW_QUERY_EXPLAIN needs %s %s or later (server is %s), not explaining slow queries",
+                    dialect_name, ".".join(map(str, minimum)), ".".join(map(str, version)),
+                )
+            return
+        if url in self._explaining:
+            # One plan at a time per database; this fingerprint is retried after the interval
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        # On its own connection, so a failing EXPLAIN cannot abort the request's transaction
+        self._explaining.add(url)
+        task = loop.create_task(self._explain(self._explain_engine(sync_engine), prefix + statement, fingerprint(statement)))
+        self._explains.add(task)
+        task.add_done_callback(self._explains.discard)
+        task.add_done_callback(lambda _: self._explaining.discard(url))
+
+    def _explain_engine(self, sync_engine: Any) -> AsyncEngine:
+        """Single-connection engine for the plans of `sync_engine`'s database."""
+        engine = self._explain_engines.get(sync_engine.url)
+        if engine is None:
+            timeout = settings.DB_SLOW_QUERY_EXPLAIN_TIMEOUT
+            engine = self._explain_engines[sync_engine.url] = create_async_engine(
+                sync_engine.url,
+                pool_size=1,
+                max_overflow=0,
+                pool_timeout=timeout,
+                pool_recycle=settings.DB_POOL_RECYCLE,
+                pool_pre_ping=settings.DB_POOL_PRE_PING,
+                connect_args={
+                    "timeout": timeout,
+                    "server_settings": {"statement_timeout": str(int(timeout * 1000))},
+                },
+            )
+        return engine
+
+    async def _explain(self, engine: AsyncEngine, explain: str, key: str) -> None:
+        try:
+            async with asyncio.timeout(settings.DB_SLOW_QUERY_EXPLAIN_TIMEOUT):
+                async with engine.connect() as conn:
+                    conn = await conn.execution_options(query_stats=False)
+                    result = await conn.exec_driver_sql(explain)
+                    plan = "\n".join(str(row[0]) for row in result)
+        except (exc.SQLAlchemyError, OSError, TimeoutError) as e:
+            logger.warning("Could not explain slow query %s: %s", key, str(e) or "timed out")
+            return
+        logger.warning("Plan of slow query %s:\n%s", key, plan)
+
+    async def close(self) -> None:
+        """Close the connections used for plans."""
+        for engine in self._explain_engines.values():
+            await engine.dispose()
+        self._explain_engines.clear()
+
+    def top(self, limit: int) -> list[dict[str, Any]]:
+        """The `limit` fingerprints with the most total time."""
+        ranked = sorted(self.statements.items(), key=lambda item: item[1].total_seconds, reverse=True)
+        return [
+            {
+                "fingerprint": key,
+                "count": stats.count,
+                "total_seconds": stats.total_seconds,
+                "mean_seconds": stats.total_seconds / stats.count,
+                "p99_seconds": stats.p99_seconds(),
+                "max_seconds": stats.max_seconds,
+                "routes": [
+                    {"route": route, "count": count}
+                    for route, count in sorted(stats.routes.items(), key=lambda item: item[1], reverse=True)
+                ],
+            }
+            for key, stats in ranked[:limit]
+        ]
+
+
+query_stats = QueryStats(settings.DB_QUERY_STATS_MAX_FINGERPRINTS)
+
+
+def create_engine(url: str) -> AsyncEngine:
+    """Create an async engine with the pool settings from `Settings`."""
+    engine = create_async_engine(
+        url,
+        future=True,
+        poolclass=InstrumentedAsyncPool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE},
+    )
+    instrument_engine(engine)
+    query_stats.instrument(engine)
+    return engine
+
+engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+
+async_session_maker = async_sessionmaker(
+    engine, class_=AsyncSession, expire_on_commit=False
 )
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    async_session = sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )  # ty:ignore[no-matching-overload]
-    async with async_session() as session:
+    async with async_session_maker() as session:
         yield session
 
-AsyncSessionDep = Annotated[AsyncSession, Depends(get_db)]
\ No newline at end of file
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_db)]
+
+
+class ReplicaSet:
+    """
+    Read replicas with round-robin selection.
+
+    A replica that fails to hand out a connection is skipped for
+    `retry_seconds` before it is tried again.
+    """
+
+    def __init__(self, engines: list[AsyncEngine], retry_seconds: float) -> None:
+        self.engines = engines
+        self.retry_seconds = retry_seconds
+        self.session_makers = [
+            async_sessionmaker(replica, class_=AsyncSession, expire_on_commit=False)
+            for replica in engines
+        ]
+        self._unhealthy_until: dict[int, float] = {}
+        self._next = 0
+
+    def is_healthy(self, index: int) -> bool:
+        return self._unhealthy_until.get(index, 0.0) <= time.monotonic()
+
+    def candidates(self) -> list[int]:
+        """Indexes of healthy replicas, starting from the next one in rotation."""
+        count = len(self.engines)
+        if not count:
+            return []
+        start = self._next
+        self._next = (start + 1) % count
+        order = [(start + offset) % count for offset in range(count)]
+        return [index for index in order if self.is_healthy(index)]
+
+    def mark_unhealthy(self, index: int) -> None:
+        self._unhealthy_until[index] = time.monotonic() + self.retry_seconds
+
+    def mark_healthy(self, index: int) -> None:
+        self._unhealthy_until.pop(index, None)
+
+replicas = ReplicaSet(
+    [create_engine(uri) for uri in settings.SQLALCHEMY_REPLICA_URIS],
+    retry_seconds=settings.DB_REPLICA_RETRY_SECONDS,
+)
+
+# Read-your-writes: clients that just wrote keep reading from the primary for a short window
+READ_PRIMARY_COOKIE = "read_primary_until"
+
+def pin_reads_to_primary(response: Response) -> None:
+    """Route this client's reads to the primary for `DB_READ_YOUR_WRITES_SECONDS`."""
+    if not replicas.engines or settings.DB_READ_YOUR_WRITES_SECONDS <= 0:
+        return
+    response.set_cookie(
+        key=READ_PRIMARY_COOKIE,
+        value=str(time.time() + settings.DB_READ_YOUR_WRITES_SECONDS),
+        max_age=settings.DB_READ_YOUR_WRITES_SECONDS,
+        httponly=True,
+        secure=settings.SESSION_COOKIE_SECURE,
+        samesite=settings.SESSION_COOKIE_SAMESITE,
+    )
+
+def reads_pinned_to_primary(request: Request) -> bool:
+    value = request.cookies.get(READ_PRIMARY_COOKIE)
+    if not value:
+        return False
+    try:
+        return float(value) > time.time()
+    except ValueError:
+        return False
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session for read-only endpoints.
+
+    Uses a healthy replica when one is configured and falls back to the primary
+    when none is reachable or the client recently wrote (read-your-writes).
+    """
+    if not reads_pinned_to_primary(request):
+        for index in replicas.candidates():
+            async with replicas.session_makers[index]() as session:
+                try:
+                    await session.connection()
+                except (exc.SQLAlchemyError, OSError) as e:
+                    logger.warning("Read replica %d unavailable, skipping: %s", index, e)
+                    replicas.mark_unhealthy(index)
+                    continue
+                replicas.mark_healthy(index)
+                yield session
+                return
+
+    async with async_session_maker() as session:
+        yield session
+
+ReadOnlySessionDep = Annotated[AsyncSession, Depends(get_read_db)]
+
+
+def get_pool_stats(name: str, engine: AsyncEngine) -> dict[str, Any]:
+    """Snapshot the connection pool of an engine."""
+    pool = engine.pool
+    stats: dict[str, Any] = {
+        "name": name,
+        "size": pool.size(),  # type: ignore[attr-defined]
+        "checked_in": pool.checkedin(),  # type: ignore[attr-defined]
+        "checked_out": pool.checkedout(),  # type: ignore[attr-defined]
+        # QueuePool counts overflow from -pool_size; only report connections beyond the pool
+        "overflow": max(pool.overflow(), 0),  # type: ignore[attr-defined]
+        "timeouts": 0,
+        "healthy": True,
+        "wait_seconds": None,
+    }
+    if isinstance(pool, InstrumentedAsyncPool):
+        stats["timeouts"] = pool.timeouts
+        stats["wait_seconds"] = pool.wait_seconds.snapshot()
+    return stats
+
+
+def get_all_pool_stats() -> list[dict[str, Any]]:
+    """Snapshot every connection pool used by the application."""
+    stats = [get_pool_stats("primary", engine)]
+    for index, replica in enumerate(replicas.engines):
+        replica_stats = get_pool_stats(f"replica-{index}", replica)
+        replica_stats["healthy"] = replicas.is_healthy(index)
+        stats.append(replica_stats)
+    return stats
+
+
+def write_pool_metrics(text: PrometheusText) -> None:
+    """Add the connection pool gauges to a Prometheus exposition."""
+    pools = get_all_pool_stats()
+
+    def gauge(name: str, help: str, key: str) -> None:
+        text.gauge(name, help, [({"pool": stats["name"]}, stats[key]) for stats in pools])
+
+    gauge("db_pool_size", "Configured connections per pool", "size")
+    gauge("db_pool_checked_out", "Connections in use", "checked_out")
+    gauge("db_pool_checked_in", "Idle connections", "checked_in")
+    gauge("db_pool_overflow", "Connections open beyond the pool size", "overflow")
+    text.gauge("db_pool_healthy", "Whether the pool is in rotation (replicas)", [
+        ({"pool": stats["name"]}, int(stats["healthy"])) for stats in pools
+    ])
+    text.counter("db_pool_timeouts_total", "Checkouts that timed out waiting for a connection", [
+        ({"pool": stats["name"]}, stats["timeouts"]) for stats in pools
+    ])
+    engines = [("primary", engine), *((f"replica-{index}", replica) for index, replica in enumerate(replicas.engines))]
+    text.histogram("db_pool_wait_seconds", "Time waited for a connection at checkout", [
+        ({"pool": name}, pool_engine.pool.wait_seconds)
+        for name, pool_engine in engines
+        if isinstance(pool_engine.pool, InstrumentedAsyncPool)
+    ])
@@ -0,0 +1,37 @@
+import hashlib
+from typing import Any
+
+from fastapi import Request, Response, status
+
+# Per-user responses: browsers keep them but revalidate every time
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(version: Any, *parts: Any) -> str:
+    """Strong ETag for a resource `version` and the parameters that shape its representation."""
+    digest = hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()[:16]
+    return f'"{version}-{digest}"' if parts else f'"{version}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Whether the request's If-None-Match covers `etag`.
+
+    If-None-Match uses weak comparison, so a W/ prefix on either side is ignored.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidate = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == candidate for tag in header.split(","))
+
+
+def cache_headers(etag: str, cache_control: str) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": cache_control}
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    """304 answer for a matching If-None-Match; repeats the validators as required."""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(etag, cache_control))
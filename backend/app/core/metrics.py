@@ -0,0 +1,297 @@
+import math
+import time
+from bisect import bisect_left
+from collections.abc import Iterable, Sequence
+from contextvars import ContextVar
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Default latency buckets in seconds
+LATENCY_BUCKETS: tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if math.isinf(bound) else repr(bound)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram with Prometheus-style cumulative snapshots.
+
+    Observations are cheap (one bisect and two additions) so it can sit on hot
+    paths such as connection checkout. It is not thread-safe; observe from the
+    event loop thread.
+    """
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self.buckets: tuple[float, ...] = tuple(sorted(buckets)) + (math.inf,)
+        self.counts: list[int] = [0] * len(self.buckets)
+        self.sum: float = 0.0
+        self.count: int = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return cumulative bucket counts keyed by their upper bound."""
+        cumulative = 0
+        buckets = []
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            buckets.append({"le": _format_bound(bound), "count": cumulative})
+        return {"buckets": buckets, "count": self.count, "sum": self.sum}
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate the `q` quantile by linear interpolation inside its bucket,
+        like Prometheus' histogram_quantile. Past the last finite bound the
+        estimate is infinite; cap it with the observed maximum.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, self.counts):
+            if count and cumulative + count >= rank:
+                if math.isinf(bound):
+                    return math.inf
+                return lower + (bound - lower) * (rank - cumulative) / count
+            cumulative += count
+            lower = bound
+        return lower
+
+
+# Per-request work, in bytes and counts
+SIZE_BUCKETS: tuple[float, ...] = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+COUNT_BUCKETS: tuple[float, ...] = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+DB_SECONDS_BUCKETS: tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+# Route label of requests no route matched (404s), keeping label cardinality bounded
+UNMATCHED_ROUTE = "unmatched"
+# Method label of anything else: clients may send arbitrary method tokens
+HTTP_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "CONNECT", "TRACE"})
+OTHER_METHOD = "other"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class RequestStats:
+    """Database and Redis work done while serving one request."""
+
+    __slots__ = ("scope", "db_seconds", "db_statements", "redis_round_trips")
+
+    def __init__(self, scope: Scope | None = None) -> None:
+        self.scope = scope
+        self.db_seconds = 0.0
+        self.db_statements = 0
+        self.redis_round_trips = 0
+
+
+_request_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def record_redis_round_trip() -> None:
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.redis_round_trips += 1
+
+
+def _before_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+    if _request_stats.get() is not None:
+        # A connection runs one statement at a time
+        conn.info["metrics_statement_start"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+    stats = _request_stats.get()
+    start = conn.info.pop("metrics_statement_start", None)
+    if stats is not None and start is not None:
+        stats.db_seconds += time.perf_counter() - start
+        stats.db_statements += 1
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Attribute the statements run on `engine` to the request being served."""
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class RouteMetrics:
+    __slots__ = ("duration", "response_size", "db_seconds", "db_statements", "redis_round_trips", "statuses")
+
+    def __init__(self) -> None:
+        self.duration = Histogram(LATENCY_BUCKETS)
+        self.response_size = Histogram(SIZE_BUCKETS)
+        self.db_seconds = Histogram(DB_SECONDS_BUCKETS)
+        self.db_statements = Histogram(COUNT_BUCKETS)
+        self.redis_round_trips = Histogram(COUNT_BUCKETS)
+        self.statuses: dict[int, int] = {}
+
+
+def route_label(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", UNMATCHED_ROUTE) if route is not None else UNMATCHED_ROUTE
+
+
+def method_label(scope: Scope) -> str:
+    method = scope["method"]
+    return method if method in HTTP_METHODS else OTHER_METHOD
+
+
+def current_route() -> str | None:
+    """Route template of the request being served, None outside requests."""
+    stats = _request_stats.get()
+    if stats is None or stats.scope is None:
+        return None
+    return route_label(stats.scope)
+
+
+class RequestMetrics:
+    """
+    Per-route request metrics, keyed by method and route template.
+
+    In-flight requests are kept as their ASGI scopes and grouped by route
+    when the metrics are rendered: the route is only known once the router
+    has matched it, and resolving it up front would cost more than the rest
+    of the bookkeeping together.
+    """
+
+    def __init__(self) -> None:
+        self.routes: dict[tuple[str, str], RouteMetrics] = {}
+        self.active: dict[int, Scope] = {}
+
+    def observe(self, scope: Scope, status: int, duration: float, size: int, stats: RequestStats) -> None:
+        key = (method_label(scope), route_label(scope))
+        route = self.routes.get(key)
+        if route is None:
+            route = self.routes[key] = RouteMetrics()
+        route.duration.observe(duration)
+        route.response_size.observe(size)
+        route.db_seconds.observe(stats.db_seconds)
+        route.db_statements.observe(stats.db_statements)
+        route.redis_round_trips.observe(stats.redis_round_trips)
+        route.statuses[status] = route.statuses.get(status, 0) + 1
+
+    def in_flight(self) -> dict[tuple[str, str], int]:
+        counts: dict[tuple[str, str], int] = {}
+        for scope in list(self.active.values()):
+            key = (method_label(scope), route_label(scope))
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def write(self, text: "PrometheusText") -> None:
+        routes = sorted(self.routes.items())
+
+        def labels(key: tuple[str, str]) -> dict[str, str]:
+            return {"method": key[0], "route": key[1]}
+
+        text.counter("http_requests_total", "Requests served, by route and status", [
+            ({**labels(key), "status": str(status)}, count)
+            for key, route in routes
+            for status, count in sorted(route.statuses.items())
+        ])
+        text.gauge("http_requests_in_flight", "Requests being served", [
+            (labels(key), count) for key, count in sorted(self.in_flight().items())
+        ])
+        text.histogram("http_request_duration_seconds", "Time to serve a request",
+                       [(labels(key), route.duration) for key, route in routes])
+        text.histogram("http_response_size_bytes", "Response body size",
+                       [(labels(key), route.response_size) for key, route in routes])
+        text.histogram("http_request_db_seconds", "Time spent in database statements per request",
+                       [(labels(key), route.db_seconds) for key, route in routes])
+        text.histogram("http_request_db_statements", "Database statements per request",
+                       [(labels(key), route.db_statements) for key, route in routes])
+        text.histogram("http_request_redis_round_trips", "Redis round trips per request",
+                       [(labels(key), route.redis_round_trips) for key, route in routes])
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware feeding `RequestMetrics`."""
+
+    def __init__(self, app: ASGIApp, metrics: RequestMetrics) -> None:
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        stats = RequestStats(scope)
+        token = _request_stats.set(stats)
+        request_id = id(scope)
+        self.metrics.active[request_id] = scope
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            del self.metrics.active[request_id]
+            _request_stats.reset(token)
+            self.metrics.observe(scope, status, duration, size, stats)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+class PrometheusText:
+    """Builder for the Prometheus text exposition format."""
+
+    def __init__(self) -> None:
+        self.lines: list[str] = []
+
+    def _header(self, name: str, kind: str, help: str) -> None:
+        self.lines.append(f"# HELP {name} {help}")
+        self.lines.append(f"# TYPE {name} {kind}")
+
+    def _samples(self, name: str, kind: str, help: str, samples: Iterable[tuple[dict[str, str], float]]) -> None:
+        self._header(name, kind, help)
+        for labels, value in samples:
+            self.lines.append(f"{name}{_format_labels(labels)} {value!r}")
+
+    def counter(self, name: str, help: str, samples: Iterable[tuple[dict[str, str], float]]) -> None:
+        self._samples(name, "counter", help, samples)
+
+    def gauge(self, name: str, help: str, samples: Iterable[tuple[dict[str, str], float]]) -> None:
+        self._samples(name, "gauge", help, samples)
+
+    def histogram(self, name: str, help: str, series: Iterable[tuple[dict[str, str], Histogram]]) -> None:
+        self._header(name, "histogram", help)
+        for labels, histogram in series:
+            snapshot = histogram.snapshot()
+            for bucket in snapshot["buckets"]:
+                self.lines.append(f"{name}_bucket{_format_labels({**labels, 'le': bucket['le']})} {bucket['count']}")
+            self.lines.append(f"{name}_sum{_format_labels(labels)} {snapshot['sum']!r}")
+            self.lines.append(f"{name}_count{_format_labels(labels)} {snapshot['count']}")
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,100 @@
+import asyncio
+import inspect
+import logging
+from collections.abc import Awaitable, Callable
+
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MessageHandler = Callable[[str], Awaitable[None] | None]
+ConnectHandler = Callable[[], Awaitable[None]]
+DisconnectHandler = Callable[[], None]
+
+# Dedicated asyncio client: a subscribed connection cannot serve other commands,
+# and it must not inherit the shared pool's socket timeout while idling in listen()
+pubsub_client = aioredis.from_url(
+    str(settings.REDIS_DSN),
+    encoding="utf-8",
+    decode_responses=True,
+)
+
+
+class PubSub:
+    """
+    Cross-worker notifications over Redis pub/sub.
+
+    Handlers are registered per channel before `start()`. A single background
+    task per worker listens on every channel and reconnects with backoff;
+    `on_connect` callbacks run after each (re)subscribe so subscribers can
+    resynchronise state that changed while they were disconnected;
+    `on_disconnect` callbacks run as soon as the connection is lost.
+    """
+
+    def __init__(self, client: aioredis.Redis) -> None:
+        self.client = client
+        self._handlers: dict[str, list[MessageHandler]] = {}
+        self._connect_handlers: list[ConnectHandler] = []
+        self._disconnect_handlers: list[DisconnectHandler] = []
+        self._task: asyncio.Task[None] | None = None
+
+    def subscribe(self, channel: str, handler: MessageHandler) -> None:
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def on_connect(self, handler: ConnectHandler) -> None:
+        self._connect_handlers.append(handler)
+
+    def on_disconnect(self, handler: DisconnectHandler) -> None:
+        self._disconnect_handlers.append(handler)
+
+    async def publish(self, channel: str, message: str) -> None:
+        await self.client.publish(channel, message)
+
+    def start(self) -> None:
+        if self._task is None and self._handlers:
+            self._task = asyncio.create_task(self._listen(), name="redis-pubsub")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _dispatch(self, channel: str, data: str) -> None:
+        for handler in self._handlers.get(channel, []):
+            try:
+                result = handler(data)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logger.exception("Pub/sub handler for %s failed", channel)
+
+    async def _listen(self) -> None:
+        backoff = 0.5
+        while True:
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(*self._handlers)
+                for handler in self._connect_handlers:
+                    await handler()
+                backoff = 0.5
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        await self._dispatch(message["channel"], message["data"])
+            except (RedisError, OSError) as e:
+                for disconnect_handler in self._disconnect_handlers:
+                    disconnect_handler()
+                logger.warning("Pub/sub connection lost, retrying in %.1fs: %s", backoff, e)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                await pubsub.aclose()
+
+
+pubsub = PubSub(pubsub_client)
@@ -1,12 +1,24 @@
+import base64
+import binascii
+import json
+import uuid
+from datetime import date, datetime
+from collections.abc import AsyncIterator
+from enum import Enum
+from functools import cache
+
 from sqlmodel.ext.asyncio.session import AsyncSession
 from app.core.schemas import SortDirection
 from typing import Any, Generic, TypeVar
+from sqlalchemy import String, Text, cast, literal_column, text, tuple_
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlmodel import asc, desc, func, select, col, or_
 from sqlmodel import SQLModel
-from typing_extensions import Self
-from pydantic import BaseModel
+from typing_extensions import Self, TypedDict
+from pydantic import BaseModel, TypeAdapter
 
-from app.core.schemas import PaginationParams, SortParams, SearchParams
+from app.core.exceptions import InvalidCursorException
+from app.core.schemas import CountMode, PaginationParams, SortParams, SearchParams
 
 
 # Query builder
@@ -14,7 +26,89 @@ T = TypeVar("T")
 
 class QueryResult(BaseModel, Generic[T]):
     data: list[T]
-    count: int
+    count: int | None
+    has_more: bool = False
+    next_cursor: str | None = None
+
+
+# Keyset cursors
+def _encode_cursor_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+def _decode_cursor_value(value: Any, column: Any) -> Any:
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except (AttributeError, NotImplementedError):
+        return value
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+def encode_cursor(sorting: SortParams, value: Any, row_id: Any) -> str:
+    """Encode the sort key and id of the last row of a page into an opaque cursor."""
+    payload = {
+        "f": sorting.field,
+        "d": sorting.direction.value,
+        "v": _encode_cursor_value(value),
+        "id": _encode_cursor_value(row_id),
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    """Decode a cursor produced by `encode_cursor`."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (binascii.Error, ValueError):
+        raise InvalidCursorException()
+    if not isinstance(payload, dict) or not {"f", "d", "v", "id"} <= payload.keys():
+        raise InvalidCursorException()
+    return payload
+
+# Search
+def escape_like(value: str) -> str:
+    """Escape LIKE wildcards in `value`, for patterns using `\\` as the escape character."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+# JSON aggregation for projected queries
+def json_array_agg(dialect_name: str, fields: dict[str, Any], order_by: Any = None) -> Any:
+    """
+    Aggregate `fields` of the grouped rows into a JSON array of objects.
+
+    The array is returned as text on every dialect (an empty array when there
+    are no rows); decode it with `json_rows`. `order_by` is only honoured on
+    PostgreSQL.
+    """
+    pairs = [item for name, column in fields.items() for item in (literal_column(f"'{name}'"), column)]
+    if dialect_name == "postgresql":
+        element = func.json_build_object(*pairs)
+        aggregated = func.json_agg(aggregate_order_by(element, order_by) if order_by is not None else element)
+        # As text, so the driver hands it over undecoded
+        return cast(func.coalesce(aggregated, literal_column("'[]'::json")), Text)
+    return func.json_group_array(func.json_object(*pairs))
+
+@cache
+def json_rows(schema: type[BaseModel]) -> TypeAdapter[list[dict[str, Any]]]:
+    """
+    Validator turning a `json_array_agg` array into dicts typed like `schema`.
+
+    Values get the schema's field types (UUIDs, datetimes, ...) without
+    instantiating the schema, so they serialize exactly like ORM-loaded rows.
+    """
+    fields = {name: field.annotation for name, field in schema.model_fields.items()}
+    row_type = TypedDict(f"{schema.__name__}Row", fields)  # type: ignore[misc]
+    return TypeAdapter(list[row_type])  # type: ignore[valid-type]
 
 class QueryBuilder(Generic[T]):
     """
@@ -40,7 +134,31 @@ class QueryBuilder(Generic[T]):
                 builder.filter(Item.category == category)
 
             # Execute and return
-            return builder.execute()  # Returns {"data": [...], "count": N}
+            return builder.execute()  # Returns {"data": [...], "count": N, "has_more": ..., "next_cursor": ...}
+
+    Pagination is offset based (`skip`) unless the request carries a `cursor`,
+    in which case the page is fetched with a keyset seek on (sort column, id).
+    A `next_cursor` is returned whenever more rows follow, so clients can switch
+    to cursor paging from any page.
+
+    On PostgreSQL, `search` matches with ILIKE (served by pg_trgm GIN indexes)
+    and ranks matches by trigram similarity, best match first, ahead of the
+    requested sort. Ranked pages are offset paginated and carry no cursor. Other
+    databases keep plain ILIKE matching in the requested order.
+
+    The total count follows `pagination.count_mode`: `exact` adds a
+    `count(*) OVER ()` column to the data query so the page and the total come
+    back in one round trip, `estimated` reads `pg_class.reltuples` for
+    unfiltered PostgreSQL lists (falling back to `exact` otherwise) and `none`
+    skips counting. `has_more` is always reported.
+
+    `project` swaps the model for a list of columns: rows come back as plain
+    dicts, with no ORM instances or identity map involved, ready for
+    `QueryResultResponse`. Related rows can be folded into a column with a
+    correlated `json_array_agg` subquery so the page is one statement.
+
+    For exports, `stream` walks the whole sorted result through a server-side
+    cursor instead of paging it.
     """
 
     def __init__(
@@ -67,8 +185,12 @@ class QueryBuilder(Generic[T]):
         self.sorting: SortParams | None = sorting
         self.sort_columns: dict[str, Any] = {}
         self.default_sort_column: Any = None
+        self.collation: str | None = None
         self._query: Any = select(model)
         self._filters: list[Any] = []
+        self._filtered: bool = False
+        self._rank: Any = None
+        self._projection: dict[str, type[BaseModel]] | None = None
 
     def paginate(self, pagination: PaginationParams) -> Self:
         """Set pagination parameters."""
@@ -80,6 +202,7 @@ class QueryBuilder(Generic[T]):
         sorting: SortParams,
         sort_columns: dict[str, Any] | list[Any] | None = None,
         default_sort_column: Any = None,
+        collation: str | None = None,
     ) -> Self:
         """
         Set sorting parameters.
@@ -88,9 +211,12 @@ class QueryBuilder(Generic[T]):
             sorting: SortParams instance
             sort_columns: Dict mapping name to column OR list of sortable column names
             default_sort_column: Column to use if sort field not found
+            collation: Collation string sort columns are ordered and seeked with
+                (default: the column's own)
         """
         self.sorting = sorting
         self.default_sort_column = default_sort_column
+        self.collation = collation
 
         if isinstance(sort_columns, dict):
             self.sort_columns = sort_columns
@@ -113,11 +239,14 @@ class QueryBuilder(Generic[T]):
         """Add filter conditions to the query."""
         for condition in conditions:
             self._query = self._query.where(condition)
+            self._filtered = True
         return self
 
     def join(self, target: Any, onclause: Any = None, isouter: bool = False, full: bool = False) -> Self:
         """Add a join to the query."""
         self._query = self._query.join(target, onclause=onclause, isouter=isouter, full=full)
+        if not (isouter or full):
+            self._filtered = True
         return self
     
     def options(self, *args: Any) -> Self:
@@ -125,59 +254,270 @@ class QueryBuilder(Generic[T]):
         self._query = self._query.options(*args)
         return self
 
-    def search(self, search: SearchParams | None, columns: list[Any]) -> Self:
-        """Add search across multiple columns using ILIKE."""
+    def project(self, *columns: Any, nested: dict[str, type[BaseModel]] | None = None) -> Self:
+        """
+        Select only `columns` and return rows as dicts keyed by column label.
+
+        Columns named in `nested` hold a `json_array_agg` array and are decoded
+        into lists of dicts typed like the given schema.
+        """
+        self._query = self._query.with_only_columns(*columns, maintain_column_froms=True)
+        self._projection = nested or {}
+        return self
+
+    def _projected_row(self, row: Any) -> dict[str, Any]:
+        assert self._projection is not None
+        values = row._asdict()
+        values.pop("total_count", None)
+        for name, schema in self._projection.items():
+            values[name] = json_rows(schema).validate_json(values[name])
+        return values
+
+    @property
+    def dialect_name(self) -> str:
+        return self.session.get_bind().dialect.name
+
+    def search(
+        self, search: SearchParams | None, columns: list[Any], rank: bool = True, literal: bool = False
+    ) -> Self:
+        """
+        Add search across multiple columns using ILIKE.
+
+        `%` and `_` in the term act as wildcards unless `literal` is True. On
+        PostgreSQL results are also ranked by trigram similarity unless `rank`
+        is False.
+        """
 
         if search and search.search:
-            search_term = f"%{search.search}%"
-            conditions = [col(column).ilike(search_term) for column in columns]
+            if literal:
+                search_term = f"%{escape_like(search.search)}%"
+                conditions = [col(column).ilike(search_term, escape="\\") for column in columns]
+            else:
+                search_term = f"%{search.search}%"
+                conditions = [col(column).ilike(search_term) for column in columns]
             self._query = self._query.where(or_(*conditions))
+            self._filtered = True
+
+            if rank and self.dialect_name == "postgresql":
+                self._rank = func.greatest(
+                    *[func.similarity(col(column), search.search) for column in columns]
+                )
         return self
 
+    def _resolve_sort_column(self) -> Any:
+        """Resolve the column to sort by from the sort params and configured mapping."""
+        if not self.sorting:
+            return None
+
+        sort_column = self.sort_columns.get(
+            self.sorting.field,
+            self.default_sort_column
+        )
+
+        # Fallback: if no specific map, try to find field on model
+        if sort_column is None and not self.sort_columns and hasattr(self.model, self.sorting.field):
+             sort_column = getattr(self.model, self.sorting.field)
+
+        # Final fallback to created_at if exists
+        if sort_column is None:
+             sort_column = getattr(self.model, "created_at", None)
+
+        return sort_column
+
+    def _collated(self, sort_column: Any) -> Any:
+        if self.collation is None:
+            return sort_column
+        column_type = getattr(sort_column, "type", None)
+        # SQLModel's AutoString decorates String
+        if not isinstance(getattr(column_type, "impl", column_type), String):
+            return sort_column
+        return sort_column.collate(self.collation)
+
+    def _seek(self, sort_column: Any, id_column: Any) -> Any:
+        """Build the keyset condition for the current cursor."""
+        assert self.pagination is not None and self.pagination.cursor is not None
+
+        payload = decode_cursor(self.pagination.cursor)
+        if (
+            self.sorting is None
+            or sort_column is None
+            or id_column is None
+            or payload["f"] != self.sorting.field
+            or payload["d"] != self.sorting.direction.value
+        ):
+            raise InvalidCursorException("Cursor does not match the requested sort order")
+
+        try:
+            value = _decode_cursor_value(payload["v"], sort_column)
+            row_id = _decode_cursor_value(payload["id"], id_column)
+        except (TypeError, ValueError):
+            raise InvalidCursorException()
+
+        if value is None:
+            raise InvalidCursorException()
+
+        key = tuple_(self._collated(sort_column), id_column)
+        if self.sorting.direction == SortDirection.DESC:
+            return key < tuple_(value, row_id)
+        return key > tuple_(value, row_id)
+
+    def _next_cursor(self, data: list[Any], sort_column: Any, has_more: bool) -> str | None:
+        """Build the cursor pointing after the last row of the page."""
+        if not data or not has_more or self.sorting is None:
+            return None
+        key = getattr(sort_column, "key", None)
+        if key is None:
+            return None
+
+        last = data[-1]
+        if isinstance(last, dict):
+            value, row_id = last.get(key), last.get("id")
+        else:
+            value, row_id = getattr(last, key, None), getattr(last, "id", None)
+        if value is None or row_id is None:
+            # NULL sort keys cannot be compared by a row-value seek
+            return None
+        return encode_cursor(self.sorting, value, row_id)
+
+    async def _exact_count(self, query: Any) -> int:
+        """Count matching records with a separate `count(*)` round trip."""
+        count_query = select(func.count()).select_from(query.subquery())
+        count_result = await self.session.exec(count_query)
+        return count_result.one()
+
+    async def _estimated_count(self) -> int | None:
+        """
+        Read the planner's row estimate for an unfiltered list.
+
+        Returns None when no estimate is available (filtered query, non-PostgreSQL
+        database or a table that has never been analyzed).
+        """
+        dialect = self.session.get_bind().dialect
+        table = getattr(self.model, "__table__", None)
+        if self._filtered or dialect.name != "postgresql" or table is None:
+            return None
+
+        result = await self.session.exec(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"),  # type: ignore[call-overload]
+            params={"table": dialect.identifier_preparer.format_table(table)},
+        )
+        estimate = result.scalar_one_or_none()
+        if estimate is None or estimate < 0:
+            return None
+        return int(estimate)
+
+    def _ordered(self, query: Any, ranked: bool) -> Any:
+        """Apply the sort, with the primary key as a tie-breaker so pages are stable."""
+        if ranked:
+            query = query.order_by(desc(self._rank))
+
+        sort_column = self._resolve_sort_column()
+        id_column = getattr(self.model, "id", None)
+        if sort_column is not None:
+            order = desc if self.sorting and self.sorting.direction == SortDirection.DESC else asc
+            query = query.order_by(order(self._collated(sort_column)))
+            if id_column is not None and id_column is not sort_column:
+                query = query.order_by(order(id_column))
+        return query
+
+    async def stream(self, batch_size: int = 1000) -> AsyncIterator[list[Any]]:
+        """
+        Yield every matching row in the requested order, `batch_size` rows at a time.
+
+        Rows are read through a server-side cursor, so memory stays flat
+        whatever the result size. Pagination and counting do not apply. The
+        cursor is closed when the iteration ends or is abandoned, e.g. when a
+        streaming response is cancelled on client disconnect.
+        """
+        query = self._ordered(self._query, self._rank is not None)
+        query = query.execution_options(yield_per=batch_size)
+
+        if self._projection is not None:
+            result = await self.session.stream(query)
+        else:
+            result = await self.session.stream_scalars(query)
+        try:
+            async for partition in result.partitions():
+                if self._projection is not None:
+                    yield [self._projected_row(row) for row in partition]
+                else:
+                    yield list(partition)
+        finally:
+            await result.close()
+
     async def execute(self) -> QueryResult[T]:
         """
         Execute the query with pagination and sorting.
 
         Returns:
-            Dict with 'data' (list of results) and 'count' (total matching records)
+            Dict with 'data' (list of results), 'count' (total matching records,
+            None when counting is disabled), 'has_more' and 'next_cursor'
+            (cursor for the following page, if any)
         """
 
         if not self.pagination:
             raise ValueError("Pagination parameters must be set before execution")
 
-        # Count total matching records (before pagination)
-        count_query = select(func.count()).select_from(self._query.subquery())
-        count_result = await self.session.exec(count_query)
-        count = count_result.one()
-
-        # Apply sorting
-        if self.sorting:
-            sort_column = self.sort_columns.get(
-                self.sorting.field,
-                self.default_sort_column
-            )
-
-            # Fallback: if no specific map, try to find field on model
-            if sort_column is None and not self.sort_columns and hasattr(self.model, self.sorting.field):
-                 sort_column = getattr(self.model, self.sorting.field)
-
-            # Final fallback to created_at if exists
-            if sort_column is None:
-                 sort_column = getattr(self.model, "created_at", None)
-
-            if sort_column is not None:
-                if self.sorting.direction == SortDirection.DESC:
-                    self._query = self._query.order_by(desc(sort_column))
-                else:
-                    self._query = self._query.order_by(asc(sort_column))
+        base_query = self._query
+        count: int | None = None
 
-        # Apply pagination
-        self._query = self._query.offset(self.pagination.skip).limit(
-            self.pagination.limit
+        if self.pagination.count_mode == CountMode.ESTIMATED:
+            count = await self._estimated_count()
+        # A window count is only the total when it runs over the unseeked query
+        windowed = (
+            self.pagination.count_mode != CountMode.NONE
+            and count is None
+            and not self.pagination.cursor
         )
+        if self.pagination.count_mode != CountMode.NONE and count is None and not windowed:
+            count = await self._exact_count(base_query)
 
-        # Execute
-        data_result = await self.session.exec(self._query)
-        data = list(data_result.unique().all())
+        # Rank search matches first; a cursor was issued for the plain sort order
+        ranked = self._rank is not None and not self.pagination.cursor
+        sort_column = self._resolve_sort_column()
+        id_column = getattr(self.model, "id", None)
+        self._query = self._ordered(self._query, ranked)
+
+        # Apply pagination, fetching one extra row to detect further pages
+        if self.pagination.cursor:
+            self._query = self._query.where(self._seek(sort_column, id_column))
+        else:
+            self._query = self._query.offset(self.pagination.skip)
+        self._query = self._query.limit(self.pagination.limit + 1)
+
+        if windowed:
+            self._query = self._query.add_columns(func.count().over().label("total_count"))
 
-        return QueryResult[T](data=data, count=count)
+        # Execute
+        if self._projection is not None:
+            # exec() would collapse the rows to their first column
+            result = await self.session.execute(self._query)  # type: ignore[deprecated]
+            rows = list(result.all())
+            data = [self._projected_row(row) for row in rows]
+        elif windowed:
+            # exec() would collapse the rows to scalars and drop the count column
+            window_result = await self.session.execute(self._query)  # type: ignore[deprecated]
+            rows = list(window_result.unique().all())
+            data = [row[0] for row in rows]
+        else:
+            data_result = await self.session.exec(self._query)
+            data = list(data_result.unique().all())
+
+        if windowed:
+            if rows:
+                count = rows[0][-1]
+            elif self.pagination.skip == 0:
+                count = 0
+            else:
+                # Past the last page: the window had no rows to report on
+                count = await self._exact_count(base_query)
+
+        has_more = len(data) > self.pagination.limit
+        data = data[:self.pagination.limit]
+
+        return QueryResult[T](
+            data=data,
+            count=count,
+            has_more=has_more,
+            next_cursor=None if ranked else self._next_cursor(data, sort_column, has_more),
+        )
@@ -1,9 +1,45 @@
-import redis
+from typing import Any
+
+import redis.asyncio as aioredis
 from app.core.config import settings
+from app.core.metrics import record_redis_round_trip
+
+
+class _CountRoundTrips:
+    # Commands and whole pipelines are sent in one call, so this counts round trips
+    async def send_packed_command(self, command: Any, check_health: bool = True) -> None:
+        record_redis_round_trip()
+        await super().send_packed_command(command, check_health)  # type: ignore[misc]
+
+
+class InstrumentedConnection(_CountRoundTrips, aioredis.Connection):
+    pass
+
 
-# Initialize Redis client
-redis_client = redis.from_url(
+class InstrumentedSSLConnection(_CountRoundTrips, aioredis.SSLConnection):
+    pass
+
+
+# Shared asyncio client. Connections are opened lazily on the running loop and
+# closed by the app lifespan. Commands fail with a RedisError (TimeoutError)
+# instead of stalling the worker when Redis is slow: socket timeouts bound
+# each call and the blocking pool bounds the wait for a free connection.
+redis_pool = aioredis.BlockingConnectionPool.from_url(
     str(settings.REDIS_DSN),
     encoding="utf-8",
-    decode_responses=True
-)
\ No newline at end of file
+    decode_responses=True,
+    max_connections=settings.REDIS_MAX_CONNECTIONS,
+    timeout=settings.REDIS_POOL_TIMEOUT,
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+    health_check_interval=30,
+)
+# Set after from_url, where the URL scheme picks the connection class
+redis_pool.connection_class = InstrumentedSSLConnection if settings.REDIS_USE_SSL else InstrumentedConnection
+
+redis_client = aioredis.Redis(connection_pool=redis_pool)
+
+
+async def close_redis() -> None:
+    await redis_client.aclose()
+    await redis_pool.disconnect()
@@ -0,0 +1,110 @@
+import types
+from collections.abc import Callable
+from functools import cache
+from typing import Any, Union, get_args, get_origin
+
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from pydantic_core import to_json
+from starlette.types import Receive, Scope, Send
+
+from app.core.query_builder import QueryResult
+
+Extractor = Callable[[Any], dict[str, Any]]
+
+
+def _nested_model(annotation: Any) -> tuple[type[BaseModel], bool] | None:
+    """The schema nested in a field annotation, and whether it is a list of them."""
+    origin = get_origin(annotation)
+    if origin in (Union, types.UnionType):
+        for arg in get_args(annotation):
+            if arg is not type(None):
+                return _nested_model(arg)
+        return None
+    if origin is list:
+        (item,) = get_args(annotation) or (Any,)
+        nested = _nested_model(item)
+        return (nested[0], True) if nested and not nested[1] else None
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, False
+    return None
+
+
+@cache
+def _extractor(model: type[BaseModel]) -> Extractor:
+    plain: list[str] = []
+    nested: list[tuple[str, type[BaseModel], bool]] = []
+    for name, field in model.model_fields.items():
+        schema = _nested_model(field.annotation)
+        if schema is None:
+            plain.append(name)
+        else:
+            nested.append((name, *schema))
+
+    def extract(obj: Any) -> dict[str, Any]:
+        # Loaded ORM columns and pydantic fields live in the instance dict;
+        # reading it directly skips SQLAlchemy's attribute instrumentation.
+        # Projected rows are dicts already.
+        state = obj if isinstance(obj, dict) else obj.__dict__
+        row = {name: state[name] if name in state else getattr(obj, name) for name in plain}
+        for name, schema, many in nested:
+            value = state[name] if name in state else getattr(obj, name)
+            if value is not None:
+                extract_nested = _extractor(schema)
+                value = [extract_nested(item) for item in value] if many else extract_nested(value)
+            row[name] = value
+        return row
+
+    return extract
+
+
+class QueryResultResponse(Response):
+    """
+    JSON response for a `QueryResult` page.
+
+    FastAPI's default path validates the page against `response_model` from
+    attributes (instantiating every row and nested schema), dumps it back to
+    Python objects and encodes those with the stdlib json module. Rows here
+    come from the database or from already-built schemas, so the fields of
+    `model` are read straight off each row into plain dicts and encoded once
+    by pydantic-core's native JSON encoder, with the same output.
+
+    Only for plain field schemas: fields are copied as is, so schemas with
+    aliases, validators or custom serializers need the default path. Keep
+    `response_model` on the route for the OpenAPI schema; returning a
+    Response skips FastAPI's own serialization.
+
+        return QueryResultResponse(await service.get_items(...), ItemRead)
+    """
+
+    media_type = "application/json"
+
+    def __init__(self, result: QueryResult[Any], model: type[BaseModel], **kwargs: Any) -> None:
+        extract = _extractor(model)
+        page = {
+            "data": [extract(row) for row in result.data],
+            "count": result.count,
+            "has_more": result.has_more,
+            "next_cursor": result.next_cursor,
+        }
+        super().__init__(content=to_json(page), **kwargs)
+
+
+class ClosingStreamingResponse(StreamingResponse):
+    """
+    `StreamingResponse` that closes its body iterator however the stream ends.
+
+    When the client disconnects mid-stream, Starlette abandons the body
+    generator and leaves it to the garbage collector. Closing it right away
+    runs its cleanup (e.g. closing a server-side database cursor) before the
+    request's dependencies, such as the session, are torn down.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            close = getattr(self.body_iterator, "aclose", None)
+            if close is not None:
+                await close()
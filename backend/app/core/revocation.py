@@ -0,0 +1,136 @@
+import hashlib
+import logging
+import math
+import time
+from typing import Iterable
+
+from app.core.config import settings
+from app.core.pubsub import pubsub
+from app.core.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+BLACKLIST_PREFIX = "blacklist:"
+REVOCATION_CHANNEL = "auth:revocation"
+SCAN_COUNT = 1000
+
+
+class BloomFilter:
+    """Fixed-size bloom filter using double hashing over one blake2b digest."""
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        capacity = max(capacity, 1)
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationMirror:
+    """
+    Per-worker copy of the token blacklist.
+
+    Revocations are rare and checks happen on every request, so each worker
+    keeps a bloom filter plus an exact map of revoked ids to their expiry.
+    `check` answers "not revoked" from the bloom filter alone, "revoked"
+    from the exact map, and defers to Redis only when unsure (a bloom false
+    positive or an expired entry). The mirror is fed by pub/sub messages
+    from `revoke`, resynchronised from Redis with SCAN on every
+    (re)connect, and not trusted while pub/sub is disconnected.
+    """
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.ready = False
+        self._entries: dict[str, float] = {}
+        self._bloom = BloomFilter(capacity, error_rate)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, token_id: str, expires_at: float) -> None:
+        self._entries[token_id] = expires_at
+        self._bloom.add(token_id)
+        if len(self._entries) > self.capacity:
+            self._rebuild()
+
+    def _rebuild(self) -> None:
+        # Bloom filters cannot delete: drop expired ids and start a fresh filter
+        now = time.time()
+        self._entries = {token_id: exp for token_id, exp in self._entries.items() if exp > now}
+        self.capacity = max(self.capacity, 2 * len(self._entries))
+        self._bloom = BloomFilter(self.capacity, self.error_rate)
+        for token_id in self._entries:
+            self._bloom.add(token_id)
+
+    def check(self, token_id: str) -> bool | None:
+        """True if revoked, False if not, None when Redis has to decide."""
+        if not self.ready:
+            return None
+        if token_id not in self._bloom:
+            return False
+        expires_at = self._entries.get(token_id)
+        if expires_at is not None and expires_at > time.time():
+            return True
+        return None
+
+    async def revoke(self, token_id: str, expires_at: float) -> None:
+        """Record a revocation locally and announce it to the other workers."""
+        self.add(token_id, expires_at)
+        await pubsub.publish(REVOCATION_CHANNEL, f"{token_id} {expires_at}")
+
+    async def resync(self) -> None:
+        """Merge every live blacklist key from Redis into the mirror."""
+        now = time.time()
+        keys: list[str] = []
+        async for key in redis_client.scan_iter(match=f"{BLACKLIST_PREFIX}*", count=SCAN_COUNT):
+            keys.append(key)
+            if len(keys) >= SCAN_COUNT:
+                await self._add_keys(keys, now)
+                keys = []
+        if keys:
+            await self._add_keys(keys, now)
+        # Revocations are permanent until expiry, so merging never loses one
+        self._rebuild()
+        self.ready = True
+        logger.info("Revocation mirror synchronised (%d revoked tokens)", len(self._entries))
+
+    async def _add_keys(self, keys: list[str], now: float) -> None:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.ttl(key)
+            ttls = await pipe.execute()
+        for key, ttl in zip(keys, ttls):
+            if ttl is not None and ttl > 0:
+                self.add(key.removeprefix(BLACKLIST_PREFIX), now + ttl)
+
+    def _on_message(self, message: str) -> None:
+        token_id, _, expires_at = message.rpartition(" ")
+        self.add(token_id, float(expires_at))
+
+    def _on_disconnect(self) -> None:
+        self.ready = False
+
+    def start(self) -> None:
+        pubsub.subscribe(REVOCATION_CHANNEL, self._on_message)
+        pubsub.on_connect(self.resync)
+        pubsub.on_disconnect(self._on_disconnect)
+
+
+revocation_mirror = RevocationMirror(
+    capacity=settings.REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.REVOCATION_BLOOM_ERROR_RATE,
+)
@@ -1,4 +1,9 @@
-from fastapi import APIRouter, Request
+import hmac
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from app.core.config import settings
+from app.core.database import write_pool_metrics
+from app.core.metrics import PROMETHEUS_CONTENT_TYPE, PrometheusText, request_metrics
 from app.core.rate_limiter import limiter
 
 router = APIRouter(
@@ -15,3 +20,25 @@ async def root(request: Request):
 @limiter.limit("60/minute")
 async def health_check(request: Request):
     return {"status": "ok"}
+
+
+def verify_metrics_token(request: Request) -> None:
+    """Scrapers authenticate with the METRICS_TOKEN bearer token; the endpoint is hidden without one."""
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+@router.get("/metrics", include_in_schema=False, dependencies=[Depends(verify_metrics_token)])
+@limiter.limit("60/minute")
+async def metrics(request: Request):
+    """Request, database and Redis metrics of this worker in the Prometheus text format."""
+    text = PrometheusText()
+    request_metrics.write(text)
+    write_pool_metrics(text)
+    return Response(content=text.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,9 +1,15 @@
 from enum import Enum
+from typing import Annotated
 from fastapi import Query
 from sqlmodel import SQLModel
 
 
 # Pagination parameters
+class CountMode(str, Enum):
+    EXACT = "exact"
+    ESTIMATED = "estimated"
+    NONE = "none"
+
 class PaginationParams:
     """
     Pagination parameters for list endpoints.
@@ -11,6 +17,11 @@ class PaginationParams:
     Attributes:
         skip: Number of records to skip (offset)
         limit: Maximum number of records to return
+        cursor: Opaque keyset cursor from a previous page's `next_cursor`.
+            When set, it is used instead of `skip`.
+        count_mode: How the total `count` is computed: `exact` (window count in
+            the data query), `estimated` (planner statistics for unfiltered
+            lists) or `none` (only `has_more` is reported)
     """
 
     def __init__(
@@ -19,9 +30,19 @@ class PaginationParams:
         limit: int = Query(
             default=100, ge=0, le=1000, description="Maximum records to return"
         ),
+        cursor: Annotated[
+            str | None,
+            Query(description="Cursor from a previous page's next_cursor (alternative to skip)"),
+        ] = None,
+        count_mode: Annotated[
+            CountMode,
+            Query(description="How to compute the total count: exact, estimated or none"),
+        ] = CountMode.EXACT,
     ):
         self.skip = skip
         self.limit = limit
+        self.cursor = cursor
+        self.count_mode = count_mode
 
 
 # Sorting parameters
@@ -1,15 +1,32 @@
+import asyncio
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import Any, Callable, TypeVar
 
 import jwt
 from bcrypt import checkpw, gensalt, hashpw
 from jwt.exceptions import InvalidTokenError
 
 from app.core.config import settings
+from app.core.exceptions import PasswordHashingBusyException
+from app.core.metrics import Histogram
 from app.core.redis import redis_client
+from app.core.revocation import BLACKLIST_PREFIX, revocation_mirror
 
 ALGORITHM = "HS256"
 
+# bcrypt takes ~250 ms at cost 12; queueing pushes this towards seconds
+PASSWORD_HASH_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+T = TypeVar("T")
+
+# Access tokens used to be blacklisted under their raw value rather than a
+# hash. Tokens issued before this process started may have been revoked that
+# way; they all expire by this time, after which legacy keys are ignored.
+LEGACY_BLACKLIST_UNTIL = time.time() + settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
 def create_access_token(subject: str | Any, expires_delta: timedelta) -> str:
     expire = datetime.now(timezone.utc) + expires_delta
     to_encode = {"exp": expire, "sub": str(subject), "type": "access"}
@@ -29,7 +46,68 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 
 def get_password_hash(password: str) -> str:
-    return hashpw(password.encode("utf-8"), gensalt()).decode("utf-8")
+    return hashpw(password.encode("utf-8"), gensalt(settings.BCRYPT_ROUNDS)).decode("utf-8")
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Whether a bcrypt hash ($2b$<cost>$...) was made with a different cost than configured."""
+    try:
+        return int(hashed_password.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a small dedicated thread pool, off the event loop.
+
+    bcrypt releases the GIL, so hashing on worker threads leaves the loop free
+    to serve other requests. At most `max_pending` operations may be running
+    or queued; beyond that callers fail fast with a 503 rather than queueing
+    behind a login storm. Hash and verify latencies (including queueing) are
+    recorded in their own histograms.
+    """
+
+    def __init__(self, workers: int, max_pending: int) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self.hash_seconds = Histogram(PASSWORD_HASH_BUCKETS)
+        self.verify_seconds = Histogram(PASSWORD_HASH_BUCKETS)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hasher")
+
+    async def _run(self, histogram: Histogram, func: Callable[..., T], *args: Any) -> T:
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordHashingBusyException()
+
+        self.pending += 1
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+            histogram.observe(time.perf_counter() - start)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.hash_seconds, get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(self.verify_seconds, verify_password, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
+
+# Request state key for the (token, payload) pair verified by the rate limiter
+TOKEN_PAYLOAD_STATE = "token_payload"
 
 
 def get_token_payload(token: str) -> dict[str, Any]:
@@ -46,10 +124,14 @@ def get_jti(token: str) -> str | None:
     return payload.get("jti")
 
 
-def blacklist_token(token: str) -> None:
+def get_blacklist_id(token: str, payload: dict[str, Any]) -> str:
+    """JTI for refresh tokens; a SHA-256 of the token for access tokens (which have no JTI)."""
+    return payload.get("jti") or hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+async def blacklist_token(token: str) -> None:
     """Blacklist a token until it expires."""
     payload = get_token_payload(token)
-    jti = payload.get("jti")
     exp = payload.get("exp")
     
     if not exp:
@@ -60,16 +142,23 @@ def blacklist_token(token: str) -> None:
     ttl = int(exp - now)
     
     if ttl > 0:
-        # Use JTI if available (refresh tokens), otherwise use token itself (access tokens)
-        key = f"blacklist:{jti or token}"
-        redis_client.setex(key, ttl, "true")
-
-
-def is_token_blacklisted(token: str) -> bool:
-    """Check if a token or its JTI is blacklisted."""
-    payload = get_token_payload(token)
-    jti = payload.get("jti")
-    
-    key = f"blacklist:{jti or token}"
-    return redis_client.exists(key) > 0
-
+        token_id = get_blacklist_id(token, payload)
+        await redis_client.setex(f"{BLACKLIST_PREFIX}{token_id}", ttl, "true")
+        await revocation_mirror.revoke(token_id, exp)
+
+
+async def is_token_blacklisted(token: str, payload: dict[str, Any] | None = None) -> bool:
+    """Check if a token or its JTI is blacklisted. Pass `payload` if the token is already decoded."""
+    if payload is None:
+        payload = get_token_payload(token)
+    token_id = get_blacklist_id(token, payload)
+    keys = [f"{BLACKLIST_PREFIX}{token_id}"]
+    if "jti" not in payload and payload.get("exp", 0) <= LEGACY_BLACKLIST_UNTIL:
+        # The mirror never saw legacy keys, so only trust it for a revocation
+        keys.append(f"{BLACKLIST_PREFIX}{token}")
+
+    # Almost always answered locally; Redis only on a bloom filter hit
+    revoked = revocation_mirror.check(token_id)
+    if revoked or (revoked is False and len(keys) == 1):
+        return revoked
+    return await redis_client.exists(*keys) > 0
@@ -3,9 +3,8 @@ import logging
 
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlalchemy.orm import sessionmaker
 
-from app.core.database import engine
+from app.core.database import async_session_maker
 from app.core.security import get_password_hash
 from app.modules.user.models import User, Role
 from app.modules.user.service import create_user, get_user_by_email
@@ -51,10 +50,7 @@ async def create_initial_data(session: AsyncSession) -> None:
 
 async def main() -> None:
     logger.info("Creating initial data")
-    async_session = sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )  # type: ignore
-    await create_initial_data(async_session())
+    await create_initial_data(async_session_maker())
     logger.info("Initial data created")
 
 if __name__ == "__main__":
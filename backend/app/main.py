@@ -1,13 +1,21 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from redis.exceptions import RedisError
 from fastapi.routing import APIRoute
-from slowapi import _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
-from slowapi.middleware import SlowAPIMiddleware
 
-from app.core.config import settings, AppEnv
-from app.core.rate_limiter import limiter
+from app.core.config import settings
+from app.core.rate_limiter import limiter, RateLimitMiddleware
+from app.core.metrics import MetricsMiddleware, request_metrics
+from app.core.database import query_stats
+from app.core.pubsub import pubsub, pubsub_client
+from app.core.redis import close_redis
+from app.core.security import password_hasher
+from app.core.revocation import revocation_mirror
+from app.modules.diagnoses.catalog import diagnosis_catalog
+from app.modules.user.cache import principal_cache
 
 # routers
 from app.core.router import router as root_router
@@ -15,28 +23,42 @@ from app.modules.user.router import router as user_router
 from app.modules.auth.router import router as auth_router
 from app.modules.diagnoses.router import router as diagnoses_router
 from app.modules.consultation.router import router as consultation_router
+from app.modules.admin.router import router as admin_router
+from app.modules.analytics.router import router as analytics_router
 
 def custom_generate_unique_id(route: APIRoute) -> str:
     return f"{route.tags[0]}-{route.name}"
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await diagnosis_catalog.start()
+    principal_cache.start()
+    revocation_mirror.start()
+    pubsub.start()
+    yield
+    await pubsub.stop()
+    await diagnosis_catalog.stop()
+    await pubsub_client.aclose()
+    await close_redis()
+    await query_stats.close()
+    password_hasher.shutdown()
+
 app = FastAPI(
     title="ClinicCare Mini EMR", 
-    generate_unique_id_function=custom_generate_unique_id
+    generate_unique_id_function=custom_generate_unique_id,
+    lifespan=lifespan,
 )
-app.state.limiter = limiter
-
-# Add rate limiter middleware except in tests due to RuntimeError in BaseHTTPMiddleware
-if settings.APP_ENV != AppEnv.TEST:
-    app.add_middleware(SlowAPIMiddleware) # type: ignore
 
-@app.exception_handler(RateLimitExceeded)
-async def custom_rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
+@app.exception_handler(RedisError)
+async def redis_unavailable_handler(request: Request, exc: RedisError):
+    # Raised once the per-command timeouts expire, rather than hanging the worker
     return JSONResponse(
-        status_code=429,
-        content={"detail": "Too many requests. Please try again later."},
+        status_code=503,
+        content={"detail": "Service temporarily unavailable. Please try again later."},
     )
 
-# middleware
+# middleware (the last added runs first: CORS headers also go on 429 responses)
+app.add_middleware(RateLimitMiddleware, limiter=limiter)  # type: ignore
 app.add_middleware(
     CORSMiddleware,  # type: ignore
     allow_origins=settings.CORS_ORIGINS_LIST,
@@ -44,6 +66,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost, so rejected and CORS preflight requests are measured too
+app.add_middleware(MetricsMiddleware, metrics=request_metrics)  # type: ignore
 
 # include routers
 app.include_router(root_router)
@@ -51,3 +75,5 @@ app.include_router(auth_router, prefix="/api/v1")
 app.include_router(user_router, prefix="/api/v1")
 app.include_router(diagnoses_router, prefix="/api/v1")
 app.include_router(consultation_router, prefix="/api/v1")
+app.include_router(admin_router, prefix="/api/v1")
+app.include_router(analytics_router, prefix="/api/v1")
@@ -0,0 +1,58 @@
+from typing import List
+from fastapi import APIRouter, Depends, Query, Request
+from app.core.database import get_all_pool_stats, query_stats
+from app.core.rate_limiter import limiter
+from app.core.security import password_hasher
+from app.modules.admin.schemas import PoolStatsRead, PasswordHashingStatsRead, QueryStatsRead
+from app.modules.user.dependencies import get_current_admin_user
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(get_current_admin_user)],
+)
+
+@router.get("/db/pool", response_model=List[PoolStatsRead])
+@limiter.limit("60/minute")
+async def read_pool_stats(request: Request):
+    """
+    Connection pool statistics: checked out connections, overflow and checkout wait times.
+
+    Requires: admin role
+    """
+    return get_all_pool_stats()
+
+
+@router.get("/db/queries", response_model=QueryStatsRead)
+@limiter.limit("60/minute")
+async def read_query_stats(request: Request, limit: int = Query(default=20, ge=1, le=100, description="Fingerprints to return")):
+    """
+    The statement fingerprints with the most total time since this worker started,
+    with their execution count, latencies and the routes running them.
+
+    Requires: admin role
+    """
+    return QueryStatsRead(
+        since=query_stats.since,
+        fingerprints=len(query_stats.statements),
+        dropped=query_stats.dropped,
+        statements=query_stats.top(limit),
+    )
+
+
+@router.get("/security/password-hashing", response_model=PasswordHashingStatsRead)
+@limiter.limit("60/minute")
+async def read_password_hashing_stats(request: Request):
+    """
+    Password hashing pool statistics: queue depth, rejections and bcrypt latencies.
+
+    Requires: admin role
+    """
+    return PasswordHashingStatsRead(
+        workers=password_hasher.workers,
+        max_pending=password_hasher.max_pending,
+        pending=password_hasher.pending,
+        rejected=password_hasher.rejected,
+        hash_seconds=password_hasher.hash_seconds.snapshot(),
+        verify_seconds=password_hasher.verify_seconds.snapshot(),
+    )
@@ -0,0 +1,49 @@
+from datetime import datetime
+from typing import Optional, List
+from pydantic import BaseModel
+
+class HistogramBucket(BaseModel):
+    le: str
+    count: int
+
+class HistogramRead(BaseModel):
+    buckets: List[HistogramBucket]
+    count: int
+    sum: float
+
+class PoolStatsRead(BaseModel):
+    name: str
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    timeouts: int
+    healthy: bool = True
+    wait_seconds: Optional[HistogramRead] = None
+
+class PasswordHashingStatsRead(BaseModel):
+    workers: int
+    max_pending: int
+    pending: int
+    rejected: int
+    hash_seconds: HistogramRead
+    verify_seconds: HistogramRead
+
+class RouteCountRead(BaseModel):
+    route: str
+    count: int
+
+class StatementStatsRead(BaseModel):
+    fingerprint: str
+    count: int
+    total_seconds: float
+    mean_seconds: float
+    p99_seconds: float
+    max_seconds: float
+    routes: List[RouteCountRead]
+
+class QueryStatsRead(BaseModel):
+    since: datetime
+    fingerprints: int
+    dropped: int
+    statements: List[StatementStatsRead]
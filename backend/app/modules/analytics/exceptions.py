@@ -0,0 +1,7 @@
+from fastapi import status
+from fastapi.exceptions import HTTPException
+
+class InvalidDateRangeException(HTTPException):
+    def __init__(self, message="Invalid date range"):
+        self.message = message
+        super().__init__(status_code=status.HTTP_400_BAD_REQUEST, detail=self.message)
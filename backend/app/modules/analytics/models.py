@@ -0,0 +1,30 @@
+import uuid
+from datetime import date
+from sqlalchemy import Index
+from sqlmodel import Field, SQLModel
+
+# Rollups of the consultation table, maintained in the transactions writing
+# consultations and rebuilt by scripts/backfill_analytics.py
+
+class ConsultationDailyCount(SQLModel, table=True):
+    __tablename__ = "consultation_daily_counts"
+    __table_args__ = (
+        # Doctor-scoped dashboards; clinic-wide ones range over the primary key
+        Index("ix_consultation_daily_counts_doctor_id_day", "doctor_id", "day"),
+    )
+
+    day: date = Field(primary_key=True)
+    doctor_id: uuid.UUID = Field(foreign_key="user.id", primary_key=True)
+    consultations: int = 0
+
+class DiagnosisDailyCount(SQLModel, table=True):
+    __tablename__ = "diagnosis_daily_counts"
+    __table_args__ = (
+        Index("ix_diagnosis_daily_counts_doctor_id_day", "doctor_id", "day"),
+    )
+
+    day: date = Field(primary_key=True)
+    doctor_id: uuid.UUID = Field(foreign_key="user.id", primary_key=True)
+    diagnosis_id: uuid.UUID = Field(foreign_key="diagnosis.id", primary_key=True)
+    # Consultations of that day and doctor with this diagnosis
+    consultations: int = 0
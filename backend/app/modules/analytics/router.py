@@ -0,0 +1,60 @@
+import uuid
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query, Request
+from app.core.database import ReadOnlySessionDep
+from app.core.rate_limiter import limiter
+from app.modules.analytics import service
+from app.modules.analytics.schemas import DailyConsultationCount, DateRangeParams, TopDiagnosis
+from app.modules.user.models import Role
+from app.modules.user.schemas import UserRead
+from app.modules.user.dependencies import get_current_active_user
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+def _scoped_doctor_id(current_user: UserRead, doctor_id: Optional[uuid.UUID]) -> Optional[uuid.UUID]:
+    # Doctors only see their own figures, Admins any doctor's or the whole clinic's
+    return current_user.id if current_user.role == Role.DOCTOR else doctor_id
+
+@router.get("/consultations/daily", response_model=List[DailyConsultationCount])
+@limiter.limit("60/minute")
+async def read_daily_consultation_counts(
+    request: Request,
+    session: ReadOnlySessionDep,
+    current_user: UserRead = Depends(get_current_active_user),
+    date_range: DateRangeParams = Depends(),
+    doctor_id: Optional[uuid.UUID] = Query(default=None, description="Only this doctor's consultations (admins)"),
+):
+    """
+    Consultations per day, every day of the range included.
+
+    Doctors only see their own counts, Admins see the clinic's or one doctor's.
+    """
+    return await service.get_daily_consultation_counts(
+        session=session,
+        date_from=date_range.date_from,
+        date_to=date_range.date_to,
+        doctor_id=_scoped_doctor_id(current_user, doctor_id),
+    )
+
+@router.get("/diagnoses/top", response_model=List[TopDiagnosis])
+@limiter.limit("60/minute")
+async def read_top_diagnoses(
+    request: Request,
+    session: ReadOnlySessionDep,
+    current_user: UserRead = Depends(get_current_active_user),
+    date_range: DateRangeParams = Depends(),
+    doctor_id: Optional[uuid.UUID] = Query(default=None, description="Only this doctor (admins)"),
+    limit: int = Query(default=10, ge=1, le=100, description="Diagnoses per doctor and month"),
+):
+    """
+    Each doctor's most frequent diagnoses per month, ranked by consultations.
+
+    Doctors only see their own, Admins see every doctor's or one doctor's.
+    """
+    return await service.get_top_diagnoses(
+        session=session,
+        date_from=date_range.date_from,
+        date_to=date_range.date_to,
+        limit=limit,
+        doctor_id=_scoped_doctor_id(current_user, doctor_id),
+    )
@@ -0,0 +1,49 @@
+import uuid
+from datetime import date
+from fastapi import Query
+from pydantic import BaseModel
+from app.modules.analytics.exceptions import InvalidDateRangeException
+
+# Longest range a dashboard query may cover, in days
+MAX_RANGE_DAYS = 5 * 366
+
+class DateRangeParams:
+    """
+    Inclusive range of consultation days for analytics endpoints.
+
+    Attributes:
+        date_from: First day
+        date_to: Last day, at most MAX_RANGE_DAYS after `date_from`
+    """
+
+    def __init__(
+        self,
+        date_from: date = Query(description="First consultation day (inclusive)"),
+        date_to: date = Query(description="Last consultation day (inclusive)"),
+    ):
+        if date_to < date_from:
+            raise InvalidDateRangeException("date_to is before date_from")
+        if (date_to - date_from).days >= MAX_RANGE_DAYS:
+            raise InvalidDateRangeException(f"The range cannot exceed {MAX_RANGE_DAYS} days")
+        self.date_from = date_from
+        self.date_to = date_to
+
+class DailyConsultationCount(BaseModel):
+    day: date
+    consultations: int
+
+class TopDiagnosis(BaseModel):
+    # First day of the month
+    month: date
+    doctor_id: uuid.UUID
+    doctor_name: str
+    # 1 for the doctor's most frequent diagnosis of the month
+    rank: int
+    diagnosis_id: uuid.UUID
+    code: str
+    description: str
+    consultations: int
+
+class RollupRebuildResult(BaseModel):
+    consultation_days: int
+    diagnosis_days: int
@@ -0,0 +1,227 @@
+import uuid
+from collections import Counter
+from collections.abc import Iterable, Sequence
+from datetime import date, datetime, time, timedelta
+from typing import Any, Optional
+from sqlalchemy import Date, cast, delete, extract, func, insert, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel import col, select
+from app.modules.analytics.models import ConsultationDailyCount, DiagnosisDailyCount
+from app.modules.analytics.schemas import DailyConsultationCount, RollupRebuildResult, TopDiagnosis
+from app.modules.consultation.models import Consultation, ConsultationDiagnosis
+from app.modules.diagnoses.models import Diagnosis
+from app.modules.user.models import User
+
+# Same fallbacks as the Consultation.doctor_name property
+doctor_name = func.coalesce(func.nullif(User.full_name, ""), User.email, "Unknown").label("doctor_name")
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE
+UPSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+# Days recomputed per transaction by rebuild_rollups: consultation writes
+# wait for at most one batch
+REBUILD_BATCH_DAYS = 7
+
+# (consultation_date, doctor_id, diagnosis_ids) of new consultations
+NewConsultation = tuple[datetime, uuid.UUID, Sequence[uuid.UUID]]
+
+
+async def add_to_rollups(*, session: AsyncSession, consultations: Iterable[NewConsultation]) -> None:
+    """
+    Count new consultations in the rollups, in the transaction inserting them.
+
+    One upsert per table whatever the number of consultations. Rows are
+    written in key order so concurrent writers lock them in the same order.
+    """
+    days: Counter[tuple[date, uuid.UUID]] = Counter()
+    diagnoses: Counter[tuple[date, uuid.UUID, uuid.UUID]] = Counter()
+    for consultation_date, doctor_id, diagnosis_ids in consultations:
+        day = consultation_date.date()
+        days[day, doctor_id] += 1
+        for diagnosis_id in set(diagnosis_ids):
+            diagnoses[day, doctor_id, diagnosis_id] += 1
+
+    if days:
+        await _increment(session, ConsultationDailyCount, [
+            {"day": day, "doctor_id": doctor_id, "consultations": count}
+            for (day, doctor_id), count in sorted(days.items())
+        ])
+    if diagnoses:
+        await _increment(session, DiagnosisDailyCount, [
+            {"day": day, "doctor_id": doctor_id, "diagnosis_id": diagnosis_id, "consultations": count}
+            for (day, doctor_id, diagnosis_id), count in sorted(diagnoses.items())
+        ])
+
+async def _increment(session: AsyncSession, model: Any, rows: list[dict[str, Any]]) -> None:
+    table = model.__table__
+    statement = UPSERTS[session.get_bind().dialect.name](table)
+    statement = statement.on_conflict_do_update(
+        index_elements=list(table.primary_key.columns),
+        set_={"consultations": table.c.consultations + statement.excluded.consultations},
+    )
+    await session.execute(statement, rows)  # type: ignore[deprecated]
+
+def _day(dialect_name: str, column: Any) -> Any:
+    # SQLite has no DATE type: CAST(... AS DATE) would keep only the year
+    if dialect_name == "sqlite":
+        return func.date(column)
+    return cast(column, Date)
+
+async def rebuild_rollups(*,
+    session: AsyncSession,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+) -> RollupRebuildResult:
+    """
+    Recompute the rollups of a range of days (all by default) from the consultations.
+
+    Days are rebuilt REBUILD_BATCH_DAYS at a time, one transaction each. On
+    PostgreSQL the rollups are locked against writes until each batch commits,
+    so consultations created meanwhile are counted exactly once (either by the
+    rebuild or, once it commits, by their own transaction) while writers only
+    ever wait for one batch.
+    """
+    first, last = await _rebuilt_days(session, date_from, date_to)
+    consultation_days = diagnosis_days = 0
+    start = first
+    while start is not None and last is not None and start <= last:
+        end = min(start + timedelta(days=REBUILD_BATCH_DAYS - 1), last)
+        counts = await _rebuild_batch(session, start, end)
+        consultation_days += counts[ConsultationDailyCount]
+        diagnosis_days += counts[DiagnosisDailyCount]
+        start = end + timedelta(days=1)
+
+    return RollupRebuildResult(consultation_days=consultation_days, diagnosis_days=diagnosis_days)
+
+async def _rebuilt_days(
+    session: AsyncSession, date_from: Optional[date], date_to: Optional[date]
+) -> tuple[Optional[date], Optional[date]]:
+    # Open ends stretch to the first and last day with consultations or rollups
+    if date_from is not None and date_to is not None:
+        return date_from, date_to
+    days: list[date] = []
+    for column in (Consultation.consultation_date, ConsultationDailyCount.day, DiagnosisDailyCount.day):
+        bounds = (await session.execute(select(func.min(column), func.max(column)))).one()  # type: ignore[deprecated]
+        days.extend(value.date() if isinstance(value, datetime) else value for value in bounds if value is not None)
+    if not days:
+        return None, None
+    return date_from or min(days), date_to or max(days)
+
+async def _rebuild_batch(session: AsyncSession, first: date, last: date) -> dict[Any, int]:
+    dialect_name = session.get_bind().dialect.name
+    if dialect_name == "postgresql":
+        await session.execute(text(  # type: ignore[deprecated]
+            f"LOCK TABLE {ConsultationDailyCount.__tablename__}, {DiagnosisDailyCount.__tablename__} IN EXCLUSIVE MODE"
+        ))
+
+    day = _day(dialect_name, Consultation.consultation_date)
+    consultation_filters: list[Any] = [
+        col(Consultation.doctor_id).is_not(None),
+        col(Consultation.consultation_date) >= datetime.combine(first, time.min),
+        col(Consultation.consultation_date) < datetime.combine(last + timedelta(days=1), time.min),
+    ]
+
+    sources = {
+        ConsultationDailyCount: (
+            select(day, Consultation.doctor_id, func.count())
+            .where(*consultation_filters)
+            .group_by(day, Consultation.doctor_id)
+        ),
+        DiagnosisDailyCount: (
+            select(day, Consultation.doctor_id, ConsultationDiagnosis.diagnosis_id, func.count())
+            .join(ConsultationDiagnosis, col(ConsultationDiagnosis.consultation_id) == Consultation.id)
+            .where(*consultation_filters)
+            .group_by(day, Consultation.doctor_id, ConsultationDiagnosis.diagnosis_id)
+        ),
+    }
+    counts = {}
+    for model, source in sources.items():
+        await session.execute(delete(model).where(col(model.day) >= first, col(model.day) <= last))  # type: ignore[deprecated]
+
+        # Columns in declaration order: the keys, then consultations
+        columns = [column.name for column in model.__table__.columns]
+        result = await session.execute(insert(model).from_select(columns, source))  # type: ignore[deprecated]
+        counts[model] = result.rowcount  # type: ignore[attr-defined]
+
+    await session.commit()
+    return counts
+
+async def get_daily_consultation_counts(*,
+    session: AsyncSession,
+    date_from: date,
+    date_to: date,
+    doctor_id: Optional[uuid.UUID] = None
+) -> list[DailyConsultationCount]:
+    """Consultations per day of the range, days without any included."""
+    statement = (
+        select(ConsultationDailyCount.day, func.sum(ConsultationDailyCount.consultations))
+        .where(col(ConsultationDailyCount.day) >= date_from, col(ConsultationDailyCount.day) <= date_to)
+        .group_by(ConsultationDailyCount.day)
+    )
+    if doctor_id:
+        statement = statement.where(col(ConsultationDailyCount.doctor_id) == doctor_id)
+    counts = dict((await session.execute(statement)).tuples().all())  # type: ignore[deprecated]
+
+    return [
+        DailyConsultationCount(day=day, consultations=counts.get(day, 0))
+        for day in (date_from + timedelta(days=offset) for offset in range((date_to - date_from).days + 1))
+    ]
+
+async def get_top_diagnoses(*,
+    session: AsyncSession,
+    date_from: date,
+    date_to: date,
+    limit: int,
+    doctor_id: Optional[uuid.UUID] = None
+) -> list[TopDiagnosis]:
+    """
+    Each doctor's `limit` most frequent diagnoses per month of the range.
+
+    Ranked in a single statement over the rollups; ties go to the lower code.
+    """
+    year = extract("year", DiagnosisDailyCount.day)
+    month = extract("month", DiagnosisDailyCount.day)
+    consultations = func.sum(DiagnosisDailyCount.consultations)
+    ranked = (
+        select(
+            year.label("year"),
+            month.label("month"),
+            DiagnosisDailyCount.doctor_id,
+            DiagnosisDailyCount.diagnosis_id,
+            Diagnosis.code,
+            Diagnosis.description,
+            consultations.label("consultations"),
+            func.row_number().over(
+                partition_by=(year, month, DiagnosisDailyCount.doctor_id),
+                order_by=(consultations.desc(), Diagnosis.code),
+            ).label("rank"),
+        )
+        .join(Diagnosis, col(Diagnosis.id) == DiagnosisDailyCount.diagnosis_id)
+        .where(col(DiagnosisDailyCount.day) >= date_from, col(DiagnosisDailyCount.day) <= date_to)
+        .group_by(year, month, DiagnosisDailyCount.doctor_id, DiagnosisDailyCount.diagnosis_id, Diagnosis.code, Diagnosis.description)
+    )
+    if doctor_id:
+        ranked = ranked.where(col(DiagnosisDailyCount.doctor_id) == doctor_id)
+    top = ranked.subquery()
+
+    statement = (
+        select(top, doctor_name)
+        .join(User, col(User.id) == top.c.doctor_id)
+        .where(top.c.rank <= limit)
+        .order_by(top.c.year, top.c.month, doctor_name, top.c.doctor_id, top.c.rank)
+    )
+    rows = (await session.execute(statement)).all()  # type: ignore[deprecated]
+    return [
+        TopDiagnosis(
+            month=date(int(row.year), int(row.month), 1),
+            doctor_id=row.doctor_id,
+            doctor_name=row.doctor_name,
+            rank=row.rank,
+            diagnosis_id=row.diagnosis_id,
+            code=row.code,
+            description=row.description,
+            consultations=row.consultations,
+        )
+        for row in rows
+    ]
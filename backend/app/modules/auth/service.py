@@ -9,7 +9,8 @@ from app.core.config import settings
 from app.core.security import (
     create_access_token,
     create_refresh_token,
-    verify_password,
+    password_hasher,
+    password_needs_rehash,
     blacklist_token,
     get_token_payload,
     is_token_blacklisted,
@@ -23,19 +24,25 @@ async def login(*, session: AsyncSession, body: LoginRequest, response: Response
     Returns access token and sets refresh token in an HTTP-only cookie.
     """
     user = await user_service.get_user_by_email(session=session, email=body.email)
-    if not user or not verify_password(body.password, user.hashed_password):
+    if not user or not await password_hasher.verify(body.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
+
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Inactive user",
         )
 
+    # Upgrade the hash to the configured cost while we have the plain password
+    if password_needs_rehash(user.hashed_password):
+        user.hashed_password = await password_hasher.hash(body.password)
+        session.add(user)
+        await session.commit()
+
     # Create tokens
     access_token_expires = timedelta(minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -74,13 +81,13 @@ async def refresh(*, session: AsyncSession, request: Request) -> TokenResponse:
             detail="Refresh token missing",
         )
 
-    if is_token_blacklisted(refresh_token):
+    payload = get_token_payload(refresh_token)
+    if await is_token_blacklisted(refresh_token, payload):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token is blacklisted",
         )
 
-    payload = get_token_payload(refresh_token)
     email = payload.get("sub")
     token_type = payload.get("type")
     
@@ -115,12 +122,12 @@ async def logout(*, request: Request, response: Response):
     auth_header = request.headers.get("Authorization")
     if auth_header and auth_header.startswith("Bearer "):
         access_token = auth_header.split(" ")[1]
-        blacklist_token(access_token)
+        await blacklist_token(access_token)
 
     # Blacklist Refresh Token from cookie
     refresh_token = request.cookies.get("refresh_token")
     if refresh_token:
-        blacklist_token(refresh_token)
+        await blacklist_token(refresh_token)
 
     # Clear Cookie
     response.delete_cookie(key="refresh_token")
@@ -14,4 +14,11 @@ class ConsultationNotFoundException(HTTPException):
 class ConsultationPermissionException(HTTPException):
     def __init__(self, message="You do not have permission to view this consultation"):
         self.message = message
-        super().__init__(status_code=status.HTTP_403_FORBIDDEN, detail=self.message)
\ No newline at end of file
+        super().__init__(status_code=status.HTTP_403_FORBIDDEN, detail=self.message)
+
+
+class ConsultationImportException(HTTPException):
+    def __init__(self, next_offset: int):
+        self.next_offset = next_offset
+        self.message = f"Import failed; lines before offset {next_offset} were saved, resume with offset={next_offset}"
+        super().__init__(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=self.message)
@@ -0,0 +1,221 @@
+import logging
+import uuid
+from collections.abc import AsyncIterable, AsyncIterator, Iterable
+from datetime import datetime, UTC
+from itertools import islice
+from typing import Any
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.modules.analytics.service import NewConsultation, add_to_rollups
+from app.modules.consultation.exceptions import ConsultationImportException
+from app.modules.consultation.models import Consultation, ConsultationDiagnosis
+from app.modules.consultation.schemas import ConsultationImport, ConsultationImportError, ConsultationImportResult
+from app.modules.diagnoses.loader import normalize_code
+from app.modules.diagnoses.models import Diagnosis
+from app.modules.user.models import Role, User
+
+logger = logging.getLogger(__name__)
+
+# Lines per batch: one doctor lookup, one diagnosis lookup, one insert per table,
+# one analytics rollup upsert per rollup table and one commit
+BATCH_SIZE = 5000
+# Keys per IN lookup, below SQLite's bound parameter limit
+LOOKUP_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+
+CONSULTATION_COLUMNS = ("id", "patient_full_name", "doctor_id", "consultation_date", "notes", "created_at", "updated_at")
+LINK_COLUMNS = ("consultation_id", "diagnosis_id", "created_at")
+
+Line = tuple[int, bytes]
+
+
+async def read_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """Split a streamed body into lines, holding at most one partial line."""
+    pending = b""
+    async for chunk in chunks:
+        *lines, pending = (pending + chunk).split(b"\n")
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+
+def _chunked(keys: Iterable[str], size: int) -> Iterable[list[str]]:
+    iterator = iter(keys)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _describe(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, detail['loc']))}: {detail['msg']}" if detail["loc"] else detail["msg"]
+        for detail in error.errors(include_url=False)
+    )
+
+
+class ConsultationImporter:
+    """
+    Bulk loader for NDJSON consultation exports.
+
+    Lines are validated and grouped in batches of BATCH_SIZE. Each batch
+    resolves the doctor emails and diagnosis codes it has not seen yet in one
+    lookup each (results are kept for the rest of the import), then inserts
+    its consultations and diagnosis links in bulk (COPY on PostgreSQL,
+    executemany elsewhere) and commits.
+
+    Invalid lines are skipped and reported with their line number. Batches
+    are committed independently: `next_offset` counts the lines consumed, so
+    an interrupted import resumes with `offset=next_offset` without
+    duplicating rows.
+    """
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+        self.doctors: dict[str, uuid.UUID] = {}
+        self.rejected_doctors: dict[str, str] = {}
+        # None for unknown codes
+        self.diagnoses: dict[str, uuid.UUID | None] = {}
+        self.received = 0
+        self.imported = 0
+        self.failed = 0
+        self.next_offset = 0
+        self.errors: list[ConsultationImportError] = []
+
+    async def run(self, lines: AsyncIterable[bytes], *, offset: int = 0) -> ConsultationImportResult:
+        self.next_offset = offset
+        line_number = 0
+        batch: list[Line] = []
+        async for line in lines:
+            line_number += 1
+            if line_number <= offset or not line.strip():
+                continue
+            batch.append((line_number, line))
+            if len(batch) >= BATCH_SIZE:
+                await self._import_batch(batch, line_number)
+                batch = []
+        if batch:
+            await self._import_batch(batch, line_number)
+        self.next_offset = max(offset, line_number)
+
+        return ConsultationImportResult(
+            received=self.received,
+            imported=self.imported,
+            failed=self.failed,
+            next_offset=self.next_offset,
+            errors=self.errors,
+        )
+
+    def _report(self, failures: list[tuple[int, str]]) -> None:
+        self.failed += len(failures)
+        for line, error in sorted(failures)[:MAX_REPORTED_ERRORS - len(self.errors)]:
+            self.errors.append(ConsultationImportError(line=line, error=error))
+
+    async def _import_batch(self, batch: list[Line], last_line: int) -> None:
+        self.received += len(batch)
+        failures: list[tuple[int, str]] = []
+        records: list[tuple[int, ConsultationImport]] = []
+        for number, line in batch:
+            try:
+                records.append((number, ConsultationImport.model_validate_json(line)))
+            except ValidationError as e:
+                failures.append((number, _describe(e)))
+
+        try:
+            # Lookups included: a failure anywhere reports where to resume
+            await self._resolve_doctors({record.doctor_email for _, record in records})
+            await self._resolve_diagnoses({
+                normalize_code(code) for _, record in records for code in record.diagnosis_codes
+            })
+
+            now = datetime.now(UTC).replace(tzinfo=None)
+            consultations: list[tuple[Any, ...]] = []
+            links: list[tuple[Any, ...]] = []
+            rollups: list[NewConsultation] = []
+            for number, record in records:
+                doctor_id = self.doctors.get(record.doctor_email)
+                if doctor_id is None:
+                    failures.append((number, self.rejected_doctors[record.doctor_email]))
+                    continue
+
+                codes = list(dict.fromkeys(normalize_code(code) for code in record.diagnosis_codes))
+                unknown = [code for code in codes if self.diagnoses[code] is None]
+                if unknown:
+                    failures.append((number, f"Unknown diagnosis codes: {', '.join(unknown)}"))
+                    continue
+
+                consultation_id = uuid.uuid4()
+                created_at = record.created_at or now
+                consultations.append((
+                    consultation_id,
+                    record.patient_full_name,
+                    doctor_id,
+                    record.consultation_date,
+                    record.notes,
+                    created_at,
+                    now,
+                ))
+                links.extend((consultation_id, self.diagnoses[code], created_at) for code in codes)
+                rollups.append((record.consultation_date, doctor_id, [self.diagnoses[code] for code in codes]))
+
+            if consultations:
+                await self._insert(consultations, links)
+                await add_to_rollups(session=self.session, consultations=rollups)
+            await self.session.commit()
+        except Exception as e:
+            await self.session.rollback()
+            logger.exception("Consultation import failed in the batch ending at line %d", last_line)
+            raise ConsultationImportException(self.next_offset) from e
+
+        self.imported += len(consultations)
+        self.next_offset = last_line
+        self._report(failures)
+
+    async def _resolve_doctors(self, emails: set[str]) -> None:
+        missing = emails - self.doctors.keys() - self.rejected_doctors.keys()
+        for chunk in _chunked(missing, LOOKUP_CHUNK_SIZE):
+            statement = select(User.email, User.id, User.role, User.is_active).where(col(User.email).in_(chunk))
+            for email, user_id, role, is_active in (await self.session.execute(statement)).all():  # type: ignore[deprecated]
+                # Same rules as creating a single consultation
+                if role != Role.DOCTOR:
+                    self.rejected_doctors[email] = "Doctor not found"
+                elif not is_active:
+                    self.rejected_doctors[email] = "Doctor is inactive"
+                else:
+                    self.doctors[email] = user_id
+        for email in missing - self.doctors.keys():
+            self.rejected_doctors.setdefault(email, "Doctor not found")
+
+    async def _resolve_diagnoses(self, codes: set[str]) -> None:
+        missing = codes - self.diagnoses.keys()
+        for chunk in _chunked(missing, LOOKUP_CHUNK_SIZE):
+            statement = select(Diagnosis.code, Diagnosis.id).where(col(Diagnosis.code).in_(chunk))
+            self.diagnoses.update((await self.session.execute(statement)).tuples().all())  # type: ignore[deprecated]
+        for code in missing:
+            self.diagnoses.setdefault(code, None)
+
+    async def _insert(self, consultations: list[tuple[Any, ...]], links: list[tuple[Any, ...]]) -> None:
+        if self.session.get_bind().dialect.name == "postgresql":
+            connection = await self.session.connection()
+            raw_connection = await connection.get_raw_connection()
+            driver_connection = raw_connection.driver_connection
+            await driver_connection.copy_records_to_table(
+                Consultation.__tablename__, records=consultations, columns=CONSULTATION_COLUMNS
+            )
+            if links:
+                await driver_connection.copy_records_to_table(
+                    ConsultationDiagnosis.__tablename__, records=links, columns=LINK_COLUMNS
+                )
+            return
+
+        # Portable fallback (SQLite in tests and local development)
+        await self.session.execute(  # type: ignore[deprecated]
+            insert(Consultation), [dict(zip(CONSULTATION_COLUMNS, row)) for row in consultations]
+        )
+        if links:
+            await self.session.execute(  # type: ignore[deprecated]
+                insert(ConsultationDiagnosis), [dict(zip(LINK_COLUMNS, row)) for row in links]
+            )
@@ -1,14 +1,25 @@
 import uuid
 from datetime import datetime, UTC
 from typing import Optional, List, TYPE_CHECKING
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel, Relationship
 
 if TYPE_CHECKING:
     from app.modules.user.models import User
     from app.modules.diagnoses.models import Diagnosis
 
+def display_doctor_name(doctor: Optional["User"]) -> str:
+    """Doctor name shown on consultations; `doctor_name` in the service is its SQL twin."""
+    if doctor is None:
+        return "Unknown"
+    return doctor.full_name or doctor.email or "Unknown"
+
 class ConsultationDiagnosis(SQLModel, table=True):
     __tablename__ = "consultation_diagnoses"
+    __table_args__ = (
+        # Reverse lookups (consultations per diagnosis); the primary key leads with consultation_id
+        Index("ix_consultation_diagnoses_diagnosis_id", "diagnosis_id", "consultation_id"),
+    )
     
     consultation_id: uuid.UUID = Field(foreign_key="consultation.id", primary_key=True)
     diagnosis_id: uuid.UUID = Field(foreign_key="diagnosis.id", primary_key=True)
@@ -21,8 +32,24 @@ class ConsultationBase(SQLModel):
     notes: str = Field(default="")
 
 class Consultation(ConsultationBase, table=True):
+    __table_args__ = (
+        # Trigram indexes serving the ILIKE '%term%' search on the consultation list
+        Index("ix_consultation_patient_full_name_trgm", "patient_full_name", postgresql_using="gin", postgresql_ops={"patient_full_name": "gin_trgm_ops"}),
+        Index("ix_consultation_notes_trgm", "notes", postgresql_using="gin", postgresql_ops={"notes": "gin_trgm_ops"}),
+        # Doctor-scoped lists in each sort order, covering the list columns for index-only scans
+        Index("ix_consultation_doctor_id_consultation_date", "doctor_id", "consultation_date", "id", postgresql_include=["patient_full_name", "created_at"]),
+        Index("ix_consultation_doctor_id_created_at", "doctor_id", "created_at", "id", postgresql_include=["patient_full_name", "consultation_date"]),
+        # Default sort, with the id tie-breaker used by keyset pages
+        Index("ix_consultation_created_at", "created_at", "id"),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     created_at: datetime = Field(default_factory=lambda: datetime.now(UTC).replace(tzinfo=None))
+    # Row version for HTTP caching, bumped by every update
+    updated_at: datetime = Field(
+        default_factory=lambda: datetime.now(UTC).replace(tzinfo=None),
+        sa_column_kwargs={"onupdate": lambda: datetime.now(UTC).replace(tzinfo=None)},
+    )
     
     doctor: "User" = Relationship()
     diagnoses: List["Diagnosis"] = Relationship(
@@ -31,9 +58,7 @@ class Consultation(ConsultationBase, table=True):
 
     @property
     def doctor_name(self) -> str:
-        if self.doctor:
-            return self.doctor.full_name or self.doctor.email
-        return "Unknown"
+        return display_doctor_name(self.doctor)
 
     @property
     def diagnosis_count(self) -> int:
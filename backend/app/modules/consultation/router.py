@@ -1,13 +1,17 @@
 import uuid
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from app.core.database import AsyncSessionDep
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request, Response
+from app.core.database import AsyncSessionDep, ReadOnlySessionDep, pin_reads_to_primary
 from app.modules.consultation import service
-from app.modules.consultation.schemas import ConsultationCreate, ConsultationRead, ConsultationList
-from app.modules.user.models import User, Role
-from app.modules.user.dependencies import get_current_active_user
+from app.modules.consultation.importer import read_lines
+from app.modules.consultation.schemas import ConsultationCreate, ConsultationImportResult, ConsultationRead, ConsultationList, ExportFormat
+from app.modules.user.models import Role
+from app.modules.user.schemas import UserRead
+from app.modules.user.dependencies import get_current_active_user, get_current_admin_user
 from app.core.schemas import PaginationParams, SortParams, SearchParams
 from app.core.query_builder import QueryResult
+from app.core.http_cache import PRIVATE_CACHE_CONTROL, cache_headers, etag_matches, not_modified
+from app.core.responses import ClosingStreamingResponse, QueryResultResponse
 from app.core.rate_limiter import limiter
 
 router = APIRouter(prefix="/consultation", tags=["consultation"])
@@ -16,9 +20,10 @@ router = APIRouter(prefix="/consultation", tags=["consultation"])
 @limiter.limit("60/minute")
 async def create_consultation(
     request: Request,
+    response: Response,
     consultation_in: ConsultationCreate,
     session: AsyncSessionDep,
-    current_user: User = Depends(get_current_active_user)
+    current_user: UserRead = Depends(get_current_active_user)
 ):
     """
     Create a new consultation record.
@@ -29,18 +34,52 @@ async def create_consultation(
     if current_user.role == Role.ADMIN and consultation_in.doctor_id:
         doctor_id = consultation_in.doctor_id
 
-    return await service.create_consultation(
+    consultation = await service.create_consultation(
         session=session, 
         consultation_in=consultation_in, 
         doctor_id=doctor_id
     )
 
+    # Let the author read their own write before replicas catch up
+    pin_reads_to_primary(response)
+    return consultation
+
+@router.post("/bulk",
+    dependencies=[Depends(get_current_admin_user)],
+    response_model=ConsultationImportResult,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/x-ndjson": {"schema": {"type": "string"}}},
+        }
+    },
+)
+@limiter.limit("10/minute")
+async def bulk_import_consultations(
+    request: Request,
+    session: AsyncSessionDep,
+    offset: int = Query(default=0, ge=0, description="Leading lines to skip, e.g. the next_offset of an interrupted import"),
+):
+    """
+    Import consultations from an NDJSON body, one `ConsultationImport` object per line.
+
+    Doctors are referenced by email and diagnoses by code. Invalid lines are
+    skipped and reported; the rest is committed in batches.
+
+    Requires: admin role
+    """
+    return await service.import_consultations(
+        session=session,
+        lines=read_lines(request.stream()),
+        offset=offset,
+    )
+
 @router.get("/", response_model=QueryResult[ConsultationList])
 @limiter.limit("60/minute")
 async def list_consultations(
     request: Request,
-    session: AsyncSessionDep,
-    current_user: User = Depends(get_current_active_user),
+    session: ReadOnlySessionDep,
+    current_user: UserRead = Depends(get_current_active_user),
     pagination: PaginationParams = Depends(),
     sort: SortParams = Depends(),
     search: SearchParams = Depends()
@@ -49,35 +88,84 @@ async def list_consultations(
     List consultations. Doctors only see their own, Admins see all.
     """
     doctor_id = current_user.id if current_user.role == Role.DOCTOR else None
-    return await service.get_consultations(
+    result = await service.get_consultations(
         session=session,
         pagination=pagination,
         sort=sort,
         search=search,
         doctor_id=doctor_id
     )
+    return QueryResultResponse(result, ConsultationList)
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+    ExportFormat.NDJSON: "application/x-ndjson",
+}
+
+@router.get("/export", response_class=ClosingStreamingResponse)
+@limiter.limit("10/minute")
+async def export_consultations(
+    request: Request,
+    session: ReadOnlySessionDep,
+    current_user: UserRead = Depends(get_current_active_user),
+    format: ExportFormat = Query(default=ExportFormat.CSV, description="csv or ndjson"),
+    sort: SortParams = Depends(),
+    search: SearchParams = Depends()
+):
+    """
+    Export consultations as CSV or NDJSON, with the same filters as the list.
+    Doctors only export their own, Admins export all.
+
+    The export is streamed: rows are sent as they are read from the database.
+    """
+    doctor_id = current_user.id if current_user.role == Role.DOCTOR else None
+    rows = service.export_consultations(
+        session=session,
+        format=format,
+        sort=sort,
+        search=search,
+        doctor_id=doctor_id
+    )
+    return ClosingStreamingResponse(
+        rows,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="consultations.{format.value}"'},
+    )
 
 @router.get("/{consultation_id}", response_model=ConsultationRead)
 @limiter.limit("60/minute")
 async def get_consultation(
     request: Request,
+    response: Response,
     consultation_id: uuid.UUID,
-    session: AsyncSessionDep,
-    current_user: User = Depends(get_current_active_user)
+    session: ReadOnlySessionDep,
+    current_user: UserRead = Depends(get_current_active_user)
 ):
     """
     Get detailed consultation info. Doctors can only access their own records.
+
+    Responses carry an ETag; a matching `If-None-Match` is answered with 304
+    after a single version lookup.
     """
-    db_consultation = await service.get_consultation(session=session, consultation_id=consultation_id)
+    version = await service.get_consultation_version(session=session, consultation_id=consultation_id)
     
-    if not db_consultation:
+    if not version:
         raise HTTPException(status_code=404, detail="Consultation not found")
         
     # Permission check: Doctors only see their own
-    if current_user.role == Role.DOCTOR and db_consultation.doctor_id != current_user.id:
+    if current_user.role == Role.DOCTOR and version.doctor_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, 
             detail="You do not have permission to view this consultation"
         )
-        
+
+    if version.etag and etag_matches(request, version.etag):
+        return not_modified(version.etag, PRIVATE_CACHE_CONTROL)
+
+    db_consultation = await service.get_consultation(session=session, consultation_id=consultation_id)
+    if not db_consultation:
+        raise HTTPException(status_code=404, detail="Consultation not found")
+
+    if version.etag:
+        response.headers.update(cache_headers(version.etag, PRIVATE_CACHE_CONTROL))
     return db_consultation
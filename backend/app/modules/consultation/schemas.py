@@ -1,7 +1,8 @@
 import uuid
-from datetime import datetime
+from datetime import datetime, UTC
+from enum import Enum
 from typing import Optional, List
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 from app.modules.consultation.models import ConsultationBase
 from app.modules.diagnoses.schemas import DiagnosisRead
 
@@ -24,3 +25,39 @@ class ConsultationList(BaseModel):
     created_at: datetime
     diagnosis_count: int
     diagnoses: List[DiagnosisRead]
+
+# One line of a bulk import (NDJSON). Doctors and diagnoses are referenced by
+# their natural keys so records from other systems can be loaded as is.
+class ConsultationImport(BaseModel):
+    patient_full_name: str = Field(min_length=1, max_length=255)
+    doctor_email: str
+    consultation_date: datetime
+    notes: str = ""
+    diagnosis_codes: List[str] = []
+    # Defaults to the import time
+    created_at: Optional[datetime] = None
+
+    @field_validator("consultation_date", "created_at")
+    @classmethod
+    def naive_utc(cls, value: Optional[datetime]) -> Optional[datetime]:
+        # Timestamps are stored as naive UTC
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(UTC).replace(tzinfo=None)
+        return value
+
+class ConsultationImportError(BaseModel):
+    line: int
+    error: str
+
+class ConsultationImportResult(BaseModel):
+    received: int
+    imported: int
+    failed: int
+    # Lines consumed, including skipped ones; pass as `offset` to resume
+    next_offset: int
+    # The first errors only, see `failed` for the total
+    errors: List[ConsultationImportError]
+
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
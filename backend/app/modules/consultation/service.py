@@ -1,23 +1,61 @@
+import csv
+import io
 import uuid
-from datetime import datetime, UTC
-from typing import List, Optional, Sequence
-from sqlalchemy import func, or_
-from sqlalchemy.orm import selectinload, joinedload
+from datetime import datetime
+from collections.abc import AsyncIterable, AsyncIterator
+from contextlib import aclosing
+from typing import Any, List, NamedTuple, Optional
+from pydantic_core import to_json
+from sqlalchemy import func
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlmodel import col, desc, asc, select
-from app.modules.consultation.models import Consultation
-from app.modules.consultation.schemas import ConsultationCreate
+from sqlmodel import col, select
+from app.modules.analytics.service import add_to_rollups
+from app.modules.consultation.models import Consultation, ConsultationDiagnosis, display_doctor_name
+from app.modules.consultation.importer import ConsultationImporter
+from app.modules.consultation.schemas import ConsultationCreate, ConsultationImportResult, ConsultationRead, ExportFormat
+from app.modules.diagnoses.catalog import diagnosis_catalog
 from app.modules.diagnoses.models import Diagnosis
+from app.modules.diagnoses.schemas import DiagnosisRead
+from app.modules.user.models import User
 from app.modules.user.service import get_doctor_by_id
 from app.modules.user.exceptions import UserNotFoundException, InactiveUserException
+from app.core.http_cache import make_etag
 from app.core.schemas import PaginationParams, SortParams, SearchParams
-from app.core.query_builder import QueryBuilder, QueryResult
+from app.core.query_builder import QueryBuilder, QueryResult, json_array_agg, json_rows
+
+# Same fallbacks as display_doctor_name, which create_consultation answers with
+doctor_name = func.coalesce(func.nullif(User.full_name, ""), User.email, "Unknown").label("doctor_name")
+
+diagnosis_count = (
+    select(func.count())
+    .select_from(ConsultationDiagnosis)
+    .where(col(ConsultationDiagnosis.consultation_id) == Consultation.id)
+    .scalar_subquery()
+    .label("diagnosis_count")
+)
+
+# Rows per server-side cursor fetch and per response chunk
+EXPORT_BATCH_SIZE = 1000
+# Diagnoses are exported as their codes, separated by ";"
+EXPORT_CSV_COLUMNS = ["id", "patient_full_name", "doctor_id", "doctor_name", "consultation_date", "notes", "created_at", "diagnoses"]
+
+def diagnoses_json(dialect_name: str) -> Any:
+    """Correlated subquery aggregating a consultation's diagnoses as a JSON array."""
+    fields = {name: getattr(Diagnosis, name) for name in DiagnosisRead.model_fields}
+    return (
+        select(json_array_agg(dialect_name, fields, order_by=Diagnosis.code))
+        .select_from(ConsultationDiagnosis)
+        .join(Diagnosis, col(Diagnosis.id) == ConsultationDiagnosis.diagnosis_id)
+        .where(col(ConsultationDiagnosis.consultation_id) == Consultation.id)
+        .scalar_subquery()
+        .label("diagnoses")
+    )
 
 async def create_consultation(*, 
     session: AsyncSession, 
     consultation_in: ConsultationCreate,
     doctor_id: uuid.UUID
-) -> Consultation:
+) -> ConsultationRead:
     """Creates a new consultation and links diagnoses."""
     doctor = await get_doctor_by_id(session=session, doctor_id=doctor_id)
     if not doctor:
@@ -34,37 +72,46 @@ async def create_consultation(*,
     )
     
     # Link diagnoses
+    diagnoses: List[Diagnosis] = []
     if consultation_in.diagnosis_ids:
         # Using col() to satisfy the static analyzer for .in_
         statement = select(Diagnosis).where(col(Diagnosis.id).in_(consultation_in.diagnosis_ids))
         result = await session.exec(statement)
-        diagnoses = result.all()
-        db_consultation.diagnoses = list(diagnoses)
+        diagnoses = list(result.all())
+        db_consultation.diagnoses = diagnoses
         
     session.add(db_consultation)
+    # Counted in the analytics rollups in the same transaction
+    await add_to_rollups(session=session, consultations=[
+        (db_consultation.consultation_date, doctor_id, [diagnosis.id for diagnosis in diagnoses])
+    ])
     await session.commit()
     
-    # Re-fetch with all relationships for the response
-    result = await get_consultation(session=session, consultation_id=db_consultation.id)
-    if not result:
-        raise RuntimeError("Consultation was not found after creation")
-    return result
+    # The doctor and diagnoses are loaded already: answer like get_consultation without re-fetching.
+    # The doctor name falls back exactly like the `doctor_name` column get_consultation reads
+    return ConsultationRead(
+        id=db_consultation.id,
+        patient_full_name=db_consultation.patient_full_name,
+        doctor_id=doctor_id,
+        consultation_date=db_consultation.consultation_date,
+        notes=db_consultation.notes,
+        created_at=db_consultation.created_at,
+        doctor_name=display_doctor_name(doctor),
+        diagnoses=[DiagnosisRead.model_validate(diagnosis) for diagnosis in sorted(diagnoses, key=lambda d: d.code)],
+    )
 
-async def get_consultations(*,
+def _consultation_query(
     session: AsyncSession,
-    pagination: PaginationParams,
     sort: SortParams,
     search: SearchParams,
-    doctor_id: Optional[uuid.UUID] = None
-) -> QueryResult[Consultation]:
-    """Retrieves consultations with optional doctor filtering."""
-    builder = QueryBuilder(Consultation, session, pagination, sort)
-    
-    # Add relationships
-    builder.options(
-        joinedload(Consultation.doctor), # type: ignore
-        selectinload(Consultation.diagnoses) # type: ignore
-    )
+    doctor_id: Optional[uuid.UUID],
+    *columns: Any,
+) -> QueryBuilder[Consultation]:
+    """Projected consultation query with the list filters, search and sorting."""
+    builder = QueryBuilder(Consultation, session)
+
+    builder.project(*columns, diagnoses_json(builder.dialect_name), nested={"diagnoses": DiagnosisRead})
+    builder.join(User, col(User.id) == Consultation.doctor_id, isouter=True)
     
     # Add filters
     if doctor_id:
@@ -81,14 +128,139 @@ async def get_consultations(*,
         "created_at": Consultation.created_at
     }
     builder.sort(sort, sort_config)
-    
-    return await builder.execute()
+    return builder
+
+async def get_consultations(*,
+    session: AsyncSession,
+    pagination: PaginationParams,
+    sort: SortParams,
+    search: SearchParams,
+    doctor_id: Optional[uuid.UUID] = None
+) -> QueryResult[dict[str, Any]]:
+    """
+    Retrieves consultations with optional doctor filtering.
+
+    Rows are `ConsultationList` dicts fetched in a single statement: the doctor
+    is joined for the name, diagnoses are aggregated per row and notes are
+    never loaded.
+    """
+    builder = _consultation_query(
+        session, sort, search, doctor_id,
+        Consultation.id,
+        Consultation.patient_full_name,
+        doctor_name,
+        Consultation.consultation_date,
+        Consultation.created_at,
+        diagnosis_count,
+    )
+    builder.paginate(pagination)
+    return await builder.execute()  # type: ignore[return-value]
+
+async def export_consultations(*,
+    session: AsyncSession,
+    format: ExportFormat,
+    sort: SortParams,
+    search: SearchParams,
+    doctor_id: Optional[uuid.UUID] = None
+) -> AsyncIterator[bytes]:
+    """
+    Streams every matching consultation (`ConsultationRead` fields) as CSV or NDJSON.
+
+    Rows come from a server-side cursor and are encoded one batch at a time,
+    so memory stays flat whatever the export size.
+    """
+    builder = _consultation_query(
+        session, sort, search, doctor_id,
+        Consultation.id,
+        Consultation.patient_full_name,
+        Consultation.doctor_id,
+        doctor_name,
+        Consultation.consultation_date,
+        Consultation.notes,
+        Consultation.created_at,
+    )
+
+    if format == ExportFormat.CSV:
+        yield _csv_chunk([EXPORT_CSV_COLUMNS])
+    # Closes the cursor as soon as this generator is closed
+    async with aclosing(builder.stream(EXPORT_BATCH_SIZE)) as batches:
+        async for rows in batches:
+            if format == ExportFormat.CSV:
+                yield _csv_chunk([_csv_row(row) for row in rows])
+            else:
+                yield b"".join(to_json(row) + b"\n" for row in rows)
+
+def _csv_row(row: dict[str, Any]) -> list[Any]:
+    values = {**row, "diagnoses": ";".join(diagnosis["code"] for diagnosis in row["diagnoses"])}
+    return [
+        value.isoformat() if isinstance(value, datetime) else value
+        for value in (values[column] for column in EXPORT_CSV_COLUMNS)
+    ]
+
+def _csv_chunk(rows: list[list[Any]]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode("utf-8")
 
-async def get_consultation(*, session: AsyncSession, consultation_id: uuid.UUID) -> Optional[Consultation]:
-    """Retrieves a single consultation with all relationships."""
-    statement = select(Consultation).where(col(Consultation.id) == consultation_id).options(
-        joinedload(Consultation.doctor), # type: ignore
-        selectinload(Consultation.diagnoses) # type: ignore
+async def get_consultation(*, session: AsyncSession, consultation_id: uuid.UUID) -> Optional[ConsultationRead]:
+    """Retrieves a single consultation with its doctor name and diagnoses in one statement."""
+    statement = (
+        select(
+            Consultation.id,
+            Consultation.patient_full_name,
+            Consultation.doctor_id,
+            Consultation.consultation_date,
+            Consultation.notes,
+            Consultation.created_at,
+            doctor_name,
+            diagnoses_json(session.get_bind().dialect.name),
+        )
+        .outerjoin(User, col(User.id) == Consultation.doctor_id)
+        .where(col(Consultation.id) == consultation_id)
     )
-    result = await session.exec(statement)
-    return result.unique().first()
+    row = (await session.execute(statement)).first()  # type: ignore[deprecated]
+    if row is None:
+        return None
+    values = row._asdict()
+    values["diagnoses"] = json_rows(DiagnosisRead).validate_json(values["diagnoses"])
+    return ConsultationRead.model_validate(values)
+
+
+class ConsultationVersion(NamedTuple):
+    doctor_id: Optional[uuid.UUID]
+    # None when the diagnosis catalog version is unavailable
+    etag: Optional[str]
+
+async def get_consultation_version(*, session: AsyncSession, consultation_id: uuid.UUID) -> Optional[ConsultationVersion]:
+    """
+    Owner and ETag of a consultation from a single primary-key lookup.
+
+    The ETag covers everything the detail shows: the consultation row, the
+    doctor's name and the diagnosis descriptions (catalog version).
+    """
+    statement = (
+        select(Consultation.doctor_id, Consultation.updated_at, User.updated_at)
+        .outerjoin(User, col(User.id) == Consultation.doctor_id)
+        .where(col(Consultation.id) == consultation_id)
+    )
+    row = (await session.execute(statement)).first()  # type: ignore[deprecated]
+    if row is None:
+        return None
+    doctor_id, updated_at, doctor_updated_at = row
+
+    catalog_version = await diagnosis_catalog.served_version()
+    if catalog_version is None:
+        return ConsultationVersion(doctor_id=doctor_id, etag=None)
+    return ConsultationVersion(
+        doctor_id=doctor_id,
+        etag=make_etag(consultation_id, updated_at, doctor_updated_at, catalog_version),
+    )
+
+
+async def import_consultations(*,
+    session: AsyncSession,
+    lines: AsyncIterable[bytes],
+    offset: int = 0
+) -> ConsultationImportResult:
+    """Bulk-loads NDJSON consultation lines, committing batch by batch."""
+    return await ConsultationImporter(session).run(lines, offset=offset)
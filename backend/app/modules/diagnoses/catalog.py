@@ -0,0 +1,423 @@
+import asyncio
+import logging
+import re
+import time
+import uuid
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+from typing import Any, Sequence
+
+from redis.exceptions import RedisError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.core.pubsub import pubsub
+from app.core.redis import redis_client
+from app.core.query_builder import QueryResult, encode_cursor
+from app.core.schemas import CountMode, PaginationParams, SortDirection, SortParams, SearchParams
+from app.modules.diagnoses.models import Diagnosis
+from app.modules.diagnoses.schemas import DiagnosisRead
+
+logger = logging.getLogger(__name__)
+
+CATALOG_CHANNEL = "diagnosis:catalog"
+CATALOG_VERSION_KEY = "diagnosis:catalog:version"
+
+NGRAM = 3
+SORT_FIELDS = ("code", "description", "created_at", "id")
+# Sorted match lists kept per snapshot, so repeated autocomplete terms are slices
+MATCH_CACHE_SIZE = 64
+# Words as pg_trgm splits them: runs of alphanumerics
+TRIGRAM_WORD = re.compile(r"[^\W_]+")
+
+
+def trigram_text(value: str) -> str:
+    """
+    `value` padded the way pg_trgm pads words: lower-cased, two spaces before
+    and one after each word.
+
+    A trigram of a search term is a trigram of `value` exactly when it is a
+    substring of this text, since term trigrams never span two words.
+    """
+    return "".join(f"  {word} " for word in TRIGRAM_WORD.findall(value.lower()))
+
+
+def trigrams(value: str) -> set[str]:
+    """The trigram set pg_trgm extracts from `value`."""
+    return {
+        padded[i:i + NGRAM]
+        for padded in (f"  {word} " for word in TRIGRAM_WORD.findall(value.lower()))
+        for i in range(len(padded) - NGRAM + 1)
+    }
+
+
+class CatalogSnapshot:
+    """
+    Immutable, compact copy of the diagnosis table for in-process search.
+
+    Rows are stored column-wise in code order. Searches reproduce the ILIKE
+    semantics of the database path: a case-insensitive substring match on
+    code or description, with `%` and `_` matched literally. Rows are ordered
+    by codepoint, which the database path matches with the "C" collation. When `ranked`,
+    matches are ordered like PostgreSQL orders them, by pg_trgm similarity
+    first, and ranked pages carry no cursor. Terms of three or more characters are resolved
+    through a trigram posting-list index and verified against the text;
+    shorter terms scan one concatenated corpus with `str.find`. Every sortable
+    field has a precomputed permutation, so unfiltered pages are plain slices,
+    and the sorted matches of recent terms are kept in a small LRU.
+
+    Building a snapshot of the full ICD-10-CM release takes a couple of
+    seconds of CPU, so it is done off the event loop.
+    """
+
+    def __init__(
+        self,
+        rows: Sequence[tuple[uuid.UUID, str, str, datetime]],
+        version: int,
+        *,
+        ranked: bool = False,
+    ) -> None:
+        rows = sorted(rows, key=lambda row: row[1])
+        self.version = version
+        self.ranked = ranked
+        self.ids: list[uuid.UUID] = [row[0] for row in rows]
+        self.codes: list[str] = [row[1] for row in rows]
+        self.descriptions: list[str] = [row[2] for row in rows]
+        self.created_at: list[datetime] = [row[3] for row in rows]
+
+        # Upper-cased codes in ascending order for exact and prefix lookups
+        self.code_keys: list[str] = [code.upper() for code in self.codes]
+        # NUL never occurs in a search term, so a match cannot span both columns
+        self._haystacks: list[str] = [
+            f"{code}\0{description}".lower()
+            for code, description in zip(self.codes, self.descriptions)
+        ]
+
+        # Rows separated by NUL too, so a match never spans two rows
+        self._corpus = "\0".join(self._haystacks)
+        self._starts = array("I")
+        offset = 0
+        for haystack in self._haystacks:
+            self._starts.append(offset)
+            offset += len(haystack) + 1
+
+        postings: defaultdict[str, list[int]] = defaultdict(list)
+        for index, haystack in enumerate(self._haystacks):
+            for gram in set(map("".join, zip(haystack, haystack[1:], haystack[2:]))):
+                postings[gram].append(index)
+        self._postings: dict[str, array] = {
+            gram: array("I", posting) for gram, posting in postings.items()
+        }
+
+        # Padded text and trigram count of both columns, to score matches like similarity()
+        self._trigram_columns: list[tuple[list[str], array]] = []
+        if ranked:
+            for values in (self.codes, self.descriptions):
+                self._trigram_columns.append((
+                    [trigram_text(value) for value in values],
+                    array("I", [len(trigrams(value)) for value in values]),
+                ))
+
+        # Ascending order per sort field, with id as the tie-breaker like the SQL path
+        columns: dict[str, list[Any]] = {
+            "code": self.codes,
+            "description": self.descriptions,
+            "created_at": self.created_at,
+            "id": self.ids,
+        }
+        self._columns = columns
+        self._orders: dict[str, array] = {}
+        self._ranks: dict[str, array] = {}
+        for field, values in columns.items():
+            order = array("I", sorted(range(len(rows)), key=lambda i: (values[i], self.ids[i])))
+            rank = array("I", bytes(4 * len(order)))
+            for position, index in enumerate(order):
+                rank[index] = position
+            self._orders[field] = order
+            self._ranks[field] = rank
+
+        self._match_cache: OrderedDict[tuple[str, str, bool], array] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def find(self, code: str) -> int | None:
+        """Index of the row with exactly this code (case-insensitive), if any."""
+        key = code.upper()
+        index = bisect_left(self.code_keys, key)
+        if index < len(self.code_keys) and self.code_keys[index] == key:
+            return index
+        return None
+
+    def with_prefix(self, prefix: str) -> range:
+        """Indexes of the rows whose code starts with `prefix` (case-insensitive)."""
+        key = prefix.upper()
+        start = bisect_left(self.code_keys, key)
+        end = bisect_left(self.code_keys, key + "￿", lo=start)
+        return range(start, end)
+
+    def match(self, term: str) -> list[int]:
+        """Indexes of the rows whose code or description contains `term`, in code order."""
+        needle = term.lower()
+        if "\0" in needle:
+            return []
+        if len(needle) < NGRAM:
+            return self._scan(needle)
+
+        grams = {needle[i:i + NGRAM] for i in range(len(needle) - NGRAM + 1)}
+        lists = []
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if posting is None:
+                return []
+            lists.append(posting)
+        lists.sort(key=len)
+
+        candidates = set(lists[0])
+        for posting in lists[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                return []
+        haystacks = self._haystacks
+        return sorted(index for index in candidates if needle in haystacks[index])
+
+    def _scan(self, needle: str) -> list[int]:
+        corpus, starts = self._corpus, self._starts
+        last = len(starts) - 1
+        matches = []
+        position = corpus.find(needle)
+        while position != -1:
+            index = bisect_right(starts, position) - 1
+            matches.append(index)
+            if index == last:
+                break
+            # Continue from the next row: one hit per row is enough
+            position = corpus.find(needle, starts[index + 1])
+        return matches
+
+    def similarity(self, term: str, indexes: Sequence[int]) -> array:
+        """
+        `greatest(similarity(code, term), similarity(description, term))` of each row.
+
+        Scores are single precision like pg_trgm's, so ties break the same way.
+        """
+        grams = trigrams(term)
+        scores = array("f", bytes(4 * len(indexes)))
+        if not grams:
+            return scores
+        for position, index in enumerate(indexes):
+            best = 0.0
+            for texts, counts in self._trigram_columns:
+                if not counts[index]:
+                    continue
+                text = texts[index]
+                shared = sum(gram in text for gram in grams)
+                best = max(best, shared / (len(grams) + counts[index] - shared))
+            scores[position] = best
+        return scores
+
+    def sorted_matches(self, term: str, field: str, descending: bool = False) -> array:
+        """Matches for `term` in the order of the database search sorted by `field`."""
+        key = (term.lower(), field, descending)
+        cached = self._match_cache.get(key)
+        if cached is not None:
+            self._match_cache.move_to_end(key)
+            return cached
+
+        matches = self.match(term)
+        ranks = self._ranks[field]
+        if self.ranked:
+            # Best match first, then the requested sort
+            scores = dict(zip(matches, self.similarity(term, matches)))
+            sign = -1 if descending else 1
+            matches.sort(key=lambda index: (-scores[index], sign * ranks[index]))
+        else:
+            if field != "code":
+                # Rows are stored in code order already
+                matches.sort(key=ranks.__getitem__)
+            if descending:
+                matches.reverse()
+        result = array("I", matches)
+
+        self._match_cache[key] = result
+        if len(self._match_cache) > MATCH_CACHE_SIZE:
+            self._match_cache.popitem(last=False)
+        return result
+
+    def row(self, index: int) -> DiagnosisRead:
+        return DiagnosisRead.model_construct(
+            id=self.ids[index],
+            code=self.codes[index],
+            description=self.descriptions[index],
+            created_at=self.created_at[index],
+        )
+
+    def query(
+        self,
+        *,
+        pagination: PaginationParams,
+        sort: SortParams,
+        search: SearchParams,
+    ) -> QueryResult[DiagnosisRead]:
+        """Answer a diagnosis list request the way `QueryBuilder` would."""
+        field = sort.field if sort.field in SORT_FIELDS else "created_at"
+        descending = sort.direction == SortDirection.DESC
+        start, stop = pagination.skip, pagination.skip + pagination.limit
+
+        ranked = self.ranked and bool(search.search)
+        if search.search:
+            order, backwards = self.sorted_matches(search.search, field, descending), False
+        else:
+            order, backwards = self._orders[field], descending
+
+        total = len(order)
+        if backwards:
+            page = [order[total - 1 - i] for i in range(start, min(stop, total))]
+        else:
+            page = list(order[start:stop])
+
+        has_more = stop < total
+        next_cursor = None
+        if has_more and page and not ranked:
+            # Seekable by the database path, which serves cursor pages
+            last = page[-1]
+            next_cursor = encode_cursor(sort, self._columns[field][last], self.ids[last])
+
+        # Rows come from the database already validated
+        return QueryResult[DiagnosisRead].model_construct(
+            data=[self.row(index) for index in page],
+            count=None if pagination.count_mode == CountMode.NONE else total,
+            has_more=has_more,
+            next_cursor=next_cursor,
+        )
+
+
+class DiagnosisCatalog:
+    """
+    Per-worker diagnosis catalog cache.
+
+    The catalog is versioned by a Redis counter. Writers call `invalidate()`,
+    which bumps the counter and publishes the new version; every worker then
+    drops its snapshot (searches fall back to the database) and reloads in the
+    background.
+    """
+
+    def __init__(self) -> None:
+        self.snapshot: CatalogSnapshot | None = None
+        self._reload_task: asyncio.Task[None] | None = None
+        self._reload_pending = False
+        self._published_version: int | None = None
+
+    @property
+    def version(self) -> int | None:
+        return self.snapshot.version if self.snapshot is not None else None
+
+    async def current_version(self) -> int:
+        value = await redis_client.get(CATALOG_VERSION_KEY)
+        if value is None:
+            # Versions are also HTTP ETags: start from the clock rather than 0 so
+            # a lost counter never hands out a version clients have cached
+            await redis_client.set(CATALOG_VERSION_KEY, time.time_ns() // 1_000_000, nx=True)
+            value = await redis_client.get(CATALOG_VERSION_KEY)
+        return int(value)
+
+    async def load(self, session: AsyncSession | None = None) -> None:
+        """Load a fresh snapshot from the database."""
+        # Read the version first: a write racing with the load bumps it again
+        version = await self.current_version()
+        statement = select(Diagnosis.id, Diagnosis.code, Diagnosis.description, Diagnosis.created_at)
+        if session is not None:
+            rows = (await session.exec(statement)).all()
+            dialect_name = session.get_bind().dialect.name
+        else:
+            async with async_session_maker() as own_session:
+                rows = (await own_session.exec(statement)).all()
+                dialect_name = own_session.get_bind().dialect.name
+
+        # Rank searches only where the database path does
+        snapshot = await asyncio.to_thread(
+            CatalogSnapshot, rows, version, ranked=dialect_name == "postgresql"
+        )
+        self.snapshot = snapshot
+        logger.info("Loaded diagnosis catalog v%d (%d codes)", version, len(snapshot))
+
+    def schedule_reload(self) -> None:
+        """Drop the current snapshot and reload it in the background."""
+        self.snapshot = None
+        if self._reload_task is not None and not self._reload_task.done():
+            self._reload_pending = True
+            return
+        self._reload_task = asyncio.create_task(self._reload(), name="diagnosis-catalog-reload")
+
+    async def _reload(self) -> None:
+        while True:
+            self._reload_pending = False
+            try:
+                await self.load()
+            except Exception:
+                logger.exception("Failed to reload diagnosis catalog")
+            if not self._reload_pending:
+                return
+            self.snapshot = None
+
+    async def invalidate(self) -> None:
+        """Announce a catalog change to every worker, including this one."""
+        try:
+            await self.current_version()
+            version = await redis_client.incr(CATALOG_VERSION_KEY)
+            self._published_version = version
+            await pubsub.publish(CATALOG_CHANNEL, str(version))
+        except RedisError:
+            logger.exception("Failed to publish diagnosis catalog invalidation")
+        if self.snapshot is not None or self._reload_task is not None:
+            self.schedule_reload()
+
+    async def served_version(self, *, cursor: bool = False) -> int | None:
+        """
+        Version of the data a search answers right now, or None if unknown.
+
+        Snapshot searches answer with the snapshot's version, which may briefly
+        lag the published one; database searches with the current one.
+        """
+        if self.snapshot is not None and not cursor:
+            return self.snapshot.version
+        try:
+            return await self.current_version()
+        except RedisError:
+            logger.warning("Diagnosis catalog version unavailable, not caching")
+            return None
+
+    async def _on_message(self, message: str) -> None:
+        version = int(message)
+        if version == self._published_version:
+            # Our own invalidation, already reloading
+            return
+        if self.version != version:
+            self.schedule_reload()
+
+    async def _on_connect(self) -> None:
+        # Catch up on versions published while disconnected
+        if self.version != await self.current_version():
+            self.schedule_reload()
+
+    async def start(self) -> None:
+        if not settings.DIAGNOSIS_CATALOG_ENABLED:
+            return
+        pubsub.subscribe(CATALOG_CHANNEL, self._on_message)
+        pubsub.on_connect(self._on_connect)
+        try:
+            await self.load()
+        except Exception:
+            logger.exception("Diagnosis catalog unavailable, searching the database instead")
+
+    async def stop(self) -> None:
+        if self._reload_task is not None:
+            self._reload_task.cancel()
+        self.snapshot = None
+
+
+diagnosis_catalog = DiagnosisCatalog()
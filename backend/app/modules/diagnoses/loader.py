@@ -0,0 +1,288 @@
+import csv
+import re
+import xml.etree.ElementTree as ElementTree
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from pathlib import Path
+from typing import TextIO
+
+from sqlalchemy import func, text
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.modules.diagnoses.models import Diagnosis
+from app.modules.diagnoses.schemas import DiagnosisLoadResult
+
+RELEASE_FORMATS = ("order", "codes", "tab", "csv", "xml")
+
+CODE_MAX_LENGTH = 10
+DESCRIPTION_MAX_LENGTH = 255
+
+# Rows per COPY call: bounds memory while keeping round trips negligible
+COPY_BATCH_SIZE = 5000
+# Rows per lookup on the ORM path, below SQLite's bound parameter limit
+ORM_BATCH_SIZE = 500
+
+STAGING_TABLE = "diagnosis_staging"
+
+STAGING_SQL = f"""
+    CREATE TEMP TABLE {STAGING_TABLE} (
+        line bigserial, code text NOT NULL, description text NOT NULL
+    ) ON COMMIT DROP
+"""
+
+# The first occurrence of a code wins. xmax is 0 only for freshly inserted
+# rows, and rows whose description did not change are left untouched.
+# Insert-only merges keep every existing description.
+UPDATE_ON_CONFLICT = f"""
+    DO UPDATE SET description = EXCLUDED.description
+    WHERE {Diagnosis.__tablename__}.description IS DISTINCT FROM EXCLUDED.description
+"""
+MERGE_SQL = f"""
+    WITH merged AS (
+        INSERT INTO {Diagnosis.__tablename__} (id, code, description, created_at)
+        SELECT gen_random_uuid(), code, description, timezone('utc', now())
+        FROM (
+            SELECT DISTINCT ON (code) code, description FROM {STAGING_TABLE} ORDER BY code, line
+        ) AS staged
+        ON CONFLICT (code) {{on_conflict}}
+        RETURNING xmax = 0 AS inserted
+    )
+    SELECT
+        (SELECT count(DISTINCT code) FROM {STAGING_TABLE}) AS received,
+        count(*) FILTER (WHERE inserted) AS added,
+        count(*) FILTER (WHERE NOT inserted) AS changed
+    FROM merged
+"""
+
+RETIRED_SQL = f"""
+    SELECT count(*) FROM {Diagnosis.__tablename__} AS diagnosis
+    WHERE NOT EXISTS (SELECT 1 FROM {STAGING_TABLE} AS staged WHERE staged.code = diagnosis.code)
+"""
+
+# "00002 A000    1 Cholera due to ...  Cholera due to Vibrio cholerae 01, biovar cholerae"
+ORDER_LINE = re.compile(r"^\d{5} ")
+
+Record = tuple[str, str]
+
+
+class ReleaseFormatError(ValueError):
+    pass
+
+
+def normalize_code(code: str) -> str:
+    """Upper-case a code and restore the dot that release files omit (A000 -> A00.0)."""
+    code = code.strip().upper()
+    if len(code) > 3 and "." not in code:
+        code = f"{code[:3]}.{code[3:]}"
+    return code
+
+
+def detect_format(path: Path) -> str:
+    suffix = path.suffix.lower()
+    if suffix == ".xml":
+        return "xml"
+    if suffix == ".csv":
+        return "csv"
+    if suffix in (".tsv", ".tab"):
+        return "tab"
+
+    with path.open(encoding="utf-8") as file:
+        first_line = file.readline()
+    if "\t" in first_line:
+        return "tab"
+    if ORDER_LINE.match(first_line):
+        return "order"
+    return "codes"
+
+
+def read_release(path: Path, *, format: str | None = None, include_headers: bool = False) -> Iterator[Record]:
+    """
+    Stream (code, description) records from an ICD-10-CM release file.
+
+    Supported formats are the CMS order file (`icd10cm_order_YYYY.txt`), the
+    codes file (`icd10cm_codes_YYYY.txt`), tab- or comma-separated
+    `code, description` files and the tabular XML. Header (non-billable)
+    codes are skipped unless `include_headers` is set; the codes file only
+    lists billable codes. Files are read line by line, so memory stays flat
+    whatever the release size.
+    """
+    format = format or detect_format(path)
+    if format not in RELEASE_FORMATS:
+        raise ReleaseFormatError(f"Unknown release format: {format}")
+
+    if format == "xml":
+        yield from _validated(_read_xml(path, include_headers))
+        return
+
+    with path.open(encoding="utf-8", newline="") as file:
+        if format == "order":
+            records = _read_order(file, include_headers)
+        elif format == "codes":
+            records = _read_codes(file)
+        else:
+            records = _read_delimited(file, "\t" if format == "tab" else ",")
+        yield from _validated(records)
+
+
+def _validated(records: Iterable[Record]) -> Iterator[Record]:
+    for code, description in records:
+        code = normalize_code(code)
+        if not code or not description:
+            raise ReleaseFormatError(f"Missing code or description: {code!r}")
+        if len(code) > CODE_MAX_LENGTH:
+            raise ReleaseFormatError(f"Code too long: {code!r}")
+        if len(description) > DESCRIPTION_MAX_LENGTH:
+            raise ReleaseFormatError(f"Description too long for {code}")
+        yield code, description
+
+
+def _read_order(file: TextIO, include_headers: bool) -> Iterator[Record]:
+    for line in file:
+        if not line.strip():
+            continue
+        if not ORDER_LINE.match(line):
+            raise ReleaseFormatError(f"Not an order file line: {line[:40]!r}")
+        code, billable = line[6:13], line[14]
+        if billable != "1" and not include_headers:
+            continue
+        short_description, long_description = line[16:76].strip(), line[77:].strip()
+        # Long descriptions may exceed the column; the 60 character short form always fits
+        if len(long_description) > DESCRIPTION_MAX_LENGTH:
+            yield code, short_description
+        else:
+            yield code, long_description or short_description
+
+
+def _read_codes(file: TextIO) -> Iterator[Record]:
+    for line in file:
+        code, _, description = line.strip().partition(" ")
+        if code:
+            yield code, description.strip()
+
+
+def _read_delimited(file: TextIO, delimiter: str) -> Iterator[Record]:
+    reader = csv.reader(file, delimiter=delimiter)
+    code_index, description_index = 0, 1
+    for row in reader:
+        if not row or not any(row):
+            continue
+        if reader.line_num == 1:
+            header = [cell.strip().lower() for cell in row]
+            if "code" in header:
+                code_index = header.index("code")
+                description_index = next(
+                    (header.index(name) for name in ("long_description", "description", "desc") if name in header),
+                    1 - code_index,
+                )
+                continue
+        if len(row) <= max(code_index, description_index):
+            raise ReleaseFormatError(f"Expected code and description on line {reader.line_num}")
+        yield row[code_index], row[description_index].strip()
+
+
+def _read_xml(path: Path, include_headers: bool) -> Iterator[Record]:
+    # Children are yielded before their parent; processed elements are cleared
+    # as the parse goes so only the current chapter's skeleton stays in memory
+    for _, element in ElementTree.iterparse(path, events=("end",)):
+        if element.tag == "diag":
+            is_header = element.find("diag") is not None
+            if include_headers or not is_header:
+                yield element.findtext("name", ""), " ".join(element.findtext("desc", "").split())
+            element.clear()
+        elif element.tag == "chapter":
+            element.clear()
+
+
+def batched(records: Iterable[Record], size: int) -> Iterator[list[Record]]:
+    iterator = iter(records)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+async def merge_diagnoses(
+    *,
+    session: AsyncSession,
+    records: Iterable[Record],
+    full_release: bool = False,
+    update: bool = True,
+) -> DiagnosisLoadResult:
+    """
+    Insert new codes and update changed descriptions in the current transaction.
+
+    With `update=False` existing codes are left as they are. When `records`
+    is a full release, codes missing from it are reported as retired. They
+    are kept: consultations may still reference them.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        return await _merge_postgres(session, records, full_release, update)
+    return await _merge_orm(session, records, full_release, update)
+
+
+async def _merge_postgres(
+    session: AsyncSession, records: Iterable[Record], full_release: bool, update: bool
+) -> DiagnosisLoadResult:
+    # Created through SQLAlchemy so it lives in the session's transaction
+    await session.execute(text(STAGING_SQL))  # type: ignore[deprecated]
+
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    driver_connection = raw_connection.driver_connection
+    for batch in batched(records, COPY_BATCH_SIZE):
+        await driver_connection.copy_records_to_table(
+            STAGING_TABLE, records=batch, columns=("code", "description")
+        )
+
+    merge = MERGE_SQL.format(on_conflict=UPDATE_ON_CONFLICT if update else "DO NOTHING")
+    counts = (await session.execute(text(merge))).one()  # type: ignore[deprecated]
+    retired = None
+    if full_release:
+        retired = (await session.execute(text(RETIRED_SQL))).scalar_one()  # type: ignore[deprecated]
+
+    return DiagnosisLoadResult(
+        received=counts.received,
+        added=counts.added,
+        changed=counts.changed,
+        unchanged=counts.received - counts.added - counts.changed,
+        retired=retired,
+    )
+
+
+async def _merge_orm(
+    session: AsyncSession, records: Iterable[Record], full_release: bool, update: bool
+) -> DiagnosisLoadResult:
+    # Portable fallback (SQLite in tests and local development)
+    seen: set[str] = set()
+    added = changed = 0
+    for batch in batched(records, ORM_BATCH_SIZE):
+        staged: dict[str, str] = {}
+        for code, description in batch:
+            if code not in seen:
+                staged.setdefault(code, description)
+        existing = {
+            diagnosis.code: diagnosis
+            for diagnosis in (await session.exec(select(Diagnosis).where(Diagnosis.code.in_(staged)))).all()  # type: ignore[attr-defined]
+        }
+        for code, description in staged.items():
+            diagnosis = existing.get(code)
+            if diagnosis is None:
+                session.add(Diagnosis(code=code, description=description))
+                added += 1
+            elif update and diagnosis.description != description:
+                diagnosis.description = description
+                changed += 1
+        seen.update(staged)
+        await session.flush()
+
+    retired = None
+    if full_release:
+        total = (await session.exec(select(func.count()).select_from(Diagnosis))).one()
+        retired = total - len(seen)
+
+    return DiagnosisLoadResult(
+        received=len(seen),
+        added=added,
+        changed=changed,
+        unchanged=len(seen) - added - changed,
+        retired=retired,
+    )
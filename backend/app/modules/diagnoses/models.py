@@ -1,6 +1,7 @@
 import uuid
 from datetime import datetime, UTC
 from typing import Optional, List, TYPE_CHECKING
+from sqlalchemy import Index, text
 from sqlmodel import Field, SQLModel
 
 class DiagnosisBase(SQLModel):
@@ -8,5 +9,16 @@ class DiagnosisBase(SQLModel):
     description: str = Field(max_length=255)
 
 class Diagnosis(DiagnosisBase, table=True):
+    __table_args__ = (
+        # Trigram indexes serving the ILIKE '%term%' diagnosis search
+        Index("ix_diagnosis_code_trgm", "code", postgresql_using="gin", postgresql_ops={"code": "gin_trgm_ops"}),
+        Index("ix_diagnosis_description_trgm", "description", postgresql_using="gin", postgresql_ops={"description": "gin_trgm_ops"}),
+        # Default sort, with the id tie-breaker used by keyset pages
+        Index("ix_diagnosis_created_at", "created_at", "id"),
+        # Code and description sorts compare in codepoint order on PostgreSQL
+        Index("ix_diagnosis_code_c", text('code COLLATE "C"'), "id").ddl_if(dialect="postgresql"),
+        Index("ix_diagnosis_description_c", text('description COLLATE "C"'), "id").ddl_if(dialect="postgresql"),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     created_at: datetime = Field(default_factory=lambda: datetime.now(UTC).replace(tzinfo=None))
@@ -1,14 +1,22 @@
 from fastapi import APIRouter, Query, Depends, Request
-from app.core.database import AsyncSessionDep
+from app.core.config import settings
+from app.core.database import AsyncSessionDep, ReadOnlySessionDep
+from app.core.http_cache import cache_headers, etag_matches, make_etag, not_modified
 from app.modules.diagnoses import service
-from app.modules.diagnoses.schemas import DiagnosisRead
+from app.modules.diagnoses.schemas import DiagnosisRead, DiagnosisBulkUpsert, DiagnosisLoadResult
 from app.core.schemas import PaginationParams, SortParams, SearchParams
 from app.core.query_builder import QueryResult
+from app.core.responses import QueryResultResponse
 from app.core.rate_limiter import limiter
-from app.modules.user.dependencies import get_current_active_user
+from app.modules.user.dependencies import get_current_active_user, get_current_admin_user
 
 router = APIRouter(prefix="/diagnosis", tags=["diagnosis"])
 
+# Search results are the same for every user: shared caches may keep them briefly
+CATALOG_CACHE_CONTROL = (
+    f"public, max-age={settings.DIAGNOSIS_CACHE_MAX_AGE}, s-maxage={settings.DIAGNOSIS_CACHE_SHARED_MAX_AGE}"
+)
+
 @router.get("/", 
     dependencies=[Depends(get_current_active_user)],
     response_model=QueryResult[DiagnosisRead]
@@ -16,17 +24,58 @@ router = APIRouter(prefix="/diagnosis", tags=["diagnosis"])
 @limiter.limit("60/minute")
 async def search_diagnoses(
     request: Request,
-    session: AsyncSessionDep,
+    session: ReadOnlySessionDep,
     pagination: PaginationParams = Depends(),
     sort: SortParams = Depends(),
     search: SearchParams = Depends(),
 ):
     """
     Search for diagnosis codes by code.
+
+    Responses carry an ETag derived from the catalog version and the query,
+    and `If-None-Match` is answered with 304 without querying the database.
     """
-    return await service.get_diagnoses(
+    version = await service.get_catalog_version(pagination=pagination)
+    headers = None
+    if version is not None:
+        etag = make_etag(
+            version,
+            search.search or None,
+            sort.field,
+            sort.direction.value,
+            pagination.skip,
+            pagination.limit,
+            pagination.cursor,
+            pagination.count_mode.value,
+        )
+        if etag_matches(request, etag):
+            return not_modified(etag, CATALOG_CACHE_CONTROL)
+        headers = cache_headers(etag, CATALOG_CACHE_CONTROL)
+
+    result = await service.get_diagnoses(
         session=session, 
         search=search, 
         pagination=pagination, 
         sort=sort
     )
+    return QueryResultResponse(result, DiagnosisRead, headers=headers)
+
+@router.post("/bulk",
+    dependencies=[Depends(get_current_admin_user)],
+    response_model=DiagnosisLoadResult
+)
+@limiter.limit("10/minute")
+async def bulk_upsert_diagnoses(
+    request: Request,
+    session: AsyncSessionDep,
+    body: DiagnosisBulkUpsert,
+):
+    """
+    Insert new diagnosis codes and update the descriptions of existing ones.
+
+    Requires: admin role
+    """
+    return await service.upsert_diagnoses(
+        session=session,
+        records=((diagnosis.code, diagnosis.description) for diagnosis in body.diagnoses),
+    )
@@ -1,5 +1,7 @@
 import uuid
 from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel, Field
 from app.modules.diagnoses.models import DiagnosisBase
 
 class DiagnosisCreate(DiagnosisBase):
@@ -8,3 +10,17 @@ class DiagnosisCreate(DiagnosisBase):
 class DiagnosisRead(DiagnosisBase):
     id: uuid.UUID
     created_at: datetime
+
+# Larger loads go through scripts/load_icd10cm.py
+BULK_UPSERT_MAX_ITEMS = 10000
+
+class DiagnosisBulkUpsert(BaseModel):
+    diagnoses: List[DiagnosisCreate] = Field(min_length=1, max_length=BULK_UPSERT_MAX_ITEMS)
+
+class DiagnosisLoadResult(BaseModel):
+    received: int
+    added: int
+    changed: int
+    unchanged: int
+    # Only reported for full releases: existing codes missing from the release
+    retired: Optional[int] = None
@@ -1,9 +1,11 @@
-from typing import List, Sequence, Optional
+from typing import Iterable, List, Sequence, Optional
 from sqlalchemy import or_
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from app.modules.diagnoses.models import Diagnosis
-from app.modules.diagnoses.schemas import DiagnosisCreate
+from app.modules.diagnoses.schemas import DiagnosisCreate, DiagnosisRead, DiagnosisLoadResult
+from app.modules.diagnoses.loader import merge_diagnoses
+from app.modules.diagnoses.catalog import diagnosis_catalog
 from app.modules.diagnoses.exceptions import DiagnosisAlreadyExistsException, DiagnosisNotFoundException
 from app.core.schemas import PaginationParams, SortParams, SearchParams
 from app.core.query_builder import QueryBuilder, QueryResult
@@ -13,11 +15,24 @@ async def get_diagnoses(*,
     pagination: PaginationParams, 
     sort: SortParams,
     search: SearchParams
-) -> QueryResult[Diagnosis]:
+) -> QueryResult[Diagnosis] | QueryResult[DiagnosisRead]:
+    # Served from the in-memory catalog unless it is (re)loading or a cursor is requested
+    snapshot = diagnosis_catalog.snapshot
+    if snapshot is not None and not pagination.cursor:
+        return snapshot.query(pagination=pagination, sort=sort, search=search)
+
+    # Compared like the snapshot, whose cursors this path resolves: literal
+    # terms, and codepoint order (SQLite's default, "C" on PostgreSQL)
+    collation = "C" if session.get_bind().dialect.name == "postgresql" else None
     query = QueryBuilder(Diagnosis, session)
-    query.paginate(pagination).sort(sort).search(search, [Diagnosis.code, Diagnosis.description])
+    query.paginate(pagination).sort(sort, collation=collation)
+    query.search(search, [Diagnosis.code, Diagnosis.description], literal=True)
     return await query.execute()
 
+async def get_catalog_version(*, pagination: PaginationParams) -> Optional[int]:
+    """Version of the diagnosis data `get_diagnoses` answers from, None if unknown."""
+    return await diagnosis_catalog.served_version(cursor=bool(pagination.cursor))
+
 async def get_diagnosis_by_code(*, session: AsyncSession, code: str) -> Optional[Diagnosis]:
     statement = select(Diagnosis).where(Diagnosis.code == code)
     result = await session.exec(statement)
@@ -33,4 +48,24 @@ async def create_diagnosis(*, session: AsyncSession, diagnosis: DiagnosisCreate)
     session.add(db_diagnosis)
     await session.commit()
     await session.refresh(db_diagnosis)
+
+    await diagnosis_catalog.invalidate()
     return db_diagnosis
+
+async def upsert_diagnoses(*,
+    session: AsyncSession,
+    records: Iterable[tuple[str, str]],
+    full_release: bool = False,
+    update: bool = True
+) -> DiagnosisLoadResult:
+    """
+    Insert or update (code, description) records in one transaction.
+
+    With `update=False` only new codes are inserted.
+    """
+    result = await merge_diagnoses(session=session, records=records, full_release=full_release, update=update)
+    await session.commit()
+
+    if result.added or result.changed:
+        await diagnosis_catalog.invalidate()
+    return result
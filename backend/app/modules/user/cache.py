@@ -0,0 +1,65 @@
+import logging
+
+from redis.exceptions import RedisError
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.pubsub import pubsub
+from app.modules.user.schemas import UserRead
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_CHANNEL = "user:principal"
+
+
+class PrincipalCache:
+    """
+    Per-worker cache of authenticated users, keyed by the token subject (email).
+
+    Saves the user lookup on every authenticated request. Entries expire
+    after PRINCIPAL_CACHE_TTL_SECONDS; changes to a user are announced over
+    pub/sub so every worker evicts the entry immediately. If the pub/sub
+    connection drops, the whole cache is cleared once it is re-established.
+    """
+
+    def __init__(self) -> None:
+        self._cache: TTLCache[str, UserRead] = TTLCache(
+            maxsize=settings.PRINCIPAL_CACHE_MAX_SIZE,
+            ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+        )
+
+    @property
+    def epoch(self) -> int:
+        return self._cache.epoch
+
+    def get(self, subject: str) -> UserRead | None:
+        return self._cache.get(subject)
+
+    def set(self, subject: str, user: UserRead, epoch: int) -> None:
+        self._cache.set(subject, user, epoch)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    async def invalidate(self, *subjects: str) -> None:
+        """Evict users on this worker and announce it to the others."""
+        for subject in subjects:
+            self._cache.invalidate(subject)
+            try:
+                await pubsub.publish(PRINCIPAL_CHANNEL, subject)
+            except RedisError:
+                logger.exception("Failed to publish principal invalidation for %s", subject)
+
+    def _on_message(self, subject: str) -> None:
+        self._cache.invalidate(subject)
+
+    async def _on_connect(self) -> None:
+        # Invalidations published while disconnected were missed
+        self._cache.clear()
+
+    def start(self) -> None:
+        pubsub.subscribe(PRINCIPAL_CHANNEL, self._on_message)
+        pubsub.on_connect(self._on_connect)
+
+
+principal_cache = PrincipalCache()
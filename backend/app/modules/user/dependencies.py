@@ -1,7 +1,7 @@
 from typing import Annotated
 
 import jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
 from pydantic import ValidationError
@@ -9,50 +9,68 @@ from sqlmodel import select
 
 from app.core.config import settings
 from app.core.database import AsyncSessionDep
-from app.core.security import ALGORITHM, is_token_blacklisted
+from app.core.security import ALGORITHM, TOKEN_PAYLOAD_STATE, is_token_blacklisted
 from app.modules.user.models import User, Role
+from app.modules.user.schemas import UserRead
+from app.modules.user.cache import principal_cache
 from app.modules.user.exceptions import InactiveUserException
 from app.modules.auth.exceptions import CredentialException, UnauthorizedException
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 async def get_current_user(
+    request: Request,
     token: Annotated[str, Depends(oauth2_scheme)],
+    # The primary, never a replica: a lagging replica could put a deactivated
+    # or demoted user back in the principal cache right after its eviction
     db: AsyncSessionDep,
-) -> User:
-    try:
-        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[ALGORITHM])
-        username: str | None = payload.get("sub")
-        if username is None:
+) -> UserRead:
+    # Already verified by the rate limiter on limited routes
+    verified = getattr(request.state, TOKEN_PAYLOAD_STATE, None)
+    if verified is not None and verified[0] == token:
+        payload = verified[1]
+    else:
+        try:
+            payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[ALGORITHM])
+        except InvalidTokenError:
             raise CredentialException()
-    except InvalidTokenError:
-        raise CredentialException()
-    except ValidationError:
+        except ValidationError:
+            raise CredentialException()
+    username: str | None = payload.get("sub")
+    if username is None:
         raise CredentialException()
         
-    if is_token_blacklisted(token):
+    if await is_token_blacklisted(token, payload):
         raise CredentialException()
-        
+
+    user = principal_cache.get(username)
+    if user is not None:
+        return user
+
+    epoch = principal_cache.epoch
     result = await db.execute(select(User).where(User.email == username))  # type: ignore[deprecated]
-    user = result.scalar_one_or_none()
+    db_user = result.scalar_one_or_none()
     
-    if user is None:
+    if db_user is None:
         raise CredentialException()
+
+    user = UserRead.model_validate(db_user)
+    principal_cache.set(username, user, epoch)
     return user
 
 async def get_current_active_user(
-    current_user: Annotated[User, Depends(get_current_user)],
-) -> User:
+    current_user: Annotated[UserRead, Depends(get_current_user)],
+) -> UserRead:
     if not current_user.is_active:
        raise InactiveUserException()
     return current_user
 
 async def get_current_admin_user(
-    current_user: Annotated[User, Depends(get_current_active_user)],
-) -> User:
+    current_user: Annotated[UserRead, Depends(get_current_active_user)],
+) -> UserRead:
     if current_user.role != Role.ADMIN:
         raise UnauthorizedException()
     return current_user
 
-CurrentActiveUserDep = Annotated[User, Depends(get_current_active_user)]
-CurrentAdminUserDep = Annotated[User, Depends(get_current_admin_user)]
\ No newline at end of file
+CurrentActiveUserDep = Annotated[UserRead, Depends(get_current_active_user)]
+CurrentAdminUserDep = Annotated[UserRead, Depends(get_current_admin_user)]
\ No newline at end of file
@@ -1,5 +1,7 @@
 import uuid
+from datetime import datetime, UTC
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 from pydantic import EmailStr
 from enum import Enum
@@ -15,5 +17,16 @@ class UserBase(SQLModel):
     is_active: bool = True
 
 class User(UserBase, table=True):
+    __table_args__ = (
+        # Trigram indexes serving the ILIKE '%term%' search on the user list
+        Index("ix_user_full_name_trgm", "full_name", postgresql_using="gin", postgresql_ops={"full_name": "gin_trgm_ops"}),
+        Index("ix_user_email_trgm", "email", postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"}),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     hashed_password: str
+    # Row version for HTTP caching, bumped by every update
+    updated_at: datetime = Field(
+        default_factory=lambda: datetime.now(UTC).replace(tzinfo=None),
+        sa_column_kwargs={"onupdate": lambda: datetime.now(UTC).replace(tzinfo=None)},
+    )
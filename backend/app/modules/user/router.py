@@ -2,15 +2,17 @@ from fastapi.requests import Request
 import uuid
 from typing import Any, Sequence, Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from app.modules.user.models import User
 from app.modules.user.schemas import UserRead, UserCreate
 from app.modules.user import service as user_service
 from app.modules.user.dependencies import get_current_admin_user, get_current_active_user
-from app.core.database import AsyncSessionDep
+from app.core.database import AsyncSessionDep, ReadOnlySessionDep
+from app.core.http_cache import PRIVATE_CACHE_CONTROL, cache_headers, etag_matches, make_etag, not_modified
 from app.core.rate_limiter import limiter
 from app.core.schemas import PaginationParams, SortParams, SearchParams
 from app.core.query_builder import QueryResult
+from app.core.responses import QueryResultResponse
 
 router = APIRouter(
     prefix="/users",
@@ -22,11 +24,19 @@ router = APIRouter(
 @limiter.limit("60/minute")
 async def read_user_me(
     request: Request,
-    current_user: Annotated[User, Depends(get_current_active_user)],
-) -> User:
+    response: Response,
+    current_user: Annotated[UserRead, Depends(get_current_active_user)],
+) -> Any:
     """
     Get current user.
+
+    The ETag comes from the cached principal, so a matching `If-None-Match`
+    is answered with 304 without a database lookup.
     """
+    etag = make_etag(current_user.id, current_user.updated_at)
+    if etag_matches(request, etag):
+        return not_modified(etag, PRIVATE_CACHE_CONTROL)
+    response.headers.update(cache_headers(etag, PRIVATE_CACHE_CONTROL))
     return current_user
 
 
@@ -38,22 +48,23 @@ async def read_user_me(
 @limiter.limit("60/minute")
 async def read_users(
     request: Request,
-    session: AsyncSessionDep,
+    session: ReadOnlySessionDep,
     pagination: PaginationParams = Depends(),
     sort: SortParams = Depends(),
     search: SearchParams = Depends(),
-) -> QueryResult[User]:
+) -> QueryResultResponse:
     """
     Retrieve users.
 
     Requires: admin role
     """
-    return await user_service.get_all_users(
+    result = await user_service.get_all_users(
         session=session,
         pagination=pagination,
         sort=sort,
         search=search,
     )
+    return QueryResultResponse(result, UserRead)
 
 
 @router.post(
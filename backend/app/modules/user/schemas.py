@@ -3,12 +3,14 @@ from typing import Optional
 from sqlmodel import SQLModel
 from pydantic import EmailStr
 import uuid
+from datetime import datetime
 
 class UserCreate(UserBase):
     password: str
 
 class UserRead(UserBase):
     id: uuid.UUID
+    updated_at: datetime
 
 class UserUpdate(SQLModel):
     email: Optional[EmailStr] = None
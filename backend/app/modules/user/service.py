@@ -1,8 +1,7 @@
-from limits.typing import Any
-from typing import Sequence
+from typing import Any, Sequence
 import uuid
 
-from app.core.security import get_password_hash
+from app.core.security import password_hasher
 from pydantic import EmailStr
 from app.modules.user.models import User
 from app.modules.user.schemas import UserCreate, UserUpdate
@@ -13,6 +12,7 @@ from app.core.schemas import SortDirection
 from app.core.query_builder import QueryBuilder, QueryResult
 from app.core.schemas import PaginationParams, SortParams, SearchParams
 from app.modules.user.models import Role
+from app.modules.user.cache import principal_cache
 
 async def get_user_by_id(*, session: AsyncSession, user_id: uuid.UUID) -> User | None:
     statement = select(User).where(User.id == user_id)
@@ -45,7 +45,7 @@ async def create_user(*, session: AsyncSession, user_create: UserCreate) -> User
         raise UserAlreadyExistsException()
 
     db_obj = User.model_validate(
-        user_create, update={"hashed_password": get_password_hash(user_create.password)}
+        user_create, update={"hashed_password": await password_hasher.hash(user_create.password)}
     )
     session.add(db_obj)
     await session.commit()
@@ -56,10 +56,14 @@ async def update_user(*, session: AsyncSession, db_user: User, user_in: UserUpda
     user_data = user_in.model_dump(exclude_unset=True)
     if "password" in user_data:
         del user_data["password"]
+    previous_email = db_user.email
     db_user.sqlmodel_update(user_data)
     session.add(db_user)
     await session.commit()
     await session.refresh(db_user)
+
+    # Role and active flag are checked from the cached principal on every request
+    await principal_cache.invalidate(*{previous_email, db_user.email})
     return db_user
 
 
@@ -0,0 +1,39 @@
+"""
+Rebuild the analytics rollups from the consultations.
+
+    python scripts/backfill_analytics.py
+    python scripts/backfill_analytics.py --from 2026-01-01 --to 2026-01-31
+
+The rollups are kept up to date as consultations are written; run this
+after loading consultations by other means (SQL, restores) or to repair
+a range of days. Without a range every day is rebuilt. Days are rebuilt a
+week per transaction, so consultations can still be written meanwhile.
+"""
+import argparse
+import asyncio
+import time
+from datetime import date
+
+from app.core.database import async_session_maker, engine
+from app.modules.analytics.service import rebuild_rollups
+
+async def backfill(date_from: date | None, date_to: date | None):
+    start = time.perf_counter()
+    try:
+        async with async_session_maker() as session:
+            result = await rebuild_rollups(session=session, date_from=date_from, date_to=date_to)
+    finally:
+        await engine.dispose()
+
+    print(
+        f"Rebuilt {result.consultation_days} doctor-days and {result.diagnosis_days} "
+        f"diagnosis-days in {time.perf_counter() - start:.1f}s"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the analytics rollups.")
+    parser.add_argument("--from", dest="date_from", type=date.fromisoformat, help="first day to rebuild (ISO date)")
+    parser.add_argument("--to", dest="date_to", type=date.fromisoformat, help="last day to rebuild (ISO date)")
+    args = parser.parse_args()
+
+    asyncio.run(backfill(args.date_from, args.date_to))
@@ -0,0 +1,83 @@
+"""
+Compare the per-row cost of serializing a consultation list page.
+
+    python scripts/bench_serialization.py --rows 1000 --repeat 20
+
+"fastapi" is the default response path (response_model validation,
+dump to Python, stdlib json); "fast" is QueryResultResponse. Rows are
+in-memory ORM objects with a doctor and three diagnoses each, so only
+serialization is measured.
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.core.query_builder import QueryResult
+from app.core.responses import QueryResultResponse
+from app.modules.consultation.models import Consultation
+from app.modules.consultation.schemas import ConsultationList
+from app.modules.diagnoses.models import Diagnosis
+from app.modules.user.models import User, Role
+
+def build_page(rows: int) -> QueryResult[Any]:
+    start = datetime(2026, 1, 1)
+    doctor = User(id=uuid.uuid4(), email="doctor@example.com", full_name="Dr. Example", role=Role.DOCTOR, hashed_password="x")
+    diagnoses = [
+        Diagnosis(id=uuid.uuid4(), code=f"A0{i}.0", description=f"Diagnosis {i}", created_at=start)
+        for i in range(3)
+    ]
+    data = [
+        Consultation(
+            id=uuid.uuid4(),
+            patient_full_name=f"Patient {i}",
+            doctor_id=doctor.id,
+            consultation_date=start + timedelta(minutes=i),
+            notes="Follow-up in two weeks",
+            created_at=start,
+            doctor=doctor,
+            diagnoses=diagnoses,
+        )
+        for i in range(rows)
+    ]
+    return QueryResult[Any](data=data, count=rows, has_more=False)
+
+async def fastapi_default(field: Any, page: QueryResult[Any]) -> bytes:
+    content = await serialize_response(field=field, response_content=page)
+    return JSONResponse(content).body
+
+def fast(page: QueryResult[Any]) -> bytes:
+    return QueryResultResponse(page, ConsultationList).body
+
+async def main(rows: int, repeat: int):
+    page = build_page(rows)
+    field = create_model_field("response", QueryResult[ConsultationList], mode="serialization")
+    assert json.loads(await fastapi_default(field, page)) == json.loads(fast(page))
+
+    timings = {}
+    for name in ("fastapi", "fast"):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            if name == "fastapi":
+                await fastapi_default(field, page)
+            else:
+                fast(page)
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best
+        print(f"{name:>8}: {best * 1000:8.2f} ms/page  {best / rows * 1e6:6.2f} us/row")
+    print(f" speedup: {timings['fastapi'] / timings['fast']:.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark list response serialization.")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
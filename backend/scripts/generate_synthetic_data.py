@@ -0,0 +1,333 @@
+"""
+Generate production-like consultation volume for scale testing (PostgreSQL only).
+
+    python scripts/generate_synthetic_data.py --doctors 200 --consultations 5000000 --years 10
+    python scripts/generate_synthetic_data.py --consultations 100000 --seed 7 --replace
+    python scripts/generate_synthetic_data.py --consultations 5000000 --defer-indexes
+
+Diagnoses are drawn from the existing catalog, so load it first
+(scripts/load_icd10cm.py for a full release, scripts/seed_icd10.py for a
+small one). Doctors are created as doctorNNNN@synthetic.example.com with
+the given password, or reused when they exist.
+
+The data is a function of the arguments and the catalog only: the same seed
+gives the same rows, ids included, so benchmarks on regenerated databases
+are comparable. Its shape follows a typical outpatient clinic:
+
+- doctor workloads are log-normal, a few doctors see several times the median;
+- volume grows every year and falls on weekdays during office hours;
+- patients come back, a minority of them often;
+- consultations have 1-6 diagnoses, mostly one or two, and diagnosis
+  popularity follows a Zipf law over the catalog (in a seed-shuffled order).
+
+Rows are written in chronological order with COPY, one commit per batch,
+and the analytics rollups are rebuilt at the end. With --defer-indexes the consultation indexes are dropped during the load
+and rebuilt at the end, which is much faster for large volumes but leaves
+the lists unindexed meanwhile.
+"""
+import argparse
+import asyncio
+import bisect
+import itertools
+import random
+import time
+import uuid
+from collections.abc import Iterator
+from datetime import datetime, timedelta, UTC
+from typing import Any
+
+from sqlalchemy import delete, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.database import async_session_maker, engine
+from app.core.security import get_password_hash
+from app.modules.analytics.models import ConsultationDailyCount, DiagnosisDailyCount
+from app.modules.analytics.service import rebuild_rollups
+from app.modules.consultation.importer import CONSULTATION_COLUMNS, LINK_COLUMNS
+from app.modules.consultation.models import Consultation, ConsultationDiagnosis
+from app.modules.diagnoses.models import Diagnosis
+from app.modules.user.models import Role, User
+
+DOCTOR_EMAIL = "doctor{:04d}@synthetic.example.com"
+
+FIRST_NAMES = (
+    "James", "Mary", "Ahmad", "Siti", "Wei", "Mei Ling", "Rajesh", "Priya", "John", "Aisha",
+    "Michael", "Nur", "David", "Fatimah", "Daniel", "Lakshmi", "Chen", "Sarah", "Muhammad", "Grace",
+    "Kumar", "Hui Min", "Robert", "Linda", "Hassan", "Anita", "Thomas", "Emily", "Ismail", "Jia Hui",
+)
+LAST_NAMES = (
+    "Tan", "Lim", "Lee", "Wong", "Ng", "Abdullah", "Rahman", "Ismail", "Kumar", "Singh",
+    "Smith", "Johnson", "Brown", "Garcia", "Nair", "Pillai", "Chong", "Yusof", "Hamid", "Goh",
+    "Teo", "Ong", "Chua", "Ali", "Ibrahim", "Williams", "Taylor", "Martin", "Menon", "Raj",
+)
+NOTES = (
+    "",
+    "",
+    "",
+    "Follow-up in two weeks.",
+    "Symptoms improving, continue current medication.",
+    "Referred to specialist for further evaluation.",
+    "Blood tests ordered, review results at next visit.",
+    "Advised rest and fluids. Return if fever persists beyond three days.",
+    "Medication dosage adjusted. Monitor blood pressure at home.",
+    "Patient reports mild side effects, switched to an alternative.",
+    "Annual review, no changes to the care plan.",
+    "Wound healing well, dressing changed.",
+)
+# Share of consultations with 1, 2, ... 6 diagnoses
+DIAGNOSIS_COUNT_WEIGHTS = (40, 28, 15, 9, 5, 3)
+# Zipf exponent of diagnosis popularity
+DIAGNOSIS_SKEW = 1.1
+# Sigma of the log-normal doctor workload
+DOCTOR_SKEW = 0.6
+# Patients per consultation: each patient comes back four times on average
+PATIENTS_PER_CONSULTATION = 0.25
+OFFICE_HOURS = (8, 18)
+
+
+def _uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def _cumulative(weights: list[float]) -> list[float]:
+    return list(itertools.accumulate(weights))
+
+
+def patient_name(index: int) -> str:
+    first = FIRST_NAMES[index % len(FIRST_NAMES)]
+    last = LAST_NAMES[(index // len(FIRST_NAMES)) % len(LAST_NAMES)]
+    # Keeps names distinct across the pool while reading like real ones
+    generation = index // (len(FIRST_NAMES) * len(LAST_NAMES))
+    return f"{first} {last}" if generation == 0 else f"{first} {last} {generation + 1}"
+
+
+def daily_volumes(rng: random.Random, total: int, start: datetime, end: datetime, growth: float) -> Iterator[tuple[datetime, int]]:
+    """Split `total` consultations over the weekdays in [start, end), growing by `growth` a year."""
+    days = [
+        start + timedelta(days=offset)
+        for offset in range((end - start).days)
+        if (start + timedelta(days=offset)).weekday() < 5
+    ]
+    if not days:
+        raise ValueError("No weekdays in the requested period")
+    weights = [(1 + growth) ** ((day - start).days / 365.25) for day in days]
+    scale = total / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    for index in rng.choices(range(len(days)), weights=weights, k=total - sum(counts)):
+        counts[index] += 1
+    return zip(days, counts)
+
+
+class SyntheticConsultations:
+    """
+    Deterministic stream of consultation and diagnosis link rows.
+
+    Rows are tuples in CONSULTATION_COLUMNS and LINK_COLUMNS order, ready for
+    COPY, produced day by day in chronological order.
+    """
+
+    def __init__(
+        self,
+        *,
+        seed: int,
+        doctor_ids: list[uuid.UUID],
+        diagnosis_ids: list[uuid.UUID],  # in a stable order, e.g. by code
+        consultations: int,
+        start: datetime,
+        end: datetime,
+        growth: float,
+    ) -> None:
+        if len(diagnosis_ids) < len(DIAGNOSIS_COUNT_WEIGHTS):
+            raise ValueError(f"The catalog needs at least {len(DIAGNOSIS_COUNT_WEIGHTS)} diagnoses")
+        self.rng = random.Random(seed)
+        self.doctor_ids = doctor_ids
+        self.doctor_weights = _cumulative([self.rng.lognormvariate(0, DOCTOR_SKEW) for _ in doctor_ids])
+        # Which codes are common is part of the seed, not of the catalog order
+        self.diagnosis_ids = list(diagnosis_ids)
+        self.rng.shuffle(self.diagnosis_ids)
+        self.diagnosis_weights = _cumulative([1 / rank ** DIAGNOSIS_SKEW for rank in range(1, len(diagnosis_ids) + 1)])
+        self.count_weights = _cumulative(list(DIAGNOSIS_COUNT_WEIGHTS))
+        self.patients = max(1, int(consultations * PATIENTS_PER_CONSULTATION))
+        self.volumes = daily_volumes(self.rng, consultations, start, end, growth)
+
+    def _diagnoses(self, count: int) -> list[uuid.UUID]:
+        # Distinct codes; popular ones are drawn repeatedly, so draw until there are enough
+        chosen: dict[uuid.UUID, None] = {}
+        while len(chosen) < count:
+            chosen.update(dict.fromkeys(
+                self.rng.choices(self.diagnosis_ids, cum_weights=self.diagnosis_weights, k=count - len(chosen))
+            ))
+        return list(chosen)
+
+    def _day(self, day: datetime, count: int) -> Iterator[tuple[tuple[Any, ...], list[tuple[Any, ...]]]]:
+        rng = self.rng
+        opening, closing = OFFICE_HOURS
+        minutes = sorted(rng.randrange((closing - opening) * 60) for _ in range(count))
+        doctors = rng.choices(self.doctor_ids, cum_weights=self.doctor_weights, k=count)
+        for minute, doctor_id in zip(minutes, doctors):
+            consultation_id = _uuid(rng)
+            consultation_date = day + timedelta(hours=opening, minutes=minute)
+            # Notes are written up after the visit
+            created_at = consultation_date + timedelta(minutes=rng.randrange(5, 240))
+            # Squaring skews towards low indexes: some patients visit often
+            patient = int(self.patients * rng.random() ** 2)
+            diagnosis_count = bisect.bisect_right(self.count_weights, rng.random() * self.count_weights[-1]) + 1
+            consultation = (
+                consultation_id,
+                patient_name(patient),
+                doctor_id,
+                consultation_date,
+                rng.choice(NOTES),
+                created_at,
+                created_at,
+            )
+            links = [(consultation_id, diagnosis_id, created_at) for diagnosis_id in self._diagnoses(diagnosis_count)]
+            yield consultation, links
+
+    def batches(self, size: int) -> Iterator[tuple[list[tuple[Any, ...]], list[tuple[Any, ...]]]]:
+        consultations: list[tuple[Any, ...]] = []
+        links: list[tuple[Any, ...]] = []
+        for day, count in self.volumes:
+            for consultation, consultation_links in self._day(day, count):
+                consultations.append(consultation)
+                links.extend(consultation_links)
+                if len(consultations) >= size:
+                    yield consultations, links
+                    consultations, links = [], []
+        if consultations:
+            yield consultations, links
+
+
+async def ensure_doctors(session: AsyncSession, *, count: int, password: str, seed: int) -> list[uuid.UUID]:
+    """Create the synthetic doctors that do not exist yet and return all their ids."""
+    rng = random.Random(f"{seed}-doctors")
+    hashed_password = get_password_hash(password)
+    now = datetime.now(UTC).replace(tzinfo=None)
+    emails = [DOCTOR_EMAIL.format(i) for i in range(count)]
+    rows = [
+        {
+            "id": _uuid(rng),
+            "email": email,
+            "full_name": f"Dr. {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "role": Role.DOCTOR,
+            "is_active": True,
+            "hashed_password": hashed_password,
+            "updated_at": now,
+        }
+        for email in emails
+    ]
+    await session.execute(insert(User).on_conflict_do_nothing(index_elements=["email"]), rows)  # type: ignore[deprecated]
+    ids = dict((await session.execute(select(User.email, User.id).where(col(User.email).in_(emails)))).tuples().all())  # type: ignore[deprecated]
+    await session.commit()
+    return [ids[email] for email in emails]
+
+
+async def delete_consultations(session: AsyncSession, doctor_ids: list[uuid.UUID]) -> int:
+    consultations = select(Consultation.id).where(col(Consultation.doctor_id).in_(doctor_ids))
+    await session.execute(  # type: ignore[deprecated]
+        delete(ConsultationDiagnosis).where(col(ConsultationDiagnosis.consultation_id).in_(consultations))
+    )
+    result = await session.execute(delete(Consultation).where(col(Consultation.doctor_id).in_(doctor_ids)))  # type: ignore[deprecated]
+    await session.commit()
+    return result.rowcount  # type: ignore[attr-defined]
+
+
+async def generate(args: argparse.Namespace) -> None:
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("The synthetic data generator needs PostgreSQL (it loads with COPY)")
+
+    start_time = time.perf_counter()
+    async with async_session_maker() as session:
+        # In code order, so the same codes are drawn whatever ids the catalog got
+        diagnosis_ids = list((await session.exec(select(Diagnosis.id).order_by(col(Diagnosis.code)))).all())
+        if len(diagnosis_ids) < len(DIAGNOSIS_COUNT_WEIGHTS):
+            raise SystemExit("Load the diagnosis catalog first (scripts/load_icd10cm.py or scripts/seed_icd10.py)")
+
+        doctor_ids = await ensure_doctors(session, count=args.doctors, password=args.password, seed=args.seed)
+        existing = (await session.exec(
+            select(Consultation.id).where(col(Consultation.doctor_id).in_(doctor_ids)).limit(1)
+        )).first()
+        if existing is not None:
+            if not args.replace:
+                raise SystemExit("Synthetic consultations already exist, pass --replace to regenerate them")
+            print(f"Deleted {await delete_consultations(session, doctor_ids):,} synthetic consultations")
+
+    end = datetime.fromisoformat(args.end)
+    data = SyntheticConsultations(
+        seed=args.seed,
+        doctor_ids=doctor_ids,
+        diagnosis_ids=diagnosis_ids,
+        consultations=args.consultations,
+        start=end - timedelta(days=round(args.years * 365.25)),
+        end=end,
+        growth=args.growth,
+    )
+
+    deferred = [*Consultation.__table__.indexes, *ConsultationDiagnosis.__table__.indexes] if args.defer_indexes else []  # type: ignore[attr-defined]
+    async with engine.connect() as connection:
+        for index in deferred:
+            await connection.run_sync(lambda sync_connection, index=index: index.drop(sync_connection, checkfirst=True))
+        await connection.commit()
+
+        driver_connection = (await connection.get_raw_connection()).driver_connection
+        written = 0
+        for consultations, links in data.batches(args.batch_size):
+            async with driver_connection.transaction():
+                await driver_connection.copy_records_to_table(
+                    Consultation.__tablename__, records=consultations, columns=CONSULTATION_COLUMNS
+                )
+                await driver_connection.copy_records_to_table(
+                    ConsultationDiagnosis.__tablename__, records=links, columns=LINK_COLUMNS
+                )
+            written += len(consultations)
+            elapsed = time.perf_counter() - start_time
+            print(f"{written:,}/{args.consultations:,} consultations ({written / elapsed:,.0f}/s)", flush=True)
+
+        if deferred:
+            print(f"Rebuilding {len(deferred)} indexes")
+            for index in deferred:
+                await connection.run_sync(lambda sync_connection, index=index: index.create(sync_connection, checkfirst=True))
+            await connection.commit()
+
+    # COPY bypasses the rollup maintenance of the application
+    print("Rebuilding the analytics rollups")
+    async with async_session_maker() as session:
+        await rebuild_rollups(session=session)
+
+    async with engine.connect() as connection:
+        # Fresh statistics for the planner and the estimated list counts
+        for table in (
+            User.__tablename__,
+            Consultation.__tablename__,
+            ConsultationDiagnosis.__tablename__,
+            ConsultationDailyCount.__tablename__,
+            DiagnosisDailyCount.__tablename__,
+        ):
+            await connection.execute(text(f'ANALYZE "{table}"'))
+        await connection.commit()
+
+    print(f"Generated {args.consultations:,} consultations for {args.doctors} doctors in {time.perf_counter() - start_time:.1f}s")
+
+
+async def main(args: argparse.Namespace) -> None:
+    try:
+        await generate(args)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic doctors and consultations.")
+    parser.add_argument("--doctors", type=int, default=200)
+    parser.add_argument("--consultations", type=int, default=5_000_000)
+    parser.add_argument("--years", type=float, default=10, help="period covered, ending at --end")
+    parser.add_argument("--end", default="2026-01-01", help="end of the period (exclusive), ISO date")
+    parser.add_argument("--growth", type=float, default=0.08, help="yearly volume growth (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--password", default="aaAA1234", help="password of the synthetic doctors")
+    parser.add_argument("--batch-size", type=int, default=50_000, help="consultations per COPY and commit")
+    parser.add_argument("--replace", action="store_true", help="delete existing synthetic consultations first")
+    parser.add_argument("--defer-indexes", action="store_true", help="drop consultation indexes during the load")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,50 @@
+"""
+Load an ICD-10-CM release into the diagnosis table.
+
+    python scripts/load_icd10cm.py icd10cm_order_2026.txt
+    python scripts/load_icd10cm.py icd10cm_tabular_2026.xml --include-headers
+
+New codes are inserted and changed descriptions updated in one transaction.
+Codes missing from the release are reported as retired but never deleted.
+"""
+import argparse
+import asyncio
+import time
+from pathlib import Path
+
+from app.core.database import async_session_maker, engine
+from app.core.pubsub import pubsub_client
+from app.core.redis import close_redis
+from app.modules.diagnoses.loader import RELEASE_FORMATS, read_release
+from app.modules.diagnoses.service import upsert_diagnoses
+
+async def load(path: Path, format: str | None, include_headers: bool, partial: bool):
+    start = time.perf_counter()
+    try:
+        async with async_session_maker() as session:
+            result = await upsert_diagnoses(
+                session=session,
+                records=read_release(path, format=format, include_headers=include_headers),
+                full_release=not partial,
+            )
+    finally:
+        await engine.dispose()
+        await pubsub_client.aclose()
+        await close_redis()
+
+    print(
+        f"Loaded {result.received} codes in {time.perf_counter() - start:.1f}s: "
+        f"{result.added} added, {result.changed} changed, {result.unchanged} unchanged"
+    )
+    if result.retired is not None:
+        print(f"{result.retired} existing codes are not in this release (kept)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load an ICD-10-CM release file.")
+    parser.add_argument("path", type=Path, help="order, codes, tab, CSV or tabular XML file")
+    parser.add_argument("--format", choices=RELEASE_FORMATS, help="detected from the file when omitted")
+    parser.add_argument("--include-headers", action="store_true", help="also load non-billable header codes")
+    parser.add_argument("--partial", action="store_true", help="file is not a full release, skip the retired count")
+    args = parser.parse_args()
+
+    asyncio.run(load(args.path, args.format, args.include_headers, args.partial))
@@ -1,12 +1,9 @@
 import asyncio
-from sqlalchemy.ext.asyncio import create_async_engine
-from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlalchemy.orm import sessionmaker
-from sqlmodel import select
 
-from app.core.config import settings
-from app.modules.diagnoses.models import Diagnosis
-from app.modules.diagnoses.service import get_diagnosis_by_code
+from app.core.database import async_session_maker, engine
+from app.core.pubsub import pubsub_client
+from app.core.redis import close_redis
+from app.modules.diagnoses.service import upsert_diagnoses
 
 ICD10_CODES = [
     {"code": "A00.0", "description": "Cholera due to Vibrio cholerae 01, biovar cholerae"},
@@ -116,26 +113,24 @@ ICD10_CODES = [
 ]
 
 async def seed():
-    engine = create_async_engine(str(settings.SQLALCHEMY_DATABASE_URI))
-    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False) # type: ignore
-    
-    async with async_session() as session:
-        # Fetch all existing diagnosis codes to avoid multiple DB calls
-        statement = select(Diagnosis.code)
-        result = await session.exec(statement)
-        existing_codes = set(result.all())
+    # Sample codes for development; load full releases with scripts/load_icd10cm.py.
+    # Insert-only: descriptions of codes already loaded from a release are kept
+    try:
+        async with async_session_maker() as session:
+            result = await upsert_diagnoses(
+                session=session,
+                records=((item["code"], item["description"]) for item in ICD10_CODES),
+                update=False,
+            )
+    finally:
+        await engine.dispose()
+        await pubsub_client.aclose()
+        await close_redis()
 
-        to_insert = []
-        for item in ICD10_CODES:
-            if item["code"] not in existing_codes:
-                to_insert.append(Diagnosis(**item))
-        
-        if to_insert:
-            session.add_all(to_insert)
-            await session.commit()
-            print(f"Successfully seeded {len(to_insert)} new diagnoses.")
-        else:
-            print("No new diagnoses to seed.")
+    if result.added:
+        print(f"Successfully seeded {result.added} new diagnoses.")
+    else:
+        print("No new diagnoses to seed.")
 
     print("Seeding process completed!")
 
@@ -9,16 +9,20 @@ from sqlalchemy.orm import sessionmaker
 from sqlmodel import SQLModel
 
 from app.main import app
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.core.security import create_access_token, get_password_hash
 from app.core.redis import redis_client
+from app.core.rate_limiter import limiter
 from app.core.config import settings, AppEnv
 from app.modules.user.models import User, Role
 from app.modules.user.schemas import UserCreate
+from app.modules.user.cache import principal_cache
 
 # Override settings for testing
 settings.APP_ENV = AppEnv.TEST
 settings.SESSION_COOKIE_SECURE = False
+# Minimum bcrypt cost keeps user fixtures fast
+settings.BCRYPT_ROUNDS = 4
 
 # Test database URL (in-memory SQLite)
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
@@ -47,9 +51,16 @@ async def async_session() -> AsyncGenerator[AsyncSession, None]:
         await conn.run_sync(SQLModel.metadata.drop_all)
 
 @pytest_asyncio.fixture(autouse=True)
-def flush_redis():
+async def flush_redis():
     """Flush Redis before each test to clear rate limits and blacklists."""
-    redis_client.flushdb()
+    await redis_client.flushdb()
+    # Leases are budget taken from the flushed keys
+    limiter.clear_leases()
+
+@pytest.fixture(autouse=True)
+def clear_principal_cache():
+    """Users are recreated per test with the same emails but new ids."""
+    principal_cache.clear()
 
 @pytest_asyncio.fixture(scope="function")
 async def client(async_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
@@ -58,6 +69,7 @@ async def client(async_session: AsyncSession) -> AsyncGenerator[AsyncClient, Non
         yield async_session
     
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
     
     async with AsyncClient(
         transport=ASGITransport(app=app),
@@ -0,0 +1,72 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+
+from app.core.database import query_stats
+from tests.conftest import test_engine
+
+
+@pytest.fixture
+def instrumented_test_engine():
+    """The app's engines are instrumented when created; the test engine is not."""
+    query_stats.instrument(test_engine)
+    yield
+    event.remove(test_engine.sync_engine, "before_cursor_execute", query_stats._before_cursor_execute)
+    event.remove(test_engine.sync_engine, "after_cursor_execute", query_stats._after_cursor_execute)
+
+@pytest.mark.asyncio
+async def test_pool_stats_admin(client: AsyncClient, admin_token: str):
+    """Test that admins can read connection pool statistics."""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await client.get("/api/v1/admin/db/pool", headers=headers)
+
+    assert response.status_code == 200
+    pools = {pool["name"]: pool for pool in response.json()}
+    assert "primary" in pools
+    primary = pools["primary"]
+    assert primary["checked_out"] >= 0
+    assert primary["wait_seconds"]["buckets"][-1]["le"] == "+Inf"
+
+@pytest.mark.asyncio
+async def test_pool_stats_forbidden_for_doctor(client: AsyncClient, doctor_token: str):
+    """Test that doctors cannot read connection pool statistics."""
+    headers = {"Authorization": f"Bearer {doctor_token}"}
+    response = await client.get("/api/v1/admin/db/pool", headers=headers)
+    assert response.status_code == 403
+
+@pytest.mark.asyncio
+async def test_password_hashing_stats_admin(client: AsyncClient, admin_token: str):
+    """Test that admins can read password hashing pool statistics."""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await client.get("/api/v1/admin/security/password-hashing", headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["pending"] == 0
+    assert data["verify_seconds"]["buckets"][-1]["le"] == "+Inf"
+
+@pytest.mark.asyncio
+async def test_query_stats_admin(client: AsyncClient, admin_token: str, doctor_token: str, instrumented_test_engine):
+    """Test that admins can read the statements with the most total time, by fingerprint."""
+    for search in ("A00", "B00"):
+        response = await client.get("/api/v1/diagnosis/", params={"search": search}, headers={"Authorization": f"Bearer {doctor_token}"})
+        assert response.status_code == 200
+
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await client.get("/api/v1/admin/db/queries", params={"limit": 100}, headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["fingerprints"] == len(data["statements"])
+    totals = [statement["total_seconds"] for statement in data["statements"]]
+    assert totals == sorted(totals, reverse=True)
+
+    # Both searches share one parameter-free fingerprint, attributed to their route
+    searches = [
+        statement for statement in data["statements"]
+        if statement["routes"] == [{"route": "/api/v1/diagnosis/", "count": 2}]
+    ]
+    assert len(searches) == 1
+    assert searches[0]["count"] == 2
+    assert "A00" not in searches[0]["fingerprint"]
+
+    response = await client.get("/api/v1/admin/db/queries", headers={"Authorization": f"Bearer {doctor_token}"})
+    assert response.status_code == 403
@@ -0,0 +1,188 @@
+import json
+import pytest
+from datetime import date, datetime
+from httpx import AsyncClient
+from sqlmodel import select
+
+from app.modules.analytics.models import ConsultationDailyCount, DiagnosisDailyCount
+from app.modules.analytics import service as analytics_service
+from app.modules.analytics.service import rebuild_rollups
+from app.modules.consultation.models import Consultation
+from app.modules.diagnoses.models import Diagnosis
+
+
+@pytest.fixture
+async def diagnoses(async_session) -> list[Diagnosis]:
+    rows = [Diagnosis(code=code, description=f"Diagnosis {code}") for code in ("A00", "B00", "C00")]
+    async_session.add_all(rows)
+    await async_session.commit()
+    return rows
+
+
+async def _create(client: AsyncClient, token: str, consultation_date: str, diagnoses: list[Diagnosis], **extra) -> None:
+    response = await client.post(
+        "/api/v1/consultation/",
+        json={
+            "patient_full_name": "Analytics Patient",
+            "consultation_date": consultation_date,
+            "diagnosis_ids": [str(diagnosis.id) for diagnosis in diagnoses],
+            **extra,
+        },
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 201
+
+
+async def _rollups(async_session) -> tuple[list[tuple], list[tuple]]:
+    days = (await async_session.exec(select(ConsultationDailyCount).order_by(ConsultationDailyCount.day))).all()
+    diagnoses = (await async_session.exec(select(DiagnosisDailyCount))).all()
+    return (
+        [(row.day, row.doctor_id, row.consultations) for row in days],
+        sorted((row.day, row.doctor_id, row.diagnosis_id, row.consultations) for row in diagnoses),
+    )
+
+
+@pytest.mark.asyncio
+async def test_daily_consultation_counts(client: AsyncClient, doctor_token: str, admin_token: str, admin_user, doctor_user, diagnoses):
+    await _create(client, doctor_token, "2026-03-02T09:00:00", diagnoses[:2])
+    await _create(client, doctor_token, "2026-03-02T15:00:00", [])
+    await _create(client, doctor_token, "2026-03-04T10:00:00", diagnoses[:1])
+    # Booked by an admin on the doctor's behalf
+    await _create(client, admin_token, "2026-03-04T11:00:00", diagnoses[:1], doctor_id=str(doctor_user.id))
+
+    params = {"date_from": "2026-03-01", "date_to": "2026-03-05"}
+    response = await client.get("/api/v1/analytics/consultations/daily", params=params, headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 200
+    assert response.json() == [
+        {"day": "2026-03-01", "consultations": 0},
+        {"day": "2026-03-02", "consultations": 2},
+        {"day": "2026-03-03", "consultations": 0},
+        {"day": "2026-03-04", "consultations": 2},
+        {"day": "2026-03-05", "consultations": 0},
+    ]
+
+    # Doctors only see their own consultations, whatever doctor they ask for
+    response = await client.get(
+        "/api/v1/analytics/consultations/daily",
+        params={**params, "doctor_id": str(admin_user.id)},
+        headers={"Authorization": f"Bearer {doctor_token}"},
+    )
+    assert [day["consultations"] for day in response.json()] == [0, 2, 0, 2, 0]
+
+    response = await client.get(
+        "/api/v1/analytics/consultations/daily",
+        params={**params, "doctor_id": str(admin_user.id)},
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+    assert [day["consultations"] for day in response.json()] == [0, 0, 0, 0, 0]
+
+
+@pytest.mark.asyncio
+async def test_top_diagnoses_by_doctor_and_month(client: AsyncClient, doctor_token: str, doctor_user, diagnoses):
+    a00, b00, c00 = diagnoses
+    await _create(client, doctor_token, "2026-01-05T09:00:00", [b00, c00])
+    await _create(client, doctor_token, "2026-01-06T09:00:00", [b00])
+    await _create(client, doctor_token, "2026-01-20T09:00:00", [a00, b00])
+    await _create(client, doctor_token, "2026-02-02T09:00:00", [c00])
+
+    response = await client.get(
+        "/api/v1/analytics/diagnoses/top",
+        params={"date_from": "2026-01-01", "date_to": "2026-02-28", "limit": 2},
+        headers={"Authorization": f"Bearer {doctor_token}"},
+    )
+    assert response.status_code == 200
+    top = [(row["month"], row["rank"], row["code"], row["consultations"]) for row in response.json()]
+    # B00 leads January; A00 and C00 tie and the lower code wins
+    assert top == [
+        ("2026-01-01", 1, "B00", 3),
+        ("2026-01-01", 2, "A00", 1),
+        ("2026-02-01", 1, "C00", 1),
+    ]
+    assert response.json()[0]["doctor_id"] == str(doctor_user.id)
+    assert response.json()[0]["doctor_name"] == doctor_user.full_name
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_updates_rollups(client: AsyncClient, admin_token: str, doctor_user, diagnoses):
+    lines = [
+        {"patient_full_name": "Imported", "doctor_email": doctor_user.email, "consultation_date": "2026-04-01T09:00:00", "diagnosis_codes": ["A00", "B00"]},
+        {"patient_full_name": "Imported", "doctor_email": doctor_user.email, "consultation_date": "2026-04-01T10:00:00", "diagnosis_codes": ["A00"]},
+        {"patient_full_name": "Rejected", "doctor_email": doctor_user.email, "consultation_date": "2026-04-01T11:00:00", "diagnosis_codes": ["Z99"]},
+    ]
+    response = await client.post(
+        "/api/v1/consultation/bulk",
+        content="\n".join(json.dumps(line) for line in lines),
+        headers={"Authorization": f"Bearer {admin_token}", "Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    assert response.json()["imported"] == 2
+
+    response = await client.get(
+        "/api/v1/analytics/diagnoses/top",
+        params={"date_from": "2026-04-01", "date_to": "2026-04-30"},
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+    assert [(row["code"], row["consultations"]) for row in response.json()] == [("A00", 2), ("B00", 1)]
+
+
+@pytest.mark.asyncio
+async def test_rebuild_rollups_matches_incremental_counts(client: AsyncClient, doctor_token: str, async_session, doctor_user, diagnoses):
+    await _create(client, doctor_token, "2026-05-01T09:00:00", diagnoses[:2])
+    await _create(client, doctor_token, "2026-05-01T10:00:00", diagnoses[1:])
+    await _create(client, doctor_token, "2026-05-03T10:00:00", [])
+    incremental = await _rollups(async_session)
+
+    result = await rebuild_rollups(session=async_session)
+    assert (result.consultation_days, result.diagnosis_days) == (2, 3)
+    assert await _rollups(async_session) == incremental
+
+    # Consultations written behind the application's back are picked up by a range rebuild
+    async_session.add(Consultation(patient_full_name="Restored", doctor_id=doctor_user.id, consultation_date=datetime(2026, 5, 3, 12)))
+    await async_session.commit()
+    result = await rebuild_rollups(session=async_session, date_from=date(2026, 5, 2), date_to=date(2026, 5, 3))
+    assert (result.consultation_days, result.diagnosis_days) == (1, 0)
+    days, _ = await _rollups(async_session)
+    assert [(day.isoformat(), count) for day, _, count in days] == [("2026-05-01", 2), ("2026-05-03", 2)]
+
+
+@pytest.mark.asyncio
+async def test_rebuild_rollups_in_batches(client: AsyncClient, doctor_token: str, async_session, doctor_user, diagnoses, monkeypatch):
+    await _create(client, doctor_token, "2026-06-01T09:00:00", diagnoses[:1])
+    await _create(client, doctor_token, "2026-06-09T09:00:00", diagnoses[:2])
+    incremental = await _rollups(async_session)
+    # A stale count past the last consultation is cleared too
+    async_session.add(ConsultationDailyCount(day=date(2026, 6, 20), doctor_id=doctor_user.id, consultations=4))
+    await async_session.commit()
+
+    commits = []
+    commit = async_session.commit
+
+    async def counting_commit():
+        commits.append(True)
+        await commit()
+
+    monkeypatch.setattr(analytics_service, "REBUILD_BATCH_DAYS", 7)
+    monkeypatch.setattr(async_session, "commit", counting_commit)
+    result = await rebuild_rollups(session=async_session)
+
+    # June 1-7, 8-14 and 15-20, each in its own transaction
+    assert len(commits) == 3
+    assert (result.consultation_days, result.diagnosis_days) == (2, 3)
+    assert await _rollups(async_session) == incremental
+
+
+@pytest.mark.asyncio
+async def test_analytics_date_range_validation(client: AsyncClient, doctor_token: str):
+    headers = {"Authorization": f"Bearer {doctor_token}"}
+    response = await client.get(
+        "/api/v1/analytics/consultations/daily", params={"date_from": "2026-02-01", "date_to": "2026-01-01"}, headers=headers
+    )
+    assert response.status_code == 400
+
+    response = await client.get(
+        "/api/v1/analytics/diagnoses/top", params={"date_from": "2000-01-01", "date_to": "2026-01-01"}, headers=headers
+    )
+    assert response.status_code == 400
+
+    response = await client.get("/api/v1/analytics/diagnoses/top", params={"date_from": "2026-01-01"}, headers=headers)
+    assert response.status_code == 422
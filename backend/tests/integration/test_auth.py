@@ -1,7 +1,10 @@
 import pytest
 from httpx import AsyncClient
 from app.modules.user.models import Role
-from app.core.security import get_password_hash
+from app.core.config import settings
+from app.core.security import get_password_hash, verify_password
+from app.core.redis import redis_client
+from redis.exceptions import TimeoutError as RedisTimeoutError
 
 @pytest.mark.asyncio
 async def test_login_success(client: AsyncClient, admin_user):
@@ -32,21 +35,19 @@ async def test_login_failure(client: AsyncClient, admin_user):
 
 @pytest.mark.asyncio
 async def test_login_rate_limit(client: AsyncClient, admin_user):
-    """Test login rate limiting (5 per hour)."""
-    # Note: This test might depend on the Redis state and how limiter is configured for tests.
-    # In a real test environment, we might need to flush redis or use a mock.
-    
-    for _ in range(5):
-        await client.post(
+    """Test login rate limiting (10 per hour)."""
+    for _ in range(10):
+        response = await client.post(
             "/api/v1/auth/login",
             json={"email": admin_user.email, "password": "wrongpassword"},
         )
-    
+        assert response.status_code == 401
+
     response = await client.post(
         "/api/v1/auth/login",
         json={"email": admin_user.email, "password": "wrongpassword"},
     )
-    
+
     assert response.status_code == 429
     assert "too many requests" in response.json()["detail"].lower()
 
@@ -109,3 +110,63 @@ async def test_logout_blacklists_tokens(client: AsyncClient, admin_user):
         cookies=login_response.cookies
     )
     assert blocked_refresh.status_code == 401
+
+@pytest.mark.asyncio
+async def test_redis_timeout_returns_503(client: AsyncClient, doctor_token: str, monkeypatch):
+    """Test that a slow Redis fails the request fast instead of hanging it."""
+    async def timeout(*args, **kwargs):
+        raise RedisTimeoutError("Timeout reading from socket")
+
+    monkeypatch.setattr(redis_client, "exists", timeout)
+    headers = {"Authorization": f"Bearer {doctor_token}"}
+    response = await client.get("/api/v1/users/me", headers=headers)
+    assert response.status_code == 503
+
+@pytest.mark.asyncio
+async def test_login_upgrades_password_hash(client: AsyncClient, async_session, admin_user, monkeypatch):
+    """Test that a successful login rehashes passwords stored with another bcrypt cost."""
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+    response = await client.post(
+        "/api/v1/auth/login",
+        json={"email": admin_user.email, "password": "testpassword123"},
+    )
+    assert response.status_code == 200
+
+    await async_session.refresh(admin_user)
+    assert admin_user.hashed_password.startswith("$2b$05$")
+    assert verify_password("testpassword123", admin_user.hashed_password)
+
+@pytest.mark.asyncio
+async def test_inactive_login_keeps_password_hash(client: AsyncClient, async_session, admin_user, monkeypatch):
+    """Test that an inactive user's login is refused before the hash is upgraded."""
+    admin_user.is_active = False
+    async_session.add(admin_user)
+    await async_session.commit()
+    stored_hash = admin_user.hashed_password
+
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+    response = await client.post(
+        "/api/v1/auth/login",
+        json={"email": admin_user.email, "password": "testpassword123"},
+    )
+    assert response.status_code == 400
+
+    await async_session.refresh(admin_user)
+    assert admin_user.hashed_password == stored_hash
+
+@pytest.mark.asyncio
+async def test_login_rate_limit_per_client_address(client: AsyncClient, admin_user):
+    """Test that clients behind the trusted proxy get their own login budget."""
+    payload = {"email": admin_user.email, "password": "wrongpassword"}
+    first = {"X-Forwarded-For": "203.0.113.5"}
+    for _ in range(10):
+        response = await client.post("/api/v1/auth/login", json=payload, headers=first)
+        assert response.status_code == 401
+
+    response = await client.post("/api/v1/auth/login", json=payload, headers=first)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+
+    second = {"X-Forwarded-For": "203.0.113.6"}
+    response = await client.post("/api/v1/auth/login", json=payload, headers=second)
+    assert response.status_code == 401
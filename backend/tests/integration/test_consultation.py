@@ -1,9 +1,17 @@
+import csv
+import io
+import json
 import pytest
 import uuid
+from datetime import datetime
 from httpx import AsyncClient
+from sqlalchemy.exc import OperationalError
+from app.modules.consultation.importer import ConsultationImporter
 from app.modules.consultation.models import Consultation
 from app.modules.diagnoses.models import Diagnosis
 from app.modules.user.models import User, Role
+from app.modules.user import service as user_service
+from app.modules.user.schemas import UserUpdate
 
 @pytest.mark.asyncio
 async def test_create_consultation_success(client: AsyncClient, doctor_token: str, async_session):
@@ -99,3 +107,282 @@ async def test_get_consultation_forbidden(client: AsyncClient, doctor_token: str
     
     assert response.status_code == 403
     assert "detail" in response.json()
+
+@pytest.mark.asyncio
+async def test_list_consultations_projection(client: AsyncClient, admin_token: str, async_session, doctor_user):
+    """The list carries the doctor name and diagnoses but never the notes."""
+    cholera = Diagnosis(code="A00", description="Cholera")
+    typhoid = Diagnosis(code="A01.0", description="Typhoid fever")
+    async_session.add_all([cholera, typhoid])
+    await async_session.flush()
+
+    with_diagnoses = Consultation(
+        patient_full_name="Patient A",
+        doctor_id=doctor_user.id,
+        consultation_date=datetime(2026, 1, 2, 9, 30),
+        notes="Private notes",
+        diagnoses=[cholera, typhoid],
+    )
+    without_doctor = Consultation(patient_full_name="Patient B", consultation_date=datetime(2026, 1, 1))
+    async_session.add_all([with_diagnoses, without_doctor])
+    await async_session.commit()
+
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await client.get(
+        "/api/v1/consultation/",
+        params={"sort": "-consultation_date"},
+        headers=headers,
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["count"] == 2
+    first, second = data["data"]
+    assert "notes" not in first
+    assert first["id"] == str(with_diagnoses.id)
+    assert first["doctor_name"] == doctor_user.full_name
+    assert first["consultation_date"] == "2026-01-02T09:30:00"
+    assert first["diagnosis_count"] == 2
+    assert sorted(diagnosis["code"] for diagnosis in first["diagnoses"]) == ["A00", "A01.0"]
+    diagnosis = next(item for item in first["diagnoses"] if item["code"] == "A00")
+    assert diagnosis["id"] == str(cholera.id)
+    assert diagnosis["created_at"] == cholera.created_at.isoformat()
+    assert second["doctor_name"] == "Unknown"
+    assert second["diagnosis_count"] == 0
+    assert second["diagnoses"] == []
+
+@pytest.mark.asyncio
+async def test_list_consultations_projection_cursor(client: AsyncClient, admin_token: str, async_session, doctor_user):
+    """Cursor pages work on projected rows."""
+    async_session.add_all([
+        Consultation(patient_full_name=f"Patient {i}", doctor_id=doctor_user.id, consultation_date=datetime(2026, 1, i + 1))
+        for i in range(3)
+    ])
+    await async_session.commit()
+
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    params = {"sort": "consultation_date", "limit": 2}
+    first = (await client.get("/api/v1/consultation/", params=params, headers=headers)).json()
+    assert first["has_more"] is True
+    assert first["next_cursor"]
+
+    second = (await client.get(
+        "/api/v1/consultation/", params={**params, "cursor": first["next_cursor"]}, headers=headers
+    )).json()
+    assert [row["patient_full_name"] for row in first["data"] + second["data"]] == [
+        "Patient 0", "Patient 1", "Patient 2"
+    ]
+    assert second["has_more"] is False
+
+@pytest.mark.asyncio
+async def test_get_consultation_projection(client: AsyncClient, doctor_token: str, async_session, doctor_user):
+    """Detail reads return the doctor name and diagnoses from one statement."""
+    diag = Diagnosis(code="B01", description="Varicella")
+    consultation = Consultation(
+        patient_full_name="Jane Roe",
+        doctor_id=doctor_user.id,
+        consultation_date=datetime(2026, 2, 1),
+        notes="Detail notes",
+        diagnoses=[diag],
+    )
+    async_session.add(consultation)
+    await async_session.commit()
+
+    headers = {"Authorization": f"Bearer {doctor_token}"}
+    response = await client.get(f"/api/v1/consultation/{consultation.id}", headers=headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["notes"] == "Detail notes"
+    assert data["doctor_id"] == str(doctor_user.id)
+    assert data["doctor_name"] == doctor_user.full_name
+    assert [item["code"] for item in data["diagnoses"]] == ["B01"]
+    assert data["diagnoses"][0]["id"] == str(diag.id)
+
+    missing = await client.get(f"/api/v1/consultation/{uuid.uuid4()}", headers=headers)
+    assert missing.status_code == 404
+
+def _ndjson(*records) -> bytes:
+    return b"\n".join(record if isinstance(record, bytes) else json.dumps(record).encode() for record in records)
+
+@pytest.mark.asyncio
+async def test_bulk_import_consultations(client: AsyncClient, admin_token: str, async_session, doctor_user, admin_user):
+    """Valid lines are imported with their diagnoses; invalid ones are reported by line."""
+    async_session.add_all([Diagnosis(code="A00", description="Cholera"), Diagnosis(code="A01.0", description="Typhoid fever")])
+    await async_session.commit()
+
+    line = {"patient_full_name": "Imported", "doctor_email": doctor_user.email, "consultation_date": "2020-05-01T10:00:00"}
+    body = _ndjson(
+        {**line, "diagnosis_codes": ["a00", "A010", "A00"], "notes": "Historical"},
+        b"",
+        {**line, "doctor_email": "nobody@test.com"},
+        {**line, "doctor_email": admin_user.email},
+        {**line, "diagnosis_codes": ["Z99.9"]},
+        b"{not json",
+        {**line, "consultation_date": "2020-05-02T10:00:00+02:00", "created_at": "2020-05-02T12:00:00"},
+    )
+
+    headers = {"Authorization": f"Bearer {admin_token}", "Content-Type": "application/x-ndjson"}
+    response = await client.post("/api/v1/consultation/bulk", content=body, headers=headers)
+
+    assert response.status_code == 200
+    result = response.json()
+    assert result["received"] == 6
+    assert result["imported"] == 2
+    assert result["failed"] == 4
+    assert result["next_offset"] == 7
+    assert [(error["line"], error["error"]) for error in result["errors"][:3]] == [
+        (3, "Doctor not found"),
+        (4, "Doctor not found"),
+        (5, "Unknown diagnosis codes: Z99.9"),
+    ]
+    assert result["errors"][3]["line"] == 6
+
+    listed = (await client.get("/api/v1/consultation/", params={"sort": "consultation_date"}, headers=headers)).json()
+    first, second = listed["data"]
+    assert first["doctor_name"] == doctor_user.full_name
+    assert sorted(diagnosis["code"] for diagnosis in first["diagnoses"]) == ["A00", "A01.0"]
+    assert second["consultation_date"] == "2020-05-02T08:00:00"
+    assert second["created_at"] == "2020-05-02T12:00:00"
+
+@pytest.mark.asyncio
+async def test_bulk_import_consultations_resume(client: AsyncClient, admin_token: str, async_session, doctor_user):
+    """Lines before `offset` are skipped."""
+    lines = [
+        {"patient_full_name": f"Patient {i}", "doctor_email": doctor_user.email, "consultation_date": "2020-01-01T00:00:00"}
+        for i in range(3)
+    ]
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await client.post("/api/v1/consultation/bulk", params={"offset": 2}, content=_ndjson(*lines), headers=headers)
+
+    assert response.status_code == 200
+    assert response.json()["imported"] == 1
+    assert response.json()["next_offset"] == 3
+    listed = (await client.get("/api/v1/consultation/", headers=headers)).json()
+    assert [row["patient_full_name"] for row in listed["data"]] == ["Patient 2"]
+
+@pytest.mark.asyncio
+async def test_bulk_import_lookup_failure_reports_offset(client: AsyncClient, admin_token: str, doctor_user, monkeypatch):
+    """A database error while resolving doctors still tells the client where to resume."""
+    async def fail(self, emails):
+        raise OperationalError("SELECT", {}, Exception("connection lost"))
+
+    monkeypatch.setattr(ConsultationImporter, "_resolve_doctors", fail)
+    line = {"patient_full_name": "Patient", "doctor_email": doctor_user.email, "consultation_date": "2020-01-01T00:00:00"}
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await client.post("/api/v1/consultation/bulk", params={"offset": 1}, content=_ndjson(line, line, line), headers=headers)
+
+    assert response.status_code == 500
+    assert "offset=1" in response.json()["detail"]
+
+@pytest.mark.asyncio
+async def test_create_and_detail_agree_on_doctor_name(client: AsyncClient, doctor_token: str, async_session, doctor_user):
+    """Create answers without re-fetching; its doctor name must fall back like the detail's."""
+    doctor_user.full_name = ""
+    async_session.add(doctor_user)
+    await async_session.commit()
+
+    headers = {"Authorization": f"Bearer {doctor_token}"}
+    created = await client.post(
+        "/api/v1/consultation/",
+        json={"patient_full_name": "Nameless", "consultation_date": "2026-01-01T09:00:00"},
+        headers=headers,
+    )
+    assert created.status_code == 201
+    detail = await client.get(f"/api/v1/consultation/{created.json()['id']}", headers=headers)
+    assert created.json()["doctor_name"] == detail.json()["doctor_name"] == doctor_user.email
+
+@pytest.mark.asyncio
+async def test_bulk_import_consultations_requires_admin(client: AsyncClient, doctor_token: str):
+    headers = {"Authorization": f"Bearer {doctor_token}"}
+    response = await client.post("/api/v1/consultation/bulk", content=b"{}", headers=headers)
+    assert response.status_code in (401, 403)
+
+@pytest.mark.asyncio
+async def test_export_consultations(client: AsyncClient, doctor_token: str, admin_token: str, async_session, doctor_user):
+    """Exports stream every matching row, scoped to the doctor like the list."""
+    other_doctor = User(email="exporter@test.com", full_name="Other", role=Role.DOCTOR, hashed_password="hashed")
+    cholera = Diagnosis(code="A00", description="Cholera")
+    async_session.add_all([other_doctor, cholera])
+    await async_session.flush()
+    async_session.add_all([
+        Consultation(
+            patient_full_name=f"Patient {i}",
+            doctor_id=doctor_user.id,
+            consultation_date=datetime(2026, 1, 1 + i),
+            notes=f"Notes, {i}",
+            diagnoses=[cholera] if i == 0 else [],
+        )
+        for i in range(3)
+    ] + [Consultation(patient_full_name="Not mine", doctor_id=other_doctor.id, consultation_date=datetime(2026, 1, 1))])
+    await async_session.commit()
+
+    headers = {"Authorization": f"Bearer {doctor_token}"}
+    response = await client.get("/api/v1/consultation/export", params={"sort": "consultation_date"}, headers=headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="consultations.csv"' in response.headers["content-disposition"]
+    header, *rows = list(csv.reader(io.StringIO(response.text)))
+    assert header == ["id", "patient_full_name", "doctor_id", "doctor_name", "consultation_date", "notes", "created_at", "diagnoses"]
+    assert [row[1] for row in rows] == ["Patient 0", "Patient 1", "Patient 2"]
+    assert rows[0][3:6] == [doctor_user.full_name, "2026-01-01T00:00:00", "Notes, 0"]
+    assert rows[0][7] == "A00"
+    assert rows[1][7] == ""
+
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await client.get(
+        "/api/v1/consultation/export", params={"format": "ndjson", "search": "Patient 1"}, headers=headers
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 1
+    assert lines[0]["patient_full_name"] == "Patient 1"
+    assert lines[0]["notes"] == "Notes, 1"
+    assert lines[0]["diagnoses"] == []
+
+    all_rows = (await client.get("/api/v1/consultation/export", params={"format": "ndjson"}, headers=headers)).text
+    assert len(all_rows.splitlines()) == 4
+
+@pytest.mark.asyncio
+async def test_get_consultation_etag(client: AsyncClient, doctor_token: str, async_session, doctor_user):
+    """Detail reads answer If-None-Match with 304 and change ETag when the doctor changes."""
+    consultation = Consultation(patient_full_name="Cached", doctor_id=doctor_user.id, consultation_date=datetime(2026, 3, 1))
+    async_session.add(consultation)
+    await async_session.commit()
+
+    headers = {"Authorization": f"Bearer {doctor_token}"}
+    url = f"/api/v1/consultation/{consultation.id}"
+    response = await client.get(url, headers=headers)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "private, no-cache"
+
+    cached = await client.get(url, headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    # The doctor's name is part of the representation
+    await user_service.update_user(session=async_session, db_user=doctor_user, user_in=UserUpdate(full_name="Dr. Renamed"))
+    response = await client.get(url, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["doctor_name"] == "Dr. Renamed"
+    assert response.headers["etag"] != etag
+
+@pytest.mark.asyncio
+async def test_get_consultation_etag_keeps_permission_check(client: AsyncClient, doctor_token: str, admin_token: str, async_session):
+    """A known ETag does not bypass the ownership check."""
+    other_doctor = User(email="etag-other@test.com", full_name="Other", role=Role.DOCTOR, hashed_password="hashed")
+    async_session.add(other_doctor)
+    await async_session.flush()
+    consultation = Consultation(patient_full_name="Private", doctor_id=other_doctor.id, consultation_date=datetime(2026, 3, 1))
+    async_session.add(consultation)
+    await async_session.commit()
+
+    url = f"/api/v1/consultation/{consultation.id}"
+    etag = (await client.get(url, headers={"Authorization": f"Bearer {admin_token}"})).headers["etag"]
+
+    response = await client.get(url, headers={"Authorization": f"Bearer {doctor_token}", "If-None-Match": etag})
+    assert response.status_code == 403
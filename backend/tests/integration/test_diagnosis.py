@@ -47,6 +47,10 @@ async def test_search_diagnoses_with_query(client: AsyncClient, doctor_token: st
     assert data["count"] == 1
     assert data["data"][0]["code"] == "I10"
 
+    # LIKE wildcards are matched literally
+    response = await client.get("/api/v1/diagnosis/", params={"search": "I_0"}, headers=headers)
+    assert response.json()["count"] == 0
+
 @pytest.mark.asyncio
 async def test_search_diagnoses_pagination(client: AsyncClient, doctor_token: str, async_session):
     """Test searching diagnoses with pagination."""
@@ -72,3 +76,91 @@ async def test_search_diagnoses_pagination(client: AsyncClient, doctor_token: st
     data = response.json()
     assert len(data["data"]) == 5
 
+
+@pytest.mark.asyncio
+async def test_search_diagnoses_cursor(client: AsyncClient, doctor_token: str, async_session):
+    """Test following next_cursor and rejecting cursors from another sort order."""
+    for i in range(4):
+        async_session.add(Diagnosis(code=f"L{i:02d}", description=f"Desc {i}"))
+    await async_session.commit()
+
+    headers = {"Authorization": f"Bearer {doctor_token}"}
+
+    response = await client.get("/api/v1/diagnosis/?limit=3&sort=code", headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert [d["code"] for d in data["data"]] == ["L00", "L01", "L02"]
+    assert data["next_cursor"]
+
+    response = await client.get(
+        "/api/v1/diagnosis/", params={"limit": 3, "sort": "code", "cursor": data["next_cursor"]}, headers=headers
+    )
+    assert response.status_code == 200
+    page = response.json()
+    assert [d["code"] for d in page["data"]] == ["L03"]
+    assert page["next_cursor"] is None
+
+    response = await client.get(
+        "/api/v1/diagnosis/", params={"limit": 3, "sort": "-code", "cursor": data["next_cursor"]}, headers=headers
+    )
+    assert response.status_code == 400
+
+    response = await client.get("/api/v1/diagnosis/?cursor=not-a-cursor", headers=headers)
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_diagnoses_admin(client: AsyncClient, admin_token: str):
+    """Test that admins can bulk insert and update diagnoses."""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    payload = {"diagnoses": [
+        {"code": "Z00.00", "description": "General adult medical examination"},
+        {"code": "Z00.01", "description": "General adult medical examination with abnormal findings"},
+    ]}
+    response = await client.post("/api/v1/diagnosis/bulk", json=payload, headers=headers)
+    assert response.status_code == 200
+    assert response.json() == {"received": 2, "added": 2, "changed": 0, "unchanged": 0, "retired": None}
+
+    payload["diagnoses"][0]["description"] = "Encounter for general adult medical examination"
+    response = await client.post("/api/v1/diagnosis/bulk", json=payload, headers=headers)
+    assert response.json()["changed"] == 1
+    assert response.json()["unchanged"] == 1
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_diagnoses_forbidden_for_doctor(client: AsyncClient, doctor_token: str):
+    """Test that doctors cannot bulk upsert diagnoses."""
+    headers = {"Authorization": f"Bearer {doctor_token}"}
+    payload = {"diagnoses": [{"code": "Z00.00", "description": "General adult medical examination"}]}
+    response = await client.post("/api/v1/diagnosis/bulk", json=payload, headers=headers)
+    assert response.status_code == 403
+
+@pytest.mark.asyncio
+async def test_search_diagnoses_etag(client: AsyncClient, doctor_token: str, admin_token: str, async_session):
+    """Searches carry a catalog-versioned ETag and answer If-None-Match with 304."""
+    async_session.add(Diagnosis(code="J00", description="Acute nasopharyngitis"))
+    await async_session.commit()
+
+    headers = {"Authorization": f"Bearer {doctor_token}"}
+    response = await client.get("/api/v1/diagnosis/", params={"search": "naso"}, headers=headers)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert "public" in response.headers["cache-control"]
+    assert "s-maxage" in response.headers["cache-control"]
+
+    cached = await client.get("/api/v1/diagnosis/", params={"search": "naso"}, headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+
+    other_query = await client.get("/api/v1/diagnosis/", params={"search": "naso", "limit": 5}, headers=headers)
+    assert other_query.headers["etag"] != etag
+
+    # Any catalog write bumps the version
+    response = await client.post(
+        "/api/v1/diagnosis/bulk",
+        json={"diagnoses": [{"code": "J01.0", "description": "Acute maxillary sinusitis"}]},
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+    assert response.status_code == 200
+    refreshed = await client.get("/api/v1/diagnosis/", params={"search": "naso"}, headers={**headers, "If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.headers["etag"] != etag
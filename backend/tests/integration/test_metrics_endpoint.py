@@ -0,0 +1,77 @@
+import re
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.core.metrics import instrument_engine, _after_cursor_execute, _before_cursor_execute
+from tests.conftest import test_engine
+
+
+@pytest.fixture
+def metrics_token(monkeypatch) -> str:
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+    return "scrape-secret"
+
+
+@pytest.fixture
+def instrumented_test_engine():
+    """The app's engines are instrumented when created; the test engine is not."""
+    instrument_engine(test_engine)
+    yield
+    event.remove(test_engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.remove(test_engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _sample(text: str, name: str, **labels: str) -> float:
+    label_text = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    match = re.search(rf"^{name}\{{{re.escape(label_text)}\}} (\S+)$", text, re.MULTILINE)
+    assert match, f"{name}{{{label_text}}} not found"
+    return float(match.group(1))
+
+
+@pytest.mark.asyncio
+async def test_metrics_disabled_without_token(client: AsyncClient):
+    response = await client.get("/metrics")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_metrics_requires_token(client: AsyncClient, metrics_token: str, admin_token: str):
+    response = await client.get("/metrics")
+    assert response.status_code == 401
+
+    # A user's JWT is not a metrics token
+    response = await client.get("/metrics", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_metrics_per_route(client: AsyncClient, metrics_token: str, doctor_token: str, instrumented_test_engine):
+    headers = {"Authorization": f"Bearer {metrics_token}"}
+    before = (await client.get("/metrics", headers=headers)).text
+    route = {"method": "GET", "route": "/api/v1/diagnosis/"}
+    previous = _sample(before, "http_request_duration_seconds_count", **route) if "/api/v1/diagnosis/" in before else 0
+
+    for _ in range(2):
+        response = await client.get("/api/v1/diagnosis/", params={"search": "A00"}, headers={"Authorization": f"Bearer {doctor_token}"})
+        assert response.status_code == 200
+    await client.get("/api/v1/no-such-route")
+
+    response = await client.get("/metrics", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+
+    assert _sample(text, "http_request_duration_seconds_count", **route) == previous + 2
+    assert _sample(text, "http_requests_total", **route, status="200") >= 2
+    assert _sample(text, "http_requests_total", method="GET", route="unmatched", status="404") >= 1
+    # The search queries the database (no catalog snapshot in tests) and reads the catalog version from Redis
+    assert _sample(text, "http_request_db_statements_sum", **route) > 0
+    assert _sample(text, "http_request_db_seconds_sum", **route) > 0
+    assert _sample(text, "http_request_redis_round_trips_sum", **route) > 0
+    assert _sample(text, "http_response_size_bytes_sum", **route) > 0
+    # The scrape itself is in flight
+    assert _sample(text, "http_requests_in_flight", method="GET", route="/metrics") == 1
+    assert _sample(text, "db_pool_size", pool="primary") == settings.DB_POOL_SIZE
@@ -0,0 +1,138 @@
+"""
+Statement budgets of the hot endpoints.
+
+Each list is seeded with several rows and diagnoses, so loading a relation
+per row (an N+1) breaks the budget and the repeated-shape check.
+"""
+import pytest
+from datetime import datetime
+from httpx import AsyncClient
+
+from app.modules.analytics.service import rebuild_rollups
+from app.modules.consultation.models import Consultation
+from app.modules.diagnoses.models import Diagnosis
+from tests.query_budget import max_queries
+
+
+@pytest.fixture
+async def consultations(async_session, doctor_user, admin_user) -> list[Consultation]:
+    diagnoses = [Diagnosis(code=f"B{i:02d}", description=f"Budget diagnosis {i}") for i in range(3)]
+    rows = [
+        Consultation(
+            patient_full_name=f"Budget Patient {i}",
+            doctor_id=doctor_user.id,
+            consultation_date=datetime(2026, 1, 1 + i),
+            diagnoses=diagnoses[: i % 3 + 1],
+        )
+        for i in range(10)
+    ]
+    async_session.add_all(rows)
+    await async_session.commit()
+    # Written behind the service's back, so count them in the analytics rollups
+    await rebuild_rollups(session=async_session)
+    return rows
+
+
+async def _authenticate(client: AsyncClient, token: str) -> dict[str, str]:
+    """Headers for `token`, with its user already in the principal cache."""
+    headers = {"Authorization": f"Bearer {token}"}
+    assert (await client.get("/api/v1/users/me", headers=headers)).status_code == 200
+    return headers
+
+
+@pytest.mark.asyncio
+async def test_authentication_budget(client: AsyncClient, doctor_token: str):
+    headers = {"Authorization": f"Bearer {doctor_token}"}
+    # One lookup for the principal, then served from the cache
+    with max_queries(1):
+        assert (await client.get("/api/v1/users/me", headers=headers)).status_code == 200
+    with max_queries(0):
+        assert (await client.get("/api/v1/users/me", headers=headers)).status_code == 200
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sort", ["-created_at", "consultation_date", "-patient_name"])
+async def test_consultation_list_budget(client: AsyncClient, doctor_token: str, admin_token: str, consultations, sort: str):
+    for token in (doctor_token, admin_token):
+        headers = await _authenticate(client, token)
+        with max_queries(1):
+            response = await client.get("/api/v1/consultation/", params={"sort": sort, "search": "Budget"}, headers=headers)
+        assert response.status_code == 200
+        assert len(response.json()["data"]) == 10
+
+
+@pytest.mark.asyncio
+async def test_consultation_list_cursor_budget(client: AsyncClient, doctor_token: str, consultations):
+    headers = await _authenticate(client, doctor_token)
+    first = (await client.get("/api/v1/consultation/", params={"limit": 4, "count_mode": "none"}, headers=headers)).json()
+    with max_queries(1):
+        response = await client.get(
+            "/api/v1/consultation/", params={"limit": 4, "count_mode": "none", "cursor": first["next_cursor"]}, headers=headers
+        )
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_consultation_detail_budget(client: AsyncClient, doctor_token: str, consultations):
+    headers = await _authenticate(client, doctor_token)
+    # Version lookup (permissions and ETag), then the detail
+    with max_queries(2):
+        response = await client.get(f"/api/v1/consultation/{consultations[2].id}", headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()["diagnoses"]) == 3
+
+    with max_queries(1):
+        response = await client.get(
+            f"/api/v1/consultation/{consultations[2].id}", headers={**headers, "If-None-Match": response.headers["etag"]}
+        )
+    assert response.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_create_consultation_budget(client: AsyncClient, doctor_token: str, consultations):
+    headers = await _authenticate(client, doctor_token)
+    diagnosis_ids = [str(diagnosis.id) for diagnosis in consultations[2].diagnoses]
+    # Doctor and diagnoses lookups, one insert per table and one upsert per analytics
+    # rollup; the response is not re-fetched
+    with max_queries(6):
+        response = await client.post(
+            "/api/v1/consultation/",
+            json={"patient_full_name": "New Patient", "consultation_date": "2026-02-01T10:00:00", "diagnosis_ids": diagnosis_ids},
+            headers=headers,
+        )
+    assert response.status_code == 201
+    assert [diagnosis["code"] for diagnosis in response.json()["diagnoses"]] == ["B00", "B01", "B02"]
+
+
+@pytest.mark.asyncio
+async def test_consultation_export_budget(client: AsyncClient, doctor_token: str, consultations):
+    headers = await _authenticate(client, doctor_token)
+    # One streamed statement whatever the row count, without buffering the export
+    with max_queries(1, max_memory=2 * 1024 * 1024):
+        response = await client.get("/api/v1/consultation/export", params={"format": "ndjson"}, headers=headers)
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == 10
+
+
+@pytest.mark.asyncio
+async def test_diagnosis_search_and_users_list_budget(client: AsyncClient, doctor_token: str, admin_token: str, consultations):
+    headers = await _authenticate(client, doctor_token)
+    with max_queries(1):
+        assert (await client.get("/api/v1/diagnosis/", params={"search": "budget"}, headers=headers)).status_code == 200
+
+    headers = await _authenticate(client, admin_token)
+    with max_queries(1):
+        assert (await client.get("/api/v1/users/", headers=headers)).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_analytics_budget(client: AsyncClient, admin_token: str, consultations):
+    headers = await _authenticate(client, admin_token)
+    params = {"date_from": "2026-01-01", "date_to": "2026-12-31"}
+    # Served from the rollups, never from the consultations
+    with max_queries(1):
+        response = await client.get("/api/v1/analytics/consultations/daily", params=params, headers=headers)
+    assert sum(day["consultations"] for day in response.json()) == 10
+    with max_queries(1):
+        response = await client.get("/api/v1/analytics/diagnoses/top", params=params, headers=headers)
+    assert [row["code"] for row in response.json()] == ["B00", "B01", "B02"]
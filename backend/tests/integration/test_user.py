@@ -2,6 +2,11 @@ import pytest
 from httpx import AsyncClient
 
 from app.modules.user.models import User, Role
+from app.modules.user.schemas import UserUpdate
+from app.modules.user.cache import principal_cache
+from app.modules.user import service as user_service
+from app.main import app
+from app.core.database import get_read_db
 
 
 @pytest.mark.asyncio
@@ -216,3 +221,56 @@ async def test_get_users_forbidden_doctor(client: AsyncClient, doctor_user: User
     
     # Should be forbidden since only admins can list users
     assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_read_user_me_cached_principal_invalidated_on_update(
+    client: AsyncClient, async_session, doctor_user: User, doctor_token: str
+):
+    """Test that deactivating a user takes effect despite the principal cache."""
+    headers = {"Authorization": f"Bearer {doctor_token}"}
+    response = await client.get("/api/v1/users/me", headers=headers)
+    assert response.status_code == 200
+    assert principal_cache.get(doctor_user.email) is not None
+
+    await user_service.update_user(
+        session=async_session, db_user=doctor_user, user_in=UserUpdate(is_active=False)
+    )
+    assert principal_cache.get(doctor_user.email) is None
+
+    response = await client.get("/api/v1/users/me", headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Inactive user"
+
+@pytest.mark.asyncio
+async def test_principal_loaded_from_primary(client: AsyncClient, doctor_user: User, doctor_token: str):
+    """Test that principals are never loaded from a replica, which may lag behind an eviction."""
+    async def no_replica():
+        raise AssertionError("replica session requested")
+        yield
+
+    app.dependency_overrides[get_read_db] = no_replica
+    response = await client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {doctor_token}"})
+    assert response.status_code == 200
+    assert response.json()["email"] == doctor_user.email
+
+@pytest.mark.asyncio
+async def test_read_user_me_etag(client: AsyncClient, doctor_token: str, async_session, doctor_user):
+    """/users/me answers If-None-Match from the cached principal and changes on update."""
+    headers = {"Authorization": f"Bearer {doctor_token}"}
+    response = await client.get("/api/v1/users/me", headers=headers)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "private, no-cache"
+
+    cached = await client.get("/api/v1/users/me", headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+
+    await user_service.update_user(
+        session=async_session, db_user=doctor_user, user_in=UserUpdate(full_name="Renamed Doctor")
+    )
+    response = await client.get("/api/v1/users/me", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["full_name"] == "Renamed Doctor"
+    assert response.headers["etag"] != etag
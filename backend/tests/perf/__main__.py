@@ -0,0 +1,66 @@
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+from tests.perf.bench import (
+    BASELINES_PATH,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_ROUNDS,
+    DEFAULT_TOLERANCE,
+    PERF_POSTGRES_URL,
+    SCENARIOS,
+    compare,
+    load_baselines,
+    run,
+    update_baselines,
+)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m tests.perf", description="Benchmark the API endpoints.")
+    parser.add_argument("--only", action="append", choices=[scenario.name for scenario in SCENARIOS],
+                        help="Run only this scenario (repeatable)")
+    parser.add_argument("--requests", type=int, help="Requests per scenario, instead of each scenario's default")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS, help="Rounds per scenario, metrics are their median")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed relative regression against the baselines (default: %(default)s)")
+    parser.add_argument("--output", type=Path, default=Path("perf-results.json"))
+    parser.add_argument("--update-baselines", action="store_true", help=f"Record the results in {BASELINES_PATH.name}")
+    args = parser.parse_args()
+
+    document = asyncio.run(run(
+        database_url=PERF_POSTGRES_URL,
+        only=args.only,
+        concurrency=args.concurrency,
+        requests=args.requests,
+        rounds=args.rounds,
+    ))
+    args.output.write_text(json.dumps(document, indent=2) + "\n")
+    print(f"Results written to {args.output}")
+
+    if args.update_baselines:
+        update_baselines(document)
+        print(f"Baselines updated for {document['backend']}")
+        return 0
+
+    baseline = load_baselines().get(document["backend"])
+    if baseline is None:
+        print(f"No {document['backend']} baselines, record them with --update-baselines")
+        return 0
+    if baseline["concurrency"] != document["concurrency"]:
+        print(f"Baselines were recorded with concurrency {baseline['concurrency']}, not comparing")
+        return 0
+
+    regressions = compare(document["scenarios"], baseline["scenarios"], args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not regressions:
+        print(f"No regressions beyond {args.tolerance:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Statement budgets for integration tests.
+
+    with max_queries(3):
+        response = await client.get("/api/v1/consultation/", headers=headers)
+
+fails the test when the block runs more than 3 statements on the test
+engine, or runs the same statement shape more than once (the signature of
+an N+1: one query per row of a previous result). Shapes ignore bound
+values and the length of expanded IN lists. Pass `max_repeats` when a
+repetition is intended, and `max_memory` (bytes) to also bound the peak
+Python allocation of the block, traced with tracemalloc.
+
+Counts include everything the request does, authentication too: the
+principal cache is cleared for every test, so a test's first request also
+looks up its user.
+"""
+import re
+import tracemalloc
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from tests.conftest import test_engine
+
+_IN_LIST = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)|\((?:\s*\$\d+\s*,)+\s*\$\d+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize a statement so executions that differ only in their values compare equal."""
+    return _IN_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+@dataclass
+class QueryLog:
+    statements: list[str] = field(default_factory=list)
+    # Peak traced allocation in bytes, when memory is traced
+    peak_memory: int | None = None
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def repeated(self, max_repeats: int) -> dict[str, int]:
+        shapes = Counter(statement_shape(statement) for statement in self.statements)
+        return {shape: count for shape, count in shapes.items() if count > max_repeats}
+
+    def describe(self) -> str:
+        return "\n".join(f"  {index}. {statement_shape(statement)}" for index, statement in enumerate(self.statements, 1))
+
+
+@contextmanager
+def capture_queries(engine: AsyncEngine = test_engine, *, trace_memory: bool = False) -> Iterator[QueryLog]:
+    """Record the statements executed on `engine` inside the block."""
+    log = QueryLog()
+
+    def before(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        log.statements.append(statement)
+
+    tracing = trace_memory and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    if trace_memory:
+        tracemalloc.reset_peak()
+    event.listen(engine.sync_engine, "before_cursor_execute", before)
+    try:
+        yield log
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before)
+        if trace_memory:
+            log.peak_memory = tracemalloc.get_traced_memory()[1]
+        if tracing:
+            tracemalloc.stop()
+
+
+@contextmanager
+def max_queries(
+    limit: int,
+    *,
+    max_repeats: int = 1,
+    max_memory: int | None = None,
+    engine: AsyncEngine = test_engine,
+) -> Iterator[QueryLog]:
+    """Fail when the block exceeds its statement budget, repeats a statement shape or, optionally, allocates too much."""
+    with capture_queries(engine, trace_memory=max_memory is not None) as log:
+        yield log
+
+    assert log.count <= limit, f"{log.count} statements, budget is {limit}:\n{log.describe()}"
+    repeated = log.repeated(max_repeats)
+    assert not repeated, "Possible N+1, statements repeated:\n" + "\n".join(
+        f"  {count}x {shape}" for shape, count in repeated.items()
+    )
+    if max_memory is not None:
+        assert log.peak_memory is not None and log.peak_memory <= max_memory, (
+            f"Peak allocation {log.peak_memory} bytes, budget is {max_memory}"
+        )
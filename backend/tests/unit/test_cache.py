@@ -0,0 +1,39 @@
+from app.core import cache as cache_module
+from app.core.cache import TTLCache
+
+
+def test_ttl_cache_expiry(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now)
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl=60)
+
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+
+    now += 61
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_discards_stale_loads():
+    """A value loaded before an invalidation must not be cached afterwards."""
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl=60)
+    epoch = cache.epoch
+    cache.invalidate("a")
+    cache.set("a", 1, epoch)
+    assert cache.get("a") is None
+
+    cache.set("a", 2, cache.epoch)
+    assert cache.get("a") == 2
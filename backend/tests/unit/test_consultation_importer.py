@@ -0,0 +1,21 @@
+import pytest
+
+from app.modules.consultation.importer import read_lines
+
+
+async def _chunks(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+@pytest.mark.asyncio
+async def test_read_lines_across_chunks():
+    lines = [line async for line in read_lines(_chunks(b'{"a"', b': 1}\n{"b": 2}\n', b"", b'{"c": 3}'))]
+    assert lines == [b'{"a": 1}', b'{"b": 2}', b'{"c": 3}']
+
+
+@pytest.mark.asyncio
+async def test_read_lines_keeps_blank_lines():
+    # Blank lines still count towards resume offsets
+    lines = [line async for line in read_lines(_chunks(b"x\n\ny\n"))]
+    assert lines == [b"x", b"", b"y"]
@@ -0,0 +1,162 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.query_builder import decode_cursor
+from app.core.schemas import CountMode, PaginationParams, SortParams, SearchParams
+from app.modules.diagnoses import service as diagnosis_service
+from app.modules.diagnoses.catalog import CatalogSnapshot, diagnosis_catalog
+from app.modules.diagnoses.models import Diagnosis
+from app.modules.diagnoses.schemas import DiagnosisCreate
+
+ROWS = [
+    ("E03.9", "Hypothyroidism, unspecified"),
+    ("E05.90", "Thyrotoxicosis, unspecified"),
+    ("I10", "Essential (primary) hypertension"),
+    ("A00.0", "Cholera due to Vibrio cholerae 01"),
+    ("E01.8", "Other iodine-deficiency related thyroid disorders"),
+]
+
+
+@pytest.fixture
+def snapshot() -> CatalogSnapshot:
+    start = datetime(2026, 1, 1)
+    rows = [
+        (uuid.uuid4(), code, description, start + timedelta(days=i))
+        for i, (code, description) in enumerate(ROWS)
+    ]
+    return CatalogSnapshot(rows, version=1)
+
+
+@pytest.fixture
+async def reset_catalog():
+    yield
+    await diagnosis_catalog.stop()
+
+
+def test_snapshot_match_substrings(snapshot: CatalogSnapshot):
+    """Test that matching mirrors case-insensitive ILIKE on code and description."""
+    assert [snapshot.codes[i] for i in snapshot.match("THYRO")] == ["E01.8", "E03.9", "E05.90"]
+    assert [snapshot.codes[i] for i in snapshot.match("e0")] == ["E01.8", "E03.9", "E05.90"]
+    assert [snapshot.codes[i] for i in snapshot.match("1")] == ["A00.0", "E01.8", "I10"]
+    assert snapshot.match("not in the catalog") == []
+
+
+def test_snapshot_code_lookup(snapshot: CatalogSnapshot):
+    """Test exact and prefix lookups on the sorted code array."""
+    index = snapshot.find("i10")
+    assert index is not None and snapshot.codes[index] == "I10"
+    assert snapshot.find("I1") is None
+    assert [snapshot.codes[i] for i in snapshot.with_prefix("e0")] == ["E01.8", "E03.9", "E05.90"]
+
+
+def test_snapshot_query_sort_and_paginate(snapshot: CatalogSnapshot):
+    """Test sorting, paging and counting like the database path."""
+    result = snapshot.query(
+        pagination=PaginationParams(skip=1, limit=2),
+        sort=SortParams(sort="-description"),
+        search=SearchParams(search="thyro"),
+    )
+    assert [d.code for d in result.data] == ["E01.8", "E03.9"]
+    assert result.count == 3
+    assert result.has_more is False
+
+    result = snapshot.query(
+        pagination=PaginationParams(skip=0, limit=2, count_mode=CountMode.NONE),
+        sort=SortParams(sort="created_at"),
+        search=SearchParams(search=None),
+    )
+    assert [d.code for d in result.data] == ["E03.9", "E05.90"]
+    assert result.count is None
+    assert result.has_more is True
+    cursor = decode_cursor(result.next_cursor)
+    assert (cursor["f"], cursor["id"]) == ("created_at", str(result.data[-1].id))
+
+
+def test_snapshot_matches_wildcards_literally(snapshot: CatalogSnapshot):
+    """Test that `%` and `_` are plain characters, as on the escaped database path."""
+    assert snapshot.match("%") == []
+    assert snapshot.match("E_3") == []
+    assert [snapshot.codes[i] for i in snapshot.match("(primary)")] == ["I10"]
+
+
+def test_snapshot_match_stays_within_a_column(snapshot: CatalogSnapshot):
+    """Test that a term never matches across the end of the code and the description."""
+    assert snapshot.match("i10\nessential") == []
+    assert snapshot.match("10 essential") == []
+
+
+def test_snapshot_ranks_like_postgres():
+    """Test that ranked snapshots order matches by trigram similarity, then the sort."""
+    rows = [(uuid.uuid4(), code, description, datetime(2026, 1, 1)) for code, description in ROWS]
+    snapshot = CatalogSnapshot(rows, version=1, ranked=True)
+
+    result = snapshot.query(
+        pagination=PaginationParams(skip=0, limit=2),
+        sort=SortParams(sort="-code"),
+        search=SearchParams(search="thyro"),
+    )
+    # Thyrotoxicosis starts with the term; the other two tie and follow the sort
+    assert [d.code for d in result.data] == ["E05.90", "E03.9"]
+    assert result.has_more is True
+    assert result.next_cursor is None
+
+
+@pytest.mark.asyncio
+async def test_service_uses_catalog_and_invalidates_on_write(async_session: AsyncSession, reset_catalog):
+    """Test that searches are served from the catalog and writes drop the snapshot."""
+    async_session.add(Diagnosis(code="H00", description="Hordeolum and chalazion"))
+    await async_session.commit()
+
+    await diagnosis_catalog.load(async_session)
+    assert diagnosis_catalog.snapshot is not None
+
+    result = await diagnosis_service.get_diagnoses(
+        session=async_session,
+        pagination=PaginationParams(skip=0, limit=10),
+        sort=SortParams(sort="code"),
+        search=SearchParams(search="chalaz"),
+    )
+    assert [d.code for d in result.data] == ["H00"]
+
+    await diagnosis_service.create_diagnosis(
+        session=async_session,
+        diagnosis=DiagnosisCreate(code="H01", description="Other inflammation of eyelid"),
+    )
+    assert diagnosis_catalog.snapshot is None or diagnosis_catalog.snapshot.find("H01") is not None
+
+    # While the catalog reloads, searches fall back to the database
+    diagnosis_catalog.snapshot = None
+    result = await diagnosis_service.get_diagnoses(
+        session=async_session,
+        pagination=PaginationParams(skip=0, limit=10),
+        sort=SortParams(sort="code"),
+        search=SearchParams(search="eyelid"),
+    )
+    assert [d.code for d in result.data] == ["H01"]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_cursor_continues_on_database(async_session: AsyncSession, reset_catalog):
+    """Test that a snapshot page's cursor resumes at the right row on the database path."""
+    descriptions = ["alpha", "Beta", "_under", "Zeta", "beta", "[bracket", "éclair", "Alpha"]
+    async_session.add_all(
+        Diagnosis(code=f"M{i:02d}", description=description) for i, description in enumerate(descriptions)
+    )
+    await async_session.commit()
+    await diagnosis_catalog.load(async_session)
+
+    sort, search = SortParams(sort="description"), SearchParams(search=None)
+    first = await diagnosis_service.get_diagnoses(
+        session=async_session, pagination=PaginationParams(skip=0, limit=3), sort=sort, search=search
+    )
+    rest = await diagnosis_service.get_diagnoses(
+        session=async_session,
+        pagination=PaginationParams(skip=0, limit=10, cursor=first.next_cursor),
+        sort=sort,
+        search=search,
+    )
+    served = [d.description for d in first.data] + [d.description for d in rest.data]
+    assert served == sorted(descriptions)
@@ -0,0 +1,117 @@
+from pathlib import Path
+
+import pytest
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.modules.diagnoses import service as diagnosis_service
+from app.modules.diagnoses.loader import ReleaseFormatError, detect_format, normalize_code, read_release
+from app.modules.diagnoses.models import Diagnosis
+
+ORDER_FILE = (
+    "00001 A00     0 Cholera                                                      Cholera\n"
+    "00002 A000    1 Cholera due to Vibrio cholerae 01, biovar cholerae           Cholera due to Vibrio cholerae 01, biovar cholerae\n"
+    "00003 A009    1 Cholera, unspecified                                         Cholera, unspecified\n"
+)
+
+TABULAR_XML = """<?xml version="1.0" encoding="utf-8"?>
+<ICD10CM.tabular>
+  <chapter>
+    <name>1</name>
+    <desc>Certain infectious and parasitic diseases (A00-B99)</desc>
+    <section id="A00-A09">
+      <diag>
+        <name>A00</name>
+        <desc>Cholera</desc>
+        <diag><name>A00.0</name><desc>Cholera due to Vibrio cholerae 01, biovar cholerae</desc></diag>
+        <diag><name>A00.9</name><desc>Cholera, unspecified</desc></diag>
+      </diag>
+    </section>
+  </chapter>
+</ICD10CM.tabular>
+"""
+
+BILLABLE = [
+    ("A00.0", "Cholera due to Vibrio cholerae 01, biovar cholerae"),
+    ("A00.9", "Cholera, unspecified"),
+]
+
+
+def test_normalize_code():
+    assert normalize_code("a000 ") == "A00.0"
+    assert normalize_code("A00") == "A00"
+    assert normalize_code("S52.521A") == "S52.521A"
+
+
+def test_read_order_file(tmp_path: Path):
+    path = tmp_path / "icd10cm_order_2026.txt"
+    path.write_text(ORDER_FILE)
+
+    assert detect_format(path) == "order"
+    assert list(read_release(path)) == BILLABLE
+    assert list(read_release(path, include_headers=True)) == [("A00", "Cholera"), *BILLABLE]
+
+
+def test_read_codes_tab_and_csv_files(tmp_path: Path):
+    codes = tmp_path / "icd10cm_codes_2026.txt"
+    codes.write_text("A000    Cholera due to Vibrio cholerae 01, biovar cholerae\nA009    Cholera, unspecified\n")
+    tab = tmp_path / "release.tsv"
+    tab.write_text("A00.0\tCholera due to Vibrio cholerae 01, biovar cholerae\nA00.9\tCholera, unspecified\n")
+    comma = tmp_path / "release.csv"
+    comma.write_text('description,code\n"Cholera due to Vibrio cholerae 01, biovar cholerae",A000\n"Cholera, unspecified",A009\n')
+
+    assert detect_format(codes) == "codes"
+    for path in (codes, tab, comma):
+        assert list(read_release(path)) == BILLABLE
+
+
+def test_read_tabular_xml(tmp_path: Path):
+    path = tmp_path / "icd10cm_tabular_2026.xml"
+    path.write_text(TABULAR_XML)
+
+    assert list(read_release(path)) == BILLABLE
+    assert list(read_release(path, include_headers=True)) == [*BILLABLE, ("A00", "Cholera")]
+
+
+def test_read_release_rejects_oversized_codes(tmp_path: Path):
+    path = tmp_path / "release.tsv"
+    path.write_text("A00.0123456789\tToo long\n")
+    with pytest.raises(ReleaseFormatError):
+        list(read_release(path))
+
+
+@pytest.mark.asyncio
+async def test_upsert_diagnoses_counts(async_session: AsyncSession):
+    """Test that a load reports added, changed, unchanged and retired codes."""
+    async_session.add_all([
+        Diagnosis(code="A00.0", description="Cholera"),
+        Diagnosis(code="A00.9", description="Cholera, unspecified"),
+        Diagnosis(code="A01.0", description="Typhoid fever"),
+    ])
+    await async_session.commit()
+
+    result = await diagnosis_service.upsert_diagnoses(
+        session=async_session,
+        records=[*BILLABLE, ("A02.0", "Salmonella enteritis"), ("A02.0", "Duplicate, ignored")],
+        full_release=True,
+    )
+
+    assert (result.received, result.added, result.changed, result.unchanged, result.retired) == (3, 1, 1, 1, 1)
+    diagnoses = {d.code: d.description for d in (await async_session.exec(select(Diagnosis))).all()}
+    assert diagnoses["A00.0"] == BILLABLE[0][1]
+    assert diagnoses["A02.0"] == "Salmonella enteritis"
+    # Retired codes are kept for existing consultations
+    assert "A01.0" in diagnoses
+
+
+@pytest.mark.asyncio
+async def test_insert_only_load_keeps_descriptions(async_session: AsyncSession):
+    """Test that a load with `update=False` only adds new codes."""
+    async_session.add(Diagnosis(code="A00.0", description="Curated description"))
+    await async_session.commit()
+
+    result = await diagnosis_service.upsert_diagnoses(session=async_session, records=BILLABLE, update=False)
+
+    assert (result.received, result.added, result.changed) == (2, 1, 0)
+    diagnoses = {d.code: d.description for d in (await async_session.exec(select(Diagnosis))).all()}
+    assert diagnoses["A00.0"] == "Curated description"
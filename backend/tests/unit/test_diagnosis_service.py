@@ -139,3 +139,31 @@ async def test_get_diagnoses_sort(async_session: AsyncSession):
     assert result.data[0].description == "C"
     assert result.data[1].description == "B"
     assert result.data[2].description == "A"
+
+@pytest.mark.asyncio
+async def test_get_diagnoses_cursor_pagination(async_session: AsyncSession):
+    """Test walking diagnoses page by page with keyset cursors."""
+    for i in range(7):
+        async_session.add(Diagnosis(code=f"K0{i}", description=f"Description {i}"))
+    await async_session.commit()
+
+    sort = SortParams(sort="-code")
+    search = SearchParams(search=None)
+
+    codes = []
+    cursor = None
+    for _ in range(3):
+        result = await diagnosis_service.get_diagnoses(
+            session=async_session,
+            pagination=PaginationParams(skip=0, limit=3, cursor=cursor),
+            sort=sort,
+            search=search
+        )
+        codes.extend(d.code for d in result.data)
+        assert result.count == 7
+        cursor = result.next_cursor
+        if cursor is None:
+            break
+
+    assert codes == [f"K0{i}" for i in reversed(range(7))]
+    assert cursor is None
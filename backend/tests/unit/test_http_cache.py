@@ -0,0 +1,26 @@
+from starlette.requests import Request
+
+from app.core.http_cache import etag_matches, make_etag
+
+
+def _request(if_none_match: str | None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match is not None else []
+    return Request({"type": "http", "headers": headers})
+
+
+def test_make_etag_depends_on_version_and_parts():
+    etag = make_etag(3, "term", 0, 100)
+    assert etag.startswith('"3-') and etag.endswith('"')
+    assert make_etag(3, "term", 0, 100) == etag
+    assert make_etag(4, "term", 0, 100) != etag
+    assert make_etag(3, "term", 100, 100) != etag
+    assert make_etag(7) == '"7"'
+
+
+def test_etag_matches():
+    etag = make_etag(1, "x")
+    assert etag_matches(_request(etag), etag)
+    assert etag_matches(_request(f'"other", W/{etag}'), etag)
+    assert etag_matches(_request("*"), etag)
+    assert not etag_matches(_request('"other"'), etag)
+    assert not etag_matches(_request(None), etag)
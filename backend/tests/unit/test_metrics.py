@@ -0,0 +1,72 @@
+import math
+
+import pytest
+
+from app.core.metrics import Histogram, PrometheusText, RequestMetrics, RequestStats
+
+
+class _Route:
+    path = "/api/v1/items/{item_id}"
+
+
+def test_prometheus_text_format():
+    histogram = Histogram((0.1, 1.0))
+    histogram.observe(0.05)
+    histogram.observe(2.0)
+
+    text = PrometheusText()
+    text.counter("requests_total", "Requests", [({"route": 'a"b\\c'}, 3)])
+    text.histogram("latency_seconds", "Latency", [({"route": "/x"}, histogram)])
+
+    assert text.render().splitlines() == [
+        "# HELP requests_total Requests",
+        "# TYPE requests_total counter",
+        'requests_total{route="a\\"b\\\\c"} 3',
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/x",le="0.1"} 1',
+        'latency_seconds_bucket{route="/x",le="1.0"} 1',
+        'latency_seconds_bucket{route="/x",le="+Inf"} 2',
+        'latency_seconds_sum{route="/x"} 2.05',
+        'latency_seconds_count{route="/x"} 2',
+    ]
+
+
+def test_histogram_quantile_interpolates_within_bucket():
+    histogram = Histogram((0.1, 1.0))
+    assert histogram.quantile(0.99) == 0.0
+
+    for _ in range(50):
+        histogram.observe(0.05)
+    for _ in range(50):
+        histogram.observe(0.5)
+    assert histogram.quantile(0.5) == pytest.approx(0.1)
+    assert histogram.quantile(0.99) == pytest.approx(0.1 + 0.9 * 49 / 50)
+
+    histogram.observe(5.0)
+    assert histogram.quantile(1.0) == math.inf
+
+
+def test_request_metrics_group_by_route_template():
+    metrics = RequestMetrics()
+    stats = RequestStats()
+    stats.db_statements = 2
+    routed = {"type": "http", "method": "GET", "route": _Route()}
+
+    metrics.observe(routed, 200, 0.01, 120, stats)
+    metrics.observe(dict(routed), 404, 0.02, 20, RequestStats())
+    metrics.observe({"type": "http", "method": "GET"}, 404, 0.001, 10, RequestStats())
+    metrics.observe({**routed, "method": "PROPFIND-1234"}, 405, 0.001, 10, RequestStats())
+
+    route = metrics.routes[("GET", "/api/v1/items/{item_id}")]
+    assert route.statuses == {200: 1, 404: 1}
+    assert route.duration.count == 2
+    assert route.db_statements.sum == 2
+    assert metrics.routes[("GET", "unmatched")].statuses == {404: 1}
+    # Non-standard methods share one label
+    assert metrics.routes[("other", "/api/v1/items/{item_id}")].statuses == {405: 1}
+
+    # Requests not routed yet count as unmatched until the router sets their route
+    metrics.active[1] = routed
+    metrics.active[2] = {"type": "http", "method": "POST"}
+    assert metrics.in_flight() == {("GET", "/api/v1/items/{item_id}"): 1, ("POST", "unmatched"): 1}
@@ -0,0 +1,63 @@
+import json
+
+from tests.perf.bench import aggregate, compare, percentile, summarize, update_baselines
+
+
+def _metrics(p50: float, p95: float, throughput: float) -> dict[str, float]:
+    return {"requests": 100, "throughput": throughput, "p50_ms": p50, "p95_ms": p95, "p99_ms": p95 * 2}
+
+
+def test_percentile_nearest_rank():
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([7.0], 99) == 7
+
+
+def test_summarize_and_aggregate():
+    summary = summarize([0.001 * i for i in range(1, 101)], elapsed=2.0)
+    assert summary == {"requests": 100, "throughput": 50.0, "p50_ms": 50.0, "p95_ms": 95.0, "p99_ms": 99.0}
+
+    result = aggregate([_metrics(10, 20, 100), _metrics(50, 90, 20), _metrics(12, 22, 90)])
+    assert result["p50_ms"] == 12
+    assert result["p95_ms"] == 22
+    assert result["throughput"] == 90
+    assert result["requests"] == 300
+    assert result["rounds"] == 3
+
+
+def test_compare_flags_regressions_beyond_tolerance():
+    baselines = {"list": _metrics(40, 80, 100), "detail": _metrics(10, 20, 300)}
+    results = {
+        "list": _metrics(48, 120, 70),  # p50 within 25%, p95 and throughput not
+        "detail": _metrics(12, 24, 290),
+        "new": _metrics(1, 2, 1),  # no baseline yet
+    }
+
+    regressions = compare(results, baselines, tolerance=0.25)
+
+    assert len(regressions) == 2
+    assert regressions[0].startswith("list: p95_ms 120.00 > 100.00")
+    assert regressions[1].startswith("list: throughput 70.0 < 75.0")
+
+
+def test_compare_ignores_sub_millisecond_jitter():
+    baselines = {"me": _metrics(0.4, 0.8, 2000)}
+    assert compare({"me": _metrics(0.9, 1.7, 2000)}, baselines, tolerance=0.25) == []
+    assert compare({"me": _metrics(1.5, 0.8, 2000)}, baselines, tolerance=0.25) != []
+
+
+def test_update_baselines_merges_scenarios(tmp_path):
+    path = tmp_path / "baselines.json"
+    update_baselines({"backend": "sqlite", "concurrency": 10, "scenarios": {"a": _metrics(1, 2, 3)}}, path)
+    update_baselines({"backend": "sqlite", "concurrency": 10, "scenarios": {"b": _metrics(4, 5, 6)}}, path)
+    update_baselines({"backend": "postgresql", "concurrency": 10, "scenarios": {"a": _metrics(1, 2, 3)}}, path)
+
+    baselines = json.loads(path.read_text())
+    assert list(baselines["sqlite"]["scenarios"]) == ["a", "b"]
+    assert list(baselines["postgresql"]["scenarios"]) == ["a"]
+
+    # Baselines taken at another concurrency are not comparable, start over
+    update_baselines({"backend": "sqlite", "concurrency": 50, "scenarios": {"b": _metrics(4, 5, 6)}}, path)
+    assert json.loads(path.read_text())["sqlite"] == {"concurrency": 50, "scenarios": {"b": _metrics(4, 5, 6)}}
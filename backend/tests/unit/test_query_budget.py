@@ -0,0 +1,48 @@
+import pytest
+from sqlalchemy import text
+
+from tests.conftest import test_engine
+from tests.query_budget import max_queries, statement_shape
+
+
+def test_statement_shape_ignores_values_and_in_list_length():
+    assert statement_shape("SELECT a FROM t\n  WHERE id IN (?, ?, ?)") == statement_shape("SELECT a FROM t WHERE id IN (?)")
+    assert statement_shape("SELECT a FROM t WHERE id IN ($1, $2)") == "SELECT a FROM t WHERE id IN (?)"
+    assert statement_shape("SELECT a FROM t WHERE id = ?") != statement_shape("SELECT b FROM t WHERE id = ?")
+
+
+@pytest.mark.asyncio
+async def test_max_queries_budget():
+    async with test_engine.connect() as conn:
+        with max_queries(2) as log:
+            await conn.execute(text("SELECT 1"))
+            await conn.execute(text("SELECT 2"))
+        assert log.count == 2
+
+        with pytest.raises(AssertionError, match="3 statements, budget is 2"):
+            with max_queries(2):
+                for value in (1, 2, 3):
+                    await conn.execute(text(f"SELECT {value}"))
+
+
+@pytest.mark.asyncio
+async def test_max_queries_flags_repeated_statements():
+    async with test_engine.connect() as conn:
+        with pytest.raises(AssertionError, match="Possible N\\+1"):
+            with max_queries(10):
+                for value in (1, 2, 3):
+                    await conn.execute(text("SELECT :value"), {"value": value})
+
+        with max_queries(10, max_repeats=3):
+            for value in (1, 2, 3):
+                await conn.execute(text("SELECT :value"), {"value": value})
+
+
+@pytest.mark.asyncio
+async def test_max_queries_memory_budget():
+    async with test_engine.connect() as conn:
+        with pytest.raises(AssertionError, match="Peak allocation"):
+            with max_queries(1, max_memory=1024):
+                await conn.execute(text("SELECT 1"))
+                blob = bytearray(1024 * 1024)
+                del blob
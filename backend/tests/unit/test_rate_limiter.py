@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+import jwt
+import pytest
+
+from app.core.rate_limiter import RateLimit, RateLimiter, parse_rate
+from app.core.redis import redis_client
+from app.core.security import TOKEN_PAYLOAD_STATE, create_access_token
+
+
+def test_parse_rate():
+    assert parse_rate("60/minute") == RateLimit(60, 60)
+    assert parse_rate("10/hours") == RateLimit(10, 3600)
+    with pytest.raises(ValueError):
+        parse_rate("ten per hour")
+
+
+@pytest.mark.asyncio
+async def test_acquire_enforces_limit():
+    limiter = RateLimiter(redis_client)
+    rate = parse_rate("3/minute")
+
+    assert [await limiter.acquire("ratelimit:test", rate) for _ in range(3)] == [None, None, None]
+    retry_after = await limiter.acquire("ratelimit:test", rate)
+    assert retry_after is not None and 0 < retry_after <= 20
+
+
+@pytest.mark.asyncio
+async def test_acquire_leases_tokens_locally(monkeypatch):
+    """Test that under-limit traffic only reaches Redis once per lease."""
+    limiter = RateLimiter(redis_client)
+    calls = []
+    script = limiter._script
+
+    async def counting_script(**kwargs):
+        calls.append(kwargs["args"][2])
+        return await script(**kwargs)
+
+    monkeypatch.setattr(limiter, "_script", counting_script)
+    rate = parse_rate("100/minute")
+    for _ in range(10):
+        assert await limiter.acquire("ratelimit:lease", rate) is None
+
+    assert calls == [10]
+
+
+def test_client_address_trusts_only_configured_proxies():
+    limiter = RateLimiter(redis_client, trusted_proxies="10.0.0.0/8")
+    forwarded_for = "198.51.100.7, 203.0.113.5, 10.0.0.3"
+
+    assert limiter.client_address({"client": ("10.0.0.2", 1234)}, forwarded_for) == "203.0.113.5"
+    assert limiter.client_address({"client": ("192.0.2.1", 1234)}, forwarded_for) == "192.0.2.1"
+
+
+def test_identify_prefers_principal():
+    limiter = RateLimiter(redis_client)
+    token = create_access_token(subject="doctor@test.com", expires_delta=timedelta(minutes=5))
+    scope = {"client": ("192.0.2.1", 1234), "headers": [(b"authorization", f"Bearer {token}".encode())]}
+    assert limiter.identify(scope) == "user:doctor@test.com"
+    assert scope["state"][TOKEN_PAYLOAD_STATE][1]["sub"] == "doctor@test.com"
+
+    scope["headers"] = [(b"authorization", b"Bearer not-a-token")]
+    assert limiter.identify(scope) == "ip:192.0.2.1"
+
+
+@pytest.mark.asyncio
+async def test_token_verified_once_per_request(client, doctor_token, monkeypatch):
+    """Test that authentication reuses the payload the rate limiter verified."""
+    calls = []
+    decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(args[0])
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(jwt, "decode", counting_decode)
+    response = await client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {doctor_token}"})
+    assert response.status_code == 200
+    assert calls == [doctor_token]
@@ -0,0 +1,78 @@
+import json
+import uuid
+from datetime import datetime
+from typing import Any
+
+import pytest
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from starlette.requests import ClientDisconnect
+
+from app.core.query_builder import QueryResult
+from app.core.responses import ClosingStreamingResponse, QueryResultResponse
+from app.modules.consultation.models import Consultation
+from app.modules.consultation.schemas import ConsultationList
+from app.modules.diagnoses.models import Diagnosis
+from app.modules.diagnoses.schemas import DiagnosisRead
+from app.modules.user.models import User, Role
+from app.modules.user.schemas import UserRead
+
+
+async def default_body(model: Any, page: QueryResult[Any]) -> Any:
+    """What FastAPI renders for `response_model=QueryResult[model]`."""
+    field = create_model_field("response", QueryResult[model], mode="serialization")
+    return json.loads(JSONResponse(await serialize_response(field=field, response_content=page)).body)
+
+
+@pytest.mark.asyncio
+async def test_query_result_response_matches_default_serialization():
+    doctor = User(id=uuid.uuid4(), email="doctor@test.com", full_name=None, role=Role.DOCTOR, hashed_password="x")
+    diagnosis = Diagnosis(id=uuid.uuid4(), code="A00.0", description="Cholera", created_at=datetime(2026, 1, 1))
+    consultation = Consultation(
+        id=uuid.uuid4(),
+        patient_full_name="Jane Doe",
+        doctor_id=doctor.id,
+        consultation_date=datetime(2026, 2, 1, 9, 30),
+        created_at=datetime(2026, 2, 1, 10, 0, 0, 123456),
+        doctor=doctor,
+        diagnoses=[diagnosis],
+    )
+
+    pages: list[tuple[Any, QueryResult[Any]]] = [
+        (ConsultationList, QueryResult[Any](data=[consultation], count=1, has_more=False)),
+        (UserRead, QueryResult[Any](data=[doctor], count=None, has_more=True, next_cursor="abc")),
+        (DiagnosisRead, QueryResult[DiagnosisRead].model_construct(
+            data=[DiagnosisRead.model_validate(diagnosis)], count=1, has_more=False, next_cursor=None,
+        )),
+    ]
+    for model, page in pages:
+        response = QueryResultResponse(page, model)
+        assert response.media_type == "application/json"
+        assert json.loads(response.body) == await default_body(model, page)
+
+
+@pytest.mark.asyncio
+async def test_closing_streaming_response_closes_body_on_disconnect():
+    closed = []
+
+    async def body():
+        try:
+            yield b"first"
+            yield b"second"
+        finally:
+            closed.append(True)
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            raise OSError("client went away")
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    response = ClosingStreamingResponse(body())
+    scope = {"type": "http", "asgi": {"spec_version": "2.4"}}
+    with pytest.raises(ClientDisconnect):
+        await response(scope, receive, send)
+
+    assert closed == [True]
@@ -0,0 +1,104 @@
+import time
+from datetime import timedelta
+
+import pytest
+
+from app.core import security
+from app.core.redis import redis_client
+from app.core.revocation import BLACKLIST_PREFIX, BloomFilter, RevocationMirror, revocation_mirror
+from app.core.security import create_access_token
+
+
+@pytest.fixture
+def mirror():
+    """The module-level mirror, marked in sync with (empty) Redis."""
+    revocation_mirror.ready = True
+    yield revocation_mirror
+    revocation_mirror.ready = False
+    revocation_mirror._entries.clear()
+    revocation_mirror._rebuild()
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    items = [f"token-{i}" for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+
+    assert all(item in bloom for item in items)
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+def test_mirror_check():
+    mirror = RevocationMirror(capacity=10, error_rate=0.01)
+    mirror.add("revoked", time.time() + 60)
+    mirror.add("expired", time.time() - 1)
+
+    # Not trusted until synchronised
+    assert mirror.check("revoked") is None
+
+    mirror.ready = True
+    assert mirror.check("revoked") is True
+    assert mirror.check("unknown") is False
+    assert mirror.check("expired") is None
+
+
+def test_mirror_rebuild_drops_expired_entries():
+    mirror = RevocationMirror(capacity=2, error_rate=0.01)
+    mirror.add("a", time.time() - 1)
+    mirror.add("b", time.time() - 1)
+    mirror.add("c", time.time() + 60)
+
+    assert len(mirror) == 1
+    mirror.ready = True
+    assert mirror.check("c") is True
+
+
+@pytest.mark.asyncio
+async def test_mirror_resync_from_redis():
+    await redis_client.setex(f"{BLACKLIST_PREFIX}some-jti", 60, "true")
+    mirror = RevocationMirror(capacity=10, error_rate=0.01)
+
+    await mirror.resync()
+    assert mirror.ready
+    assert mirror.check("some-jti") is True
+
+    mirror._on_message(f"other-jti {time.time() + 60}")
+    assert mirror.check("other-jti") is True
+
+    mirror._on_disconnect()
+    assert mirror.check("some-jti") is None
+
+
+@pytest.mark.asyncio
+async def test_blacklist_answered_locally(mirror, monkeypatch):
+    """Test that blacklist checks only reach Redis on a bloom filter hit."""
+    token = create_access_token(subject="user@example.com", expires_delta=timedelta(minutes=15))
+    await security.blacklist_token(token)
+
+    # Keys hold a hash of the access token, not the token itself
+    token_id = security.get_blacklist_id(token, security.get_token_payload(token))
+    assert await redis_client.exists(f"{BLACKLIST_PREFIX}{token_id}")
+    assert not await redis_client.exists(f"{BLACKLIST_PREFIX}{token}")
+
+    async def fail(*args, **kwargs):
+        raise AssertionError("Redis should not be consulted")
+
+    monkeypatch.setattr(redis_client, "exists", fail)
+    other = create_access_token(subject="other@example.com", expires_delta=timedelta(minutes=15))
+    assert await security.is_token_blacklisted(token)
+    assert not await security.is_token_blacklisted(other)
+
+
+@pytest.mark.asyncio
+async def test_legacy_blacklist_keys_honoured(mirror):
+    """Test that access tokens revoked under their raw value stay revoked until they expire."""
+    token = create_access_token(subject="user@example.com", expires_delta=timedelta(minutes=5))
+    await redis_client.setex(f"{BLACKLIST_PREFIX}{token}", 300, "true")
+    assert await security.is_token_blacklisted(token)
+
+    # Issued after the legacy window: never blacklisted under its raw value
+    later = create_access_token(subject="user@example.com", expires_delta=timedelta(days=1))
+    await redis_client.setex(f"{BLACKLIST_PREFIX}{later}", 300, "true")
+    assert not await security.is_token_blacklisted(later)
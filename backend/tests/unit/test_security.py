@@ -1,7 +1,11 @@
+import asyncio
+import time
+import bcrypt
 import pytest
 from datetime import timedelta
 from app.core import security
 from app.core.security import verify_password, get_password_hash, create_access_token
+from app.core.exceptions import PasswordHashingBusyException
 import jwt
 
 def test_password_hashing():
@@ -23,3 +27,41 @@ def test_jwt_token_expiration():
     
     with pytest.raises(jwt.ExpiredSignatureError):
         jwt.decode(token, security.settings.JWT_SECRET_KEY, algorithms=[security.ALGORITHM])
+
+@pytest.mark.asyncio
+async def test_blacklist_token():
+    token = create_access_token(subject="user@example.com", expires_delta=timedelta(minutes=15))
+    assert not await security.is_token_blacklisted(token)
+
+    await security.blacklist_token(token)
+    assert await security.is_token_blacklisted(token)
+
+def test_password_needs_rehash(monkeypatch):
+    monkeypatch.setattr(security.settings, "BCRYPT_ROUNDS", 5)
+    assert not security.password_needs_rehash(get_password_hash("secret"))
+    assert security.password_needs_rehash(bcrypt.hashpw(b"secret", bcrypt.gensalt(4)).decode())
+    assert security.password_needs_rehash("not-a-bcrypt-hash")
+
+@pytest.mark.asyncio
+async def test_password_hasher_runs_off_loop():
+    hasher = security.PasswordHasher(workers=1, max_pending=2)
+    hashed = await hasher.hash("secret")
+    assert await hasher.verify("secret", hashed)
+    assert not await hasher.verify("wrong", hashed)
+    assert hasher.hash_seconds.count == 1
+    assert hasher.verify_seconds.count == 2
+    hasher.shutdown()
+
+@pytest.mark.asyncio
+async def test_password_hasher_rejects_when_queue_full():
+    hasher = security.PasswordHasher(workers=1, max_pending=1)
+    slow = asyncio.ensure_future(hasher._run(hasher.hash_seconds, time.sleep, 0.1))
+    await asyncio.sleep(0)
+
+    with pytest.raises(PasswordHashingBusyException):
+        await hasher.verify("secret", get_password_hash("secret"))
+    assert hasher.rejected == 1
+
+    await slow
+    assert hasher.pending == 0
+    hasher.shutdown()
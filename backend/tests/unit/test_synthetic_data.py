@@ -0,0 +1,54 @@
+import uuid
+from collections import Counter
+from datetime import datetime
+
+from scripts.generate_synthetic_data import SyntheticConsultations, patient_name
+
+DOCTORS = [uuid.UUID(int=i) for i in range(1, 21)]
+DIAGNOSES = [uuid.UUID(int=1000 + i) for i in range(500)]
+
+
+def _generate(seed: int = 0, consultations: int = 5000) -> list[tuple[tuple, list[tuple]]]:
+    data = SyntheticConsultations(
+        seed=seed,
+        doctor_ids=DOCTORS,
+        diagnosis_ids=DIAGNOSES,
+        consultations=consultations,
+        start=datetime(2024, 1, 1),
+        end=datetime(2026, 1, 1),
+        growth=0.1,
+    )
+    return [batch for batch in data.batches(1000)]
+
+
+def test_synthetic_data_is_deterministic():
+    assert _generate(seed=1) == _generate(seed=1)
+    assert _generate(seed=1) != _generate(seed=2)
+
+
+def test_synthetic_data_shape():
+    batches = _generate()
+    consultations = [row for rows, _ in batches for row in rows]
+    links = [link for _, rows in batches for link in rows]
+    assert [len(rows) for rows, _ in batches] == [1000] * 5
+
+    dates = [row[3] for row in consultations]
+    assert dates == sorted(dates)
+    assert all(date.weekday() < 5 and 8 <= date.hour < 18 for date in dates)
+    assert all(row[5] > row[3] and row[6] == row[5] for row in consultations)
+    # Volume grows over the period
+    assert sum(date.year == 2025 for date in dates) > sum(date.year == 2024 for date in dates)
+
+    per_consultation = Counter(link[0] for link in links)
+    assert set(per_consultation) == {row[0] for row in consultations}
+    assert set(per_consultation.values()) <= set(range(1, 7))
+    assert len(links) == len(set((link[0], link[1]) for link in links))
+
+    # Skewed: the most common diagnosis is far above the average
+    popularity = Counter(link[1] for link in links).most_common()
+    assert popularity[0][1] > 10 * len(links) / len(DIAGNOSES)
+
+
+def test_patient_names_are_distinct_across_the_pool():
+    names = [patient_name(i) for i in range(2000)]
+    assert len(set(names)) == len(names)
@@ -6,7 +6,7 @@ from app.modules.user import service as user_service
 from app.modules.user.models import User, Role
 from app.modules.user.schemas import UserCreate, UserUpdate
 from app.modules.user.exceptions import UserAlreadyExistsException
-from app.core.schemas import PaginationParams, SortParams, SearchParams
+from app.core.schemas import CountMode, PaginationParams, SortParams, SearchParams
 from app.core.security import verify_password
 
 
@@ -263,3 +263,48 @@ async def test_get_all_users_search(async_session: AsyncSession):
     
     assert result.count == 1
     assert result.data[0].full_name == "Jane Doe"
+
+
+@pytest.mark.asyncio
+async def test_get_all_users_count_modes(async_session: AsyncSession, admin_user: User, doctor_user: User):
+    """Test exact and disabled counting with has_more."""
+    sort = SortParams(sort="email")
+    search = SearchParams(search=None)
+
+    result = await user_service.get_all_users(
+        session=async_session,
+        pagination=PaginationParams(skip=0, limit=1, count_mode=CountMode.EXACT),
+        sort=sort,
+        search=search
+    )
+    assert result.count == 2
+    assert result.has_more is True
+
+    result = await user_service.get_all_users(
+        session=async_session,
+        pagination=PaginationParams(skip=1, limit=1, count_mode=CountMode.NONE),
+        sort=sort,
+        search=search
+    )
+    assert result.count is None
+    assert result.has_more is False
+    assert len(result.data) == 1
+
+    # Past the last page the total is still reported
+    result = await user_service.get_all_users(
+        session=async_session,
+        pagination=PaginationParams(skip=5, limit=1),
+        sort=sort,
+        search=search
+    )
+    assert result.count == 2
+    assert result.data == []
+
+    # Estimates are PostgreSQL-only; other databases fall back to an exact count
+    result = await user_service.get_all_users(
+        session=async_session,
+        pagination=PaginationParams(skip=0, limit=10, count_mode=CountMode.ESTIMATED),
+        sort=sort,
+        search=search
+    )
+    assert result.count == 2